@@ -0,0 +1,52 @@
+import argparse
+import json
+import sys
+
+from benchmarks.runner import BenchmarkRunner, parse_mix
+from benchmarks.scenarios import SCENARIOS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Drive load through StripeClient.")
+    parser.add_argument("--mix", default=",".join(f"{name}=1" for name in SCENARIOS),
+                        help="weighted scenarios, e.g. payment_intent_flow=3,charge_refund=1")
+    parser.add_argument("--mode", choices=["closed", "fixed"], default="closed")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, help="scenario iterations per second (fixed mode)")
+    parser.add_argument("--max-backlog", type=int,
+                        help="fixed mode: iterations queued or running before arrivals are dropped (default 4 per worker)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--base-url", help="defaults to settings.BASE_URL")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        runner = BenchmarkRunner(
+            parse_mix(args.mix),
+            workers=args.workers,
+            duration=args.duration,
+            mode=args.mode,
+            rate=args.rate,
+            base_url=args.base_url,
+            seed=args.seed,
+            max_backlog=args.max_backlog,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    report = runner.run()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        total = report["total"]
+        print(f"{total['requests']} requests, {total['throughput_rps']:.1f} req/s, "
+              f"{total['error_rate']:.2%} errors, {total['dropped']} dropped -> {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
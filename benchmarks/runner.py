@@ -0,0 +1,224 @@
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.scenarios import SCENARIOS
+from src.api_client import StripeClient
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Recorder:
+    """Thread-safe store of latency samples (seconds) and error counts per label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, label: str, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self.samples.setdefault(label, []).append(elapsed)
+            if failed:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def step(self, label: str, call: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            response = call()
+        except Exception as e:
+            self.record(label, time.perf_counter() - start, True)
+            raise StepFailed(label) from e
+        failed = response.status_code >= 400
+        self.record(label, time.perf_counter() - start, failed)
+        if failed:
+            # Later steps depend on this one's result, so end the iteration.
+            raise StepFailed(label)
+        return response
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_samples))) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def summarize(recorder: Recorder, wall_time: float) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for label, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        errors = recorder.errors.get(label, 0)
+        summary[label] = {
+            "count": len(ordered),
+            "errors": errors,
+            "error_rate": errors / len(ordered),
+            "throughput_rps": len(ordered) / wall_time if wall_time else 0.0,
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
+    return summary
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "payment_intent_flow=3,charge_refund=1" into scenario weights."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}'. Available: {', '.join(SCENARIOS)}")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Weight of '{name}' is not a number: '{weight}'") from None
+        if not mix[name] > 0:
+            raise ValueError(f"Weight of '{name}' must be positive, got '{weight}'")
+    if not mix:
+        raise ValueError("Scenario mix is empty")
+    return mix
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRunner:
+    """
+    Replays a weighted scenario mix through StripeClient.
+
+    closed mode: ``workers`` threads each start a new iteration as soon as
+    their previous one finishes, so throughput is whatever the target sustains.
+    fixed mode: iterations are started at ``rate`` per second on a pool of
+    ``workers`` threads. Scenario latency is measured from the scheduled start,
+    so time spent queued behind a slow target is counted (no coordinated
+    omission). At most ``max_backlog`` iterations (default 4 per worker) are
+    queued or running; an arrival beyond that is not started and is counted
+    in ``dropped`` instead of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        mix: Dict[str, float],
+        workers: int = 8,
+        duration: float = 10.0,
+        mode: str = "closed",
+        rate: Optional[float] = None,
+        base_url: Optional[str] = None,
+        seed: Optional[int] = None,
+        max_backlog: Optional[int] = None,
+    ):
+        if mode not in ("closed", "fixed"):
+            raise ValueError("mode must be 'closed' or 'fixed'")
+        if mode == "fixed" and not rate:
+            raise ValueError("fixed mode needs a rate")
+        self.mix = mix
+        self.workers = workers
+        self.duration = duration
+        self.mode = mode
+        self.rate = rate
+        self.max_backlog = max_backlog or 4 * workers
+        self.dropped = 0
+        self.client = StripeClient(base_url=base_url)
+        self.endpoints = Recorder()
+        self.scenarios = Recorder()
+        self._names = list(mix)
+        self._weights = [mix[name] for name in self._names]
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _pick(self) -> str:
+        with self._random_lock:
+            return self._random.choices(self._names, self._weights)[0]
+
+    def _iteration(self, scheduled: Optional[float] = None) -> None:
+        name = self._pick()
+        start = scheduled if scheduled is not None else time.perf_counter()
+        failed = False
+        try:
+            SCENARIOS[name](self.client, self.endpoints.step)
+        except StepFailed:
+            failed = True
+        self.scenarios.record(name, time.perf_counter() - start, failed)
+
+    def _closed_loop(self, deadline: float) -> None:
+        def worker():
+            while time.perf_counter() < deadline:
+                self._iteration()
+
+        threads = [threading.Thread(target=worker, name=f"bench-{i}") for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _fixed_rate(self, deadline: float) -> None:
+        interval = 1.0 / self.rate  # type: ignore[operator]
+        backlog = threading.BoundedSemaphore(self.max_backlog)
+
+        def iteration(scheduled: float) -> None:
+            try:
+                self._iteration(scheduled)
+            finally:
+                backlog.release()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bench") as executor:
+            next_start = time.perf_counter()
+            while next_start < deadline:
+                delay = next_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if backlog.acquire(blocking=False):
+                    executor.submit(iteration, next_start)
+                else:
+                    self.dropped += 1
+                next_start += interval
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        deadline = started + self.duration
+        try:
+            if self.mode == "closed":
+                self._closed_loop(deadline)
+            else:
+                self._fixed_rate(deadline)
+        finally:
+            self.client.close()
+        wall_time = time.perf_counter() - started
+
+        endpoints = summarize(self.endpoints, wall_time)
+        total_requests = sum(int(stats["count"]) for stats in endpoints.values())
+        total_errors = sum(int(stats["errors"]) for stats in endpoints.values())
+        return {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": time.time(),
+                "base_url": self.client.base_url,
+                "mode": self.mode,
+                "workers": self.workers,
+                "rate": self.rate,
+                "max_backlog": self.max_backlog if self.mode == "fixed" else None,
+                "duration_s": self.duration,
+                "mix": self.mix,
+            },
+            "total": {
+                "requests": total_requests,
+                "errors": total_errors,
+                "error_rate": total_errors / total_requests if total_requests else 0.0,
+                "dropped": self.dropped,
+                "throughput_rps": total_requests / wall_time if wall_time else 0.0,
+                "wall_time_s": wall_time,
+            },
+            "endpoints": endpoints,
+            "scenarios": summarize(self.scenarios, wall_time),
+        }
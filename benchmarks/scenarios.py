@@ -0,0 +1,46 @@
+from typing import Callable, Dict
+
+from config.constants import Endpoints
+from src.api_client import StripeClient
+
+# A scenario runs one iteration of a flow through ``step(label, call)``, which
+# times the call, records it under ``label`` and returns the response.
+Step = Callable[[str, Callable[[], object]], object]
+Scenario = Callable[[StripeClient, Step], None]
+
+
+def payment_intent_flow(client: StripeClient, step: Step) -> None:
+    created = step(f"POST {Endpoints.PAYMENT_INTENTS}", lambda: client.create_payment_intent(
+        amount=2000, currency="usd", description="benchmark", capture_method="manual"))
+    pi_id = created["id"]
+    step(f"POST {Endpoints.CONFIRM_PAYMENT_INTENT}",
+         lambda: client.confirm_payment_intent(pi_id, payment_method="pm_card_visa"))
+    step(f"POST {Endpoints.CAPTURE_PAYMENT_INTENT}", lambda: client.capture_payment_intent(pi_id))
+
+
+def charge_refund(client: StripeClient, step: Step) -> None:
+    charge = step(f"POST {Endpoints.CHARGES}", lambda: client.create_charge(amount=2000, currency="usd"))
+    charge_id = charge["id"]
+    step(f"POST {Endpoints.REFUNDS}", lambda: client.create_refund(charge=charge_id))
+
+
+def customer_crud(client: StripeClient, step: Step) -> None:
+    customer = step(f"POST {Endpoints.CUSTOMERS}", lambda: client.create_customer(
+        email="bench@example.com", name="Benchmark Customer"))
+    customer_id = customer["id"]
+    step(f"GET {Endpoints.CUSTOMER}", lambda: client.retrieve_customer(customer_id))
+    step(f"POST {Endpoints.CUSTOMER}", lambda: client.update_customer(customer_id, name="Renamed"))
+    step(f"DELETE {Endpoints.CUSTOMER}", lambda: client.delete_customer(customer_id))
+
+
+def list_pages(client: StripeClient, step: Step) -> None:
+    step(f"GET {Endpoints.PAYMENT_INTENTS}", lambda: client.list_payment_intents(limit=10))
+    step(f"GET {Endpoints.CHARGES}", lambda: client.list_charges(limit=10))
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "payment_intent_flow": payment_intent_flow,
+    "charge_refund": charge_refund,
+    "customer_crud": customer_crud,
+    "list_pages": list_pages,
+}
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+from config.settings import DOTENV_PATH, settings
+
+# What a test module, an xdist worker or a short script imports on start.
+STARTUP_MODULES = ("config.settings", "src.api_client", "src.async_client", "src.helpers")
+
+# Imported on first use only; loading one of these at startup is a regression.
+# python-dotenv is used, and so imported, only when there is a .env file.
+LAZY_DEPENDENCIES = ("aiohttp", "jsonschema") + (() if DOTENV_PATH else ("dotenv",))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Entry = Tuple[str, int, int, int]
+
+
+def parse_importtime(output: str) -> List[Entry]:
+    """(module, depth, self us, cumulative us) for each line of ``-X importtime`` output, in order."""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        head, cumulative, name = line.split("|")
+        own = head.split(":", 1)[1].strip()
+        if not own.isdigit():  # the header line
+            continue
+        # One space after the bar, then two per level of nesting.
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), depth, int(own), int(cumulative)))
+    return entries
+
+
+def _importtime(code: str) -> List[Entry]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_startup(modules: Sequence[str] = STARTUP_MODULES, runs: int = 3) -> Dict[str, Any]:
+    """
+    Import ``modules`` in a fresh interpreter ``runs`` times and keep the
+    fastest run. ``total_ms`` counts what those imports load on top of the
+    interpreter's own startup (site, encodings...).
+    """
+    baseline = {name for name, depth, _, _ in _importtime("pass") if depth == 0}
+    best = None
+    for _ in range(max(runs, 1)):
+        entries = _importtime("import " + ", ".join(modules))
+        total = sum(cumulative for name, depth, _, cumulative in entries if depth == 0 and name not in baseline)
+        if best is None or total < best[0]:
+            best = (total, entries)
+    total, entries = best
+    loaded = {name for name, _, _, _ in entries}
+    top = [name for name, depth, _, _ in entries if depth == 0 and name not in baseline]
+    heaviest = sorted(entries, key=lambda entry: -entry[2])[:10]
+    return {
+        "total_ms": round(total / 1000, 1),
+        "modules": {name: round(cumulative / 1000, 1)
+                    for name, depth, _, cumulative in entries if depth == 0 and name in top},
+        "heaviest_self_ms": {name: round(own / 1000, 1) for name, _, own, _ in heaviest},
+        "eager": sorted(name for name in LAZY_DEPENDENCIES if name in loaded),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Measure import time with -X importtime against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=settings.STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters; the fastest counts")
+    parser.add_argument("modules", nargs="*", default=list(STARTUP_MODULES))
+    args = parser.parse_args(argv)
+
+    report = measure_startup(args.modules, runs=args.runs)
+    report["budget_ms"] = args.budget_ms
+    print(json.dumps(report, indent=2))
+    failed = False
+    if report["total_ms"] > args.budget_ms:
+        print(f"startup {report['total_ms']}ms is over the {args.budget_ms:g}ms budget", file=sys.stderr)
+        failed = True
+    if report["eager"]:
+        print(f"imported at startup, should be lazy: {', '.join(report['eager'])}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,118 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _find_dotenv() -> str:
+    # Where load_dotenv() looks: this directory, then each parent.
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return ""
+        directory = parent
+
+
+# Importing python-dotenv is skipped (it is most of this module's import
+# time) when there is no .env to read. The values below are resolved once,
+# when this module is first imported, and every worker reuses them.
+DOTENV_PATH = _find_dotenv()
+if DOTENV_PATH:
+    from dotenv import load_dotenv
+
+    load_dotenv(DOTENV_PATH)
+
 
 class Settings:
     BASE_URL = os.getenv("STRIPE_MOCK_URL", "http://localhost:12111")
     API_KEY = os.getenv("STRIPE_API_KEY", "sk_test_123")
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
     VERIFY_SSL = os.getenv("VERIFY_SSL", "false").lower() == "true"
+
+    # Connection pool
+    POOL_CONNECTIONS = int(os.getenv("POOL_CONNECTIONS", "10"))
+    POOL_MAXSIZE = int(os.getenv("POOL_MAXSIZE", "32"))
+    POOL_BLOCK = os.getenv("POOL_BLOCK", "true").lower() == "true"
+    POOL_MAX_RETRIES = int(os.getenv("POOL_MAX_RETRIES", "0"))
+
+    # Async client
+    ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "100"))
+
+    # Bulk operations
+    BULK_MAX_WORKERS = int(os.getenv("BULK_MAX_WORKERS", "16"))
+
+    # Form encoding
+    ENCODER_CACHE_SIZE = int(os.getenv("ENCODER_CACHE_SIZE", "1024"))
+
+    # Schema validation: compiled ad-hoc schemas kept (least recently used go first)
+    SCHEMA_CACHE_SIZE = int(os.getenv("SCHEMA_CACHE_SIZE", "256"))
+
+    # Retries
+    RETRY_MAX_RETRIES = int(os.getenv("RETRY_MAX_RETRIES", "2"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.1"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "5.0"))
+    RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "30.0"))
+    RETRY_BUDGET = int(os.getenv("RETRY_BUDGET", "100"))
+    AUTO_IDEMPOTENCY_KEY = os.getenv("AUTO_IDEMPOTENCY_KEY", "true").lower() == "true"
+
+    # Rate limiting (0 / empty disables; SHARED is true, false or auto = under xdist)
+    RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "0"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "0"))
+    RATE_LIMIT_FAMILIES = os.getenv("RATE_LIMIT_FAMILIES", "")
+    RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "auto").lower()
+    RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR", "")
+
+    # GET response cache (opt-in)
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "false").lower() == "true"
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "30.0"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+    # Fixture pool: created_* objects pre-created per session (0 = create inline)
+    FIXTURE_POOL_SIZE = int(os.getenv("FIXTURE_POOL_SIZE", "8"))
+    FIXTURE_POOL_WORKERS = int(os.getenv("FIXTURE_POOL_WORKERS", "8"))
+
+    # Sharding: comma-separated stripe-mock URLs to spread requests over (fewer than 2 = BASE_URL only)
+    SHARD_URLS = os.getenv("SHARD_URLS", "")
+    SHARD_POLICY = os.getenv("SHARD_POLICY", "round_robin").lower()
+    SHARD_EJECT_AFTER = int(os.getenv("SHARD_EJECT_AFTER", "1"))
+    SHARD_COOLDOWN = float(os.getenv("SHARD_COOLDOWN", "5.0"))
+    SHARD_AFFINITY_SIZE = int(os.getenv("SHARD_AFFINITY_SIZE", "100000"))
+
+    # Backend: "stripe-mock" (HTTP to BASE_URL) or "inprocess" (src.mock_server, no sockets)
+    MOCK_BACKEND = os.getenv("MOCK_BACKEND", "stripe-mock").lower()
+
+    # Record/replay cassette (off, record or replay)
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/stripe-mock.cassette")
+
+    # Postman collection run by src/postman.py
+    POSTMAN_COLLECTION = os.getenv("POSTMAN_COLLECTION", "postman/stripe-mock API testing.postman_collection.json")
+    POSTMAN_ENVIRONMENT = os.getenv("POSTMAN_ENVIRONMENT", "postman/env.postman_environment.json")
+
+    # Test-impact map written by pytest --impact-record
+    IMPACT_MAP = os.getenv("IMPACT_MAP", "impact_map.json")
+
+    # Test timings written by pytest --timings-record / --lpt (SMOOTHING = weight of the latest run)
+    TEST_TIMINGS = os.getenv("TEST_TIMINGS", "test_timings.json")
+    TEST_TIMINGS_SMOOTHING = float(os.getenv("TEST_TIMINGS_SMOOTHING", "0.5"))
+    # --lpt keeps tests sharing a fixture on one worker when its setup took this long (seconds)
+    LPT_GROUP_THRESHOLD = float(os.getenv("LPT_GROUP_THRESHOLD", "0.05"))
+
+    # Negative-testing engine (src/negative.py): seconds per run, threads, results without a
+    # new error signature before an operation counts as explored, parameters mutated at once
+    NEGATIVE_TIME_BUDGET = float(os.getenv("NEGATIVE_TIME_BUDGET", "10"))
+    NEGATIVE_MAX_WORKERS = int(os.getenv("NEGATIVE_MAX_WORKERS", "16"))
+    NEGATIVE_PATIENCE = int(os.getenv("NEGATIVE_PATIENCE", "40"))
+    NEGATIVE_MAX_ORDER = int(os.getenv("NEGATIVE_MAX_ORDER", "3"))
+
+    # Import-time budget for python -m benchmarks.startup (ms)
+    STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "300"))
+
+    # Request metrics
+    METRICS_OUTPUT = os.getenv("METRICS_OUTPUT", "request_metrics.json")
+    METRICS_SUMMARY_LIMIT = int(os.getenv("METRICS_SUMMARY_LIMIT", "10"))
     
     @classmethod
     def get_base_url(cls) -> str:
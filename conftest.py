@@ -1,81 +1,199 @@
+import copy
+import os
 import pytest
+import pytest_asyncio
 from src.api_client import StripeClient
+from src.async_client import AsyncStripeClient
+from src.fixture_pool import FixturePool
+from src.instrumentation import HistogramCollector
 from config.settings import settings
 
+# --impact-record / --impact-endpoints / --impact-modules / --impact-since, --timings-record / --lpt
+pytest_plugins = ["src.impact", "src.scheduling"]
+
+# Per-endpoint latency histograms for every client built by the fixtures below.
+request_metrics = HistogramCollector()
+
+SAMPLE_PAYMENT_INTENT_DATA = {
+    "amount": 2000,
+    "currency": "usd",
+    "description": "Test payment intent",
+    "metadata": {"test_id": "pytest_001"}
+}
+
+SAMPLE_CUSTOMER_DATA = {
+    "email": "test@example.com",
+    "name": "Test Customer",
+    "phone": "+15555555555",
+    "description": "Test customer",
+    "metadata": {"test_id": "pytest_001"}
+}
+
+SAMPLE_REFUND_DATA = {
+    "reason": "requested_by_customer",
+    "metadata": {"test_id": "pytest_001"}
+}
+
+SAMPLE_CHARGE_DATA = {
+    "amount": 2000,
+    "currency": "usd",
+    "description": "Test charge",
+}
+
+
+def create_refund_with_charge(client):
+    # First create a charge to refund
+    charge_response = client.create_charge(amount=2000, currency="usd")
+    charge_id = charge_response.json()["id"]
+
+    # Then create refund
+    return client.create_refund(charge=charge_id, **SAMPLE_REFUND_DATA)
+
+
+# Fixture name -> how to create one object for it.
+POOLED_FIXTURES = {
+    "created_customer": lambda client: client.create_customer(**SAMPLE_CUSTOMER_DATA),
+    "created_payment_intent": lambda client: client.create_payment_intent(**SAMPLE_PAYMENT_INTENT_DATA),
+    "created_charge": lambda client: client.create_charge(**SAMPLE_CHARGE_DATA),
+    "created_refund": create_refund_with_charge,
+}
+
+
+def pytest_collection_modifyitems(config, items):
+    skips = {}
+    if settings.CASSETTE_MODE == "replay" or settings.MOCK_BACKEND == "inprocess":
+        skips["live"] = pytest.mark.skip(reason="needs a running stripe-mock")
+    if settings.MOCK_BACKEND == "inprocess":
+        skips["stripe_mock"] = pytest.mark.skip(reason="relies on stripe-mock being stateless")
+    for item in items:
+        for marker, skip in skips.items():
+            if marker in item.keywords:
+                item.add_marker(skip)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not settings.METRICS_OUTPUT or not request_metrics.request_count:
+        return
+    path = settings.METRICS_OUTPUT
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if worker:
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{worker}{ext}"
+    request_metrics.dump(path)
+
+
+def pytest_terminal_summary(terminalreporter):
+    top = request_metrics.top(settings.METRICS_SUMMARY_LIMIT)
+    if not top:
+        return
+    terminalreporter.section("request timings by endpoint")
+    for key, stats in top:
+        terminalreporter.write_line(
+            f"{key:<45} n={stats['count']:<5} total={stats['total_s']:.3f}s "
+            f"p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms"
+        )
+
 
 @pytest.fixture(scope="session")
-def api_client(): return StripeClient()
+def api_client():
+    client = StripeClient()
+    client.hooks.register(request_metrics)
+    yield client
+    client.close()
 
 
 @pytest.fixture(scope="session")
-def unauthenticated_client(): return StripeClient(api_key="")
+def unauthenticated_client():
+    client = StripeClient(api_key="")
+    yield client
+    client.close()
 
 @pytest.fixture(scope="session")
-def invalid_auth_client(): return StripeClient(api_key="invalid_key")
+def invalid_auth_client():
+    client = StripeClient(api_key="invalid_key")
+    yield client
+    client.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_api_client():
+    client = AsyncStripeClient()
+    client.hooks.register(request_metrics)
+    yield client
+    await client.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_unauthenticated_client():
+    client = AsyncStripeClient(api_key="")
+    yield client
+    await client.close()
+
+
+@pytest.fixture(scope="session")
+def fixture_pool(request):
+    """
+    Objects for the created_* fixtures, created in parallel in the background
+    (per xdist worker, since each worker has its own session). Each object is
+    handed to one test only. None when FIXTURE_POOL_SIZE=0.
+    """
+    client = StripeClient()
+    factories = {name: (lambda create=create: create(client)) for name, create in POOLED_FIXTURES.items()}
+    pool = FixturePool.from_settings(factories)
+    if pool is not None:
+        demand = {}
+        for item in request.session.items:
+            for name in POOLED_FIXTURES:
+                if name in getattr(item, "fixturenames", ()):
+                    demand[name] = demand.get(name, 0) + 1
+        pool.prefill(demand)
+    yield pool
+    if pool is not None:
+        pool.close()
+    client.close()
+
+
+def take_pooled(fixture_pool, api_client, name):
+    if fixture_pool is None:
+        return POOLED_FIXTURES[name](api_client)
+    return fixture_pool.take(name)
 
 
 @pytest.fixture
 def sample_payment_intent_data():
-    return {
-        "amount": 2000,
-        "currency": "usd",
-        "description": "Test payment intent",
-        "metadata": {"test_id": "pytest_001"}
-    }
+    return copy.deepcopy(SAMPLE_PAYMENT_INTENT_DATA)
 
 
 @pytest.fixture
 def sample_customer_data():
-    return {
-        "email": "test@example.com",
-        "name": "Test Customer",
-        "phone": "+15555555555",
-        "description": "Test customer",
-        "metadata": {"test_id": "pytest_001"}
-    }
+    return copy.deepcopy(SAMPLE_CUSTOMER_DATA)
 
 
 @pytest.fixture
 def sample_refund_data():
-    return {
-        "reason": "requested_by_customer",
-        "metadata": {"test_id": "pytest_001"}
-    }
+    return copy.deepcopy(SAMPLE_REFUND_DATA)
 
 
 @pytest.fixture
 def sample_charge_data():
-    return {
-        "amount": 2000,
-        "currency": "usd",
-        "description": "Test charge",
-    }
+    return copy.deepcopy(SAMPLE_CHARGE_DATA)
 
 
 @pytest.fixture(scope="function")
-def created_customer(api_client, sample_customer_data):
-    response = api_client.create_customer(**sample_customer_data)
-    return response
+def created_customer(fixture_pool, api_client):
+    return take_pooled(fixture_pool, api_client, "created_customer")
 
 
 @pytest.fixture(scope="function")
-def created_payment_intent(api_client, sample_payment_intent_data):
-    response = api_client.create_payment_intent(**sample_payment_intent_data)
-    return response
+def created_payment_intent(fixture_pool, api_client):
+    return take_pooled(fixture_pool, api_client, "created_payment_intent")
 
 
 @pytest.fixture(scope="function")
-def created_charge(api_client, sample_charge_data):
-    response = api_client.create_charge(**sample_charge_data)
-    return response
+def created_charge(fixture_pool, api_client):
+    return take_pooled(fixture_pool, api_client, "created_charge")
 
 
 @pytest.fixture(scope="function")
-def created_refund(api_client, sample_refund_data):
-    # First create a charge to refund
-    charge_response = api_client.create_charge(amount=2000, currency="usd")
-    charge_id = charge_response.json()["id"]
-    
-    # Then create refund
-    refund_response = api_client.create_refund(charge=charge_id, **sample_refund_data)
-    return refund_response
+def created_refund(fixture_pool, api_client):
+    return take_pooled(fixture_pool, api_client, "created_refund")
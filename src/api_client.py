@@ -1,56 +1,167 @@
+import abc
+import time
+import uuid
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Sequence, Tuple, Type, Union
 from config.settings import settings
-from config.constants import Endpoints
+from src.bulk import BulkResult, run_bulk
+from src.cache import ResponseCache
+from src.cassette import CassetteAdapter
+from src.encoding import encode_form, encode_query
+from src.instrumentation import Hooks, RequestEvent
+from src.pagination import SEARCH_CURSOR, auto_paging_iter
+from src.ratelimit import RateLimiter
+from src.resources import Charge, Customer, ListObject, PaymentIntent, Refund, StreamingList, StripeObject
+from src.retry import RetryPolicy
+from src.routing import BoundRoute, bind_routes
+from src.sharding import ShardedAdapter
+from src.transport import build_session, connection_timings, reset_connection_timings
 
-class StripeClient:
-    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+class BaseStripeClient(abc.ABC):
+    """
+    Endpoint surface shared by the sync and async clients.
+
+    Every endpoint method returns whatever ``_request`` returns, so subclasses
+    only decide how a request is sent: StripeClient returns a response,
+    AsyncStripeClient returns an awaitable resolving to one.
+    """
+
+    # Transport exceptions the retry policy may retry, set by each subclass.
+    _connection_errors: Tuple[Type[BaseException], ...] = ()
+    _timeout_errors: Tuple[Type[BaseException], ...] = ()
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
         self.base_url = base_url or settings.get_base_url()
         self.api_key = api_key if api_key is not None else settings.API_KEY
         self.timeout = settings.REQUEST_TIMEOUT
         self.verify_ssl = settings.VERIFY_SSL
+        self.hooks = Hooks()
+        self.retry_policy = retry_policy or RetryPolicy.from_settings()
+        # None when no RATE_LIMIT_* setting is configured.
+        self._owns_rate_limiter = rate_limiter is None
+        self.rate_limiter = rate_limiter or RateLimiter.from_settings(self.base_url)
+        # None unless CACHE_ENABLED or a cache is passed in.
+        self.cache = cache if cache is not None else ResponseCache.from_settings()
+    
+    def add_hook(self, event: str, callback: Callable[..., Any]) -> None:
+        """Register ``callback`` for "before_request", "after_response" or "on_error"."""
+        self.hooks.add(event, callback)
     
     @property
-    def headers(self) -> Dict[str, str]:
+    def base_url(self) -> str:
+        return self._base_url
+    
+    @base_url.setter
+    def base_url(self, value: str) -> None:
+        self._base_url = value
+        # Each operation's URL prefix is built here once, not per request.
+        self._routes: Dict[str, BoundRoute] = bind_routes(value)
+    
+    @property
+    def api_key(self) -> str:
+        return self._api_key
+    
+    @api_key.setter
+    def api_key(self, value: str) -> None:
+        self._api_key = value
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
         }
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
-        return headers
+        if value:
+            headers["Authorization"] = f"Bearer {value}"
+        self._headers = headers
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Default request headers, built when api_key is set. Copy before changing."""
+        return self._headers
     
     def _build_url(self, endpoint: str) -> str:
         return f"{self.base_url}{endpoint}"
     
+    def _call(self, operation: str, object_id: Optional[str], **kwargs):
+        """Send the request for endpoint method ``operation`` through its precomputed route."""
+        route = self._routes[operation]
+        if object_id is None:
+            path, url = route.head, route.url_head
+        else:
+            path = route.head + object_id + route.tail
+            url = route.url_head + object_id + route.tail
+        return self._request(route.method, path, url=url, template=route.template, **kwargs)
+    
+    def _request_headers(self, method: str) -> Dict[str, str]:
+        # One key per logical request, reused by every retry of it, so a
+        # retried create can never create the object twice.
+        if method == "POST" and self.retry_policy.enabled and settings.AUTO_IDEMPOTENCY_KEY:
+            return {**self._headers, "Idempotency-Key": str(uuid.uuid4())}
+        return self._headers
+    
+    def _error_kind(self, error: BaseException) -> Optional[str]:
+        if isinstance(error, self._connection_errors):
+            return "connection"
+        if isinstance(error, self._timeout_errors):
+            return "timeout"
+        return None
+    
+    def retry_stats(self) -> Dict[str, Any]:
+        return self.retry_policy.stats()
+    
+    def cache_stats(self) -> Dict[str, int]:
+        if self.cache is None:
+            return {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0, "entries": 0, "bytes": 0}
+        return self.cache.stats()
+    
+    def _cached(self, method: str, endpoint: str, query: Optional[str]) -> Any:
+        if self.cache is not None and method == "GET":
+            return self.cache.get(endpoint, query)
+        return None
+    
+    def _update_cache(self, method: str, endpoint: str, query: Optional[str], response: Any, generation: int) -> None:
+        if self.cache is None:
+            return
+        if method == "GET":
+            if 200 <= response.status_code < 300:
+                self.cache.put(endpoint, query, response, generation)
+        else:
+            self.cache.invalidate(endpoint)
+    
+    def rate_limit_stats(self) -> Dict[str, float]:
+        if self.rate_limiter is None:
+            return {"waits": 0, "waited_s": 0.0}
+        return self.rate_limiter.stats()
+    
+    def _close_rate_limiter(self) -> None:
+        if self._owns_rate_limiter and self.rate_limiter is not None:
+            self.rate_limiter.close()
+    
+    @abc.abstractmethod
     def _request(
         self,
         method: str,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        resource: Type[StripeObject] = StripeObject,
+        url: Optional[str] = None,
+        template: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
-        
-        url = self._build_url(endpoint)
-        
-        return requests.request(
-            method=method,
-            url=url,
-            headers=self.headers,
-            data=data,
-            params=params,
-            timeout=self.timeout,
-            verify=self.verify_ssl,
-            **kwargs
-        )
+    ):
+        """Send one logical request (retries included) and return its response, or an awaitable of it."""
     
-    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> StripeObject:
         return self._request("GET", endpoint, params=params, **kwargs)
     
-    def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+    def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None, **kwargs) -> StripeObject:
         return self._request("POST", endpoint, data=data, **kwargs)
     
-    def delete(self, endpoint: str, **kwargs) -> requests.Response:
+    def delete(self, endpoint: str, **kwargs) -> StripeObject:
         return self._request("DELETE", endpoint, **kwargs)
 
     # Payment intents    
@@ -63,7 +174,7 @@ class StripeClient:
         payment_method: Optional[str] = None,
         metadata: Optional[Dict[str, str]] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> PaymentIntent:
 
         data = {}
         if amount is not None:
@@ -77,23 +188,20 @@ class StripeClient:
         if payment_method:
             data["payment_method"] = payment_method
         if metadata:
-            for key, value in metadata.items():
-                data[f"metadata[{key}]"] = value
+            data["metadata"] = metadata
         data.update(kwargs)
         
-        return self.post(Endpoints.PAYMENT_INTENTS, data=data)
+        return self._call("create_payment_intent", None, data=data, resource=PaymentIntent)
     
-    def retrieve_payment_intent(self, payment_intent_id: str) -> requests.Response:
-        endpoint = Endpoints.PAYMENT_INTENT.format(id=payment_intent_id)
-        return self.get(endpoint)
+    def retrieve_payment_intent(self, payment_intent_id: str) -> PaymentIntent:
+        return self._call("retrieve_payment_intent", payment_intent_id, resource=PaymentIntent)
     
     def update_payment_intent(
         self,
         payment_intent_id: str,
         **kwargs
-    ) -> requests.Response:
-        endpoint = Endpoints.PAYMENT_INTENT.format(id=payment_intent_id)
-        return self.post(endpoint, data=kwargs)
+    ) -> PaymentIntent:
+        return self._call("update_payment_intent", payment_intent_id, data=kwargs, resource=PaymentIntent)
     
     def list_payment_intents(
         self,
@@ -101,7 +209,7 @@ class StripeClient:
         starting_after: Optional[str] = None,
         ending_before: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> ListObject:
         params = {}
         if limit:
             params["limit"] = limit
@@ -111,52 +219,49 @@ class StripeClient:
             params["ending_before"] = ending_before
         params.update(kwargs)
         
-        return self.get(Endpoints.PAYMENT_INTENTS, params=params)
+        return self._call("list_payment_intents", None, params=params, resource=ListObject)
     
     def confirm_payment_intent(
         self,
         payment_intent_id: str,
         payment_method: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> PaymentIntent:
 
-        endpoint = Endpoints.CONFIRM_PAYMENT_INTENT.format(id=payment_intent_id)
         data = {}
         if payment_method:
             data["payment_method"] = payment_method
         data.update(kwargs)
         
-        return self.post(endpoint, data=data if data else None)
+        return self._call("confirm_payment_intent", payment_intent_id, data=data if data else None, resource=PaymentIntent)
     
     def capture_payment_intent(
         self,
         payment_intent_id: str,
         amount_to_capture: Optional[int] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> PaymentIntent:
 
-        endpoint = Endpoints.CAPTURE_PAYMENT_INTENT.format(id=payment_intent_id)
         data = {}
         if amount_to_capture:
             data["amount_to_capture"] = amount_to_capture
         data.update(kwargs)
         
-        return self.post(endpoint, data=data if data else None)
+        return self._call("capture_payment_intent", payment_intent_id, data=data if data else None, resource=PaymentIntent)
     
     def cancel_payment_intent(
         self,
         payment_intent_id: str,
         cancellation_reason: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> PaymentIntent:
 
-        endpoint = Endpoints.CANCEL_PAYMENT_INTENT.format(id=payment_intent_id)
         data = {}
         if cancellation_reason:
             data["cancellation_reason"] = cancellation_reason
         data.update(kwargs)
         
-        return self.post(endpoint, data=data if data else None)
+        return self._call("cancel_payment_intent", payment_intent_id, data=data if data else None, resource=PaymentIntent)
     
     # Customers
 
@@ -168,7 +273,7 @@ class StripeClient:
         description: Optional[str] = None,
         metadata: Optional[Dict[str, str]] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> Customer:
         
         data = {}
         if email:
@@ -180,32 +285,21 @@ class StripeClient:
         if description:
             data["description"] = description
         if metadata:
-            for key, value in metadata.items():
-                data[f"metadata[{key}]"] = value
+            data["metadata"] = metadata
         data.update(kwargs)
         
-        return self.post(Endpoints.CUSTOMERS, data=data if data else None)
+        return self._call("create_customer", None, data=data if data else None, resource=Customer)
     
-    def retrieve_customer(self, customer_id: str) -> requests.Response:
-        endpoint = Endpoints.CUSTOMER.format(id=customer_id)
-        return self.get(endpoint)
+    def retrieve_customer(self, customer_id: str) -> Customer:
+        return self._call("retrieve_customer", customer_id, resource=Customer)
     
-    def update_customer(self, customer_id: str, **kwargs) -> requests.Response:
+    def update_customer(self, customer_id: str, **kwargs) -> Customer:
 
-        endpoint = Endpoints.CUSTOMER.format(id=customer_id)
-        data = {}
-        for key, value in kwargs.items():
-            if key == 'metadata' and isinstance(value, dict):
-                for k, v in value.items():
-                    data[f"metadata[{k}]"] = v
-            else:
-                data[key] = value
-        return self.post(endpoint, data=data)
+        return self._call("update_customer", customer_id, data=kwargs, resource=Customer)
     
-    def delete_customer(self, customer_id: str) -> requests.Response:
+    def delete_customer(self, customer_id: str) -> Customer:
 
-        endpoint = Endpoints.CUSTOMER.format(id=customer_id)
-        return self.delete(endpoint)
+        return self._call("delete_customer", customer_id, resource=Customer)
     
     def list_customers(
         self,
@@ -214,7 +308,7 @@ class StripeClient:
         starting_after: Optional[str] = None,
         ending_before: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> ListObject:
 
         params = {}
         if limit:
@@ -227,13 +321,13 @@ class StripeClient:
             params["ending_before"] = ending_before
         params.update(kwargs)
         
-        return self.get(Endpoints.CUSTOMERS, params=params)
+        return self._call("list_customers", None, params=params, resource=ListObject)
     
-    def search_customers(self, query: str, **kwargs) -> requests.Response:
+    def search_customers(self, query: str, **kwargs) -> ListObject:
         params = {"query": query}
         params.update(kwargs)
         
-        return self.get(Endpoints.SEARCH_CUSTOMERS, params=params)
+        return self._call("search_customers", None, params=params, resource=ListObject)
 
 
     # Refunds
@@ -246,7 +340,7 @@ class StripeClient:
         reason: Optional[str] = None,
         metadata: Optional[Dict[str, str]] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> Refund:
 
         data = {}
         if charge:
@@ -258,26 +352,16 @@ class StripeClient:
         if reason:
             data["reason"] = reason
         if metadata:
-            for key, value in metadata.items():
-                data[f"metadata[{key}]"] = value
+            data["metadata"] = metadata
         data.update(kwargs)
         
-        return self.post(Endpoints.REFUNDS, data=data if data else None)
+        return self._call("create_refund", None, data=data if data else None, resource=Refund)
     
-    def retrieve_refund(self, refund_id: str) -> requests.Response:
-        endpoint = Endpoints.REFUND.format(id=refund_id)
-        return self.get(endpoint)
+    def retrieve_refund(self, refund_id: str) -> Refund:
+        return self._call("retrieve_refund", refund_id, resource=Refund)
     
-    def update_refund(self, refund_id: str, **kwargs) -> requests.Response:
-        endpoint = Endpoints.REFUND.format(id=refund_id)
-        data = {}
-        for key, value in kwargs.items():
-            if key == 'metadata' and isinstance(value, dict):
-                for k, v in value.items():
-                    data[f"metadata[{k}]"] = v
-            else:
-                data[key] = value
-        return self.post(endpoint, data=data)
+    def update_refund(self, refund_id: str, **kwargs) -> Refund:
+        return self._call("update_refund", refund_id, data=kwargs, resource=Refund)
     
     def list_refunds(
         self,
@@ -285,7 +369,7 @@ class StripeClient:
         charge: Optional[str] = None,
         payment_intent: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> ListObject:
         params = {}
         if limit:
             params["limit"] = limit
@@ -295,11 +379,10 @@ class StripeClient:
             params["payment_intent"] = payment_intent
         params.update(kwargs)
         
-        return self.get(Endpoints.REFUNDS, params=params)
+        return self._call("list_refunds", None, params=params, resource=ListObject)
     
-    def cancel_refund(self, refund_id: str) -> requests.Response:
-        endpoint = Endpoints.CANCEL_REFUND.format(id=refund_id)
-        return self.post(endpoint)
+    def cancel_refund(self, refund_id: str) -> Refund:
+        return self._call("cancel_refund", refund_id, resource=Refund)
     
     # Charges
     
@@ -311,7 +394,7 @@ class StripeClient:
         customer: Optional[str] = None,
         description: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> Charge:
 
         data = {
             "amount": amount,
@@ -325,37 +408,270 @@ class StripeClient:
             data["description"] = description
         data.update(kwargs)
         
-        return self.post(Endpoints.CHARGES, data=data)
+        return self._call("create_charge", None, data=data, resource=Charge)
     
-    def retrieve_charge(self, charge_id: str) -> requests.Response:
-        endpoint = Endpoints.CHARGE.format(id=charge_id)
-        return self.get(endpoint)
+    def retrieve_charge(self, charge_id: str) -> Charge:
+        return self._call("retrieve_charge", charge_id, resource=Charge)
     
-    def update_charge(self, charge_id: str, **kwargs) -> requests.Response:
-        endpoint = Endpoints.CHARGE.format(id=charge_id)
-        data = {}
-        for key, value in kwargs.items():
-            if key == 'metadata' and isinstance(value, dict):
-                for k, v in value.items():
-                    data[f"metadata[{k}]"] = v
-            else:
-                data[key] = value
-        return self.post(endpoint, data=data)
+    def update_charge(self, charge_id: str, **kwargs) -> Charge:
+        return self._call("update_charge", charge_id, data=kwargs, resource=Charge)
     
-    def capture_charge(self, charge_id: str, **kwargs) -> requests.Response:
-        endpoint = Endpoints.CAPTURE_CHARGE.format(id=charge_id)
-        return self.post(endpoint, data=kwargs)
+    def capture_charge(self, charge_id: str, **kwargs) -> Charge:
+        return self._call("capture_charge", charge_id, data=kwargs, resource=Charge)
     
     def list_charges(
         self,
         limit: Optional[int] = None,
         customer: Optional[str] = None,
         **kwargs
-    ) -> requests.Response:
+    ) -> ListObject:
         params = {}
         if limit:
             params["limit"] = limit
         if customer:
             params["customer"] = customer
         params.update(kwargs)
-        return self.get(Endpoints.CHARGES, params=params)
+        return self._call("list_charges", None, params=params, resource=ListObject)
+    
+    def search_charges(self, query: str, **kwargs) -> ListObject:
+        params = {"query": query}
+        params.update(kwargs)
+        
+        return self._call("search_charges", None, params=params, resource=ListObject)
+
+
+class StripeClient(BaseStripeClient):
+    # ConnectTimeout is a ConnectionError too, so it counts as "connection".
+    _connection_errors = (requests.ConnectionError,)
+    _timeout_errors = (requests.Timeout,)
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        base_urls: Optional[Sequence[str]] = None,
+    ):
+        # With base_urls every request is spread over those instances;
+        # base_url only has to name one of them.
+        super().__init__(
+            base_url=base_url or (base_urls[0] if base_urls else None), api_key=api_key,
+            retry_policy=retry_policy, rate_limiter=rate_limiter, cache=cache)
+        self.session = session or build_session(shard_urls=base_urls)
+
+    def __enter__(self) -> "StripeClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+        self._close_rate_limiter()
+
+    def pool_stats(self) -> Dict[str, int]:
+        adapter = self.session.get_adapter(self.base_url)
+        if hasattr(adapter, "stats"):
+            return adapter.stats()
+        return {"requests": 0, "hits": 0, "misses": 0}
+
+    def _sharded_adapter(self) -> Optional[ShardedAdapter]:
+        adapter = self.session.get_adapter(self.base_url)
+        adapter = getattr(adapter, "inner", None) if isinstance(adapter, CassetteAdapter) else adapter
+        return adapter if isinstance(adapter, ShardedAdapter) else None
+
+    def shard_stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests, connection errors, in-flight count and ejections per shard ({} when not sharded)."""
+        adapter = self._sharded_adapter()
+        return adapter.shard_stats() if adapter is not None else {}
+
+    def check_shards(self, timeout: float = 1.0) -> Dict[str, bool]:
+        """Probe every shard now, ejecting dead ones and readmitting live ones."""
+        adapter = self._sharded_adapter()
+        return adapter.check_health(timeout) if adapter is not None else {}
+
+    # Bulk operations
+
+    def bulk(
+        self,
+        operation: Union[str, Callable[..., StripeObject]],
+        payloads: Iterable[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        ordered: bool = True,
+    ) -> Iterator[BulkResult]:
+        """
+        Run ``operation`` once per payload across a bounded worker pool.
+
+        Args:
+            operation: client method name (e.g. "create_customer") or callable
+            payloads: keyword arguments for each call
+            max_workers: worker threads, defaults to settings.BULK_MAX_WORKERS
+            ordered: yield results in payload order instead of as completed
+        """
+        func = getattr(self, operation) if isinstance(operation, str) else operation
+        return run_bulk(func, payloads, max_workers or settings.BULK_MAX_WORKERS, ordered=ordered)
+
+    def create_payment_intents_many(self, payloads: Iterable[Dict[str, Any]], **kwargs) -> Iterator[BulkResult]:
+        return self.bulk("create_payment_intent", payloads, **kwargs)
+
+    def create_customers_many(self, payloads: Iterable[Dict[str, Any]], **kwargs) -> Iterator[BulkResult]:
+        return self.bulk("create_customer", payloads, **kwargs)
+
+    def create_charges_many(self, payloads: Iterable[Dict[str, Any]], **kwargs) -> Iterator[BulkResult]:
+        return self.bulk("create_charge", payloads, **kwargs)
+
+    def create_refunds_many(self, payloads: Iterable[Dict[str, Any]], **kwargs) -> Iterator[BulkResult]:
+        return self.bulk("create_refund", payloads, **kwargs)
+
+    # Auto-pagination
+
+    def iter_payment_intents(self, limit: int = 100, prefetch: bool = True, **kwargs) -> Iterator[Dict[str, Any]]:
+        return auto_paging_iter(self.list_payment_intents, dict(limit=limit, **kwargs), prefetch=prefetch)
+
+    def iter_customers(self, limit: int = 100, prefetch: bool = True, **kwargs) -> Iterator[Dict[str, Any]]:
+        return auto_paging_iter(self.list_customers, dict(limit=limit, **kwargs), prefetch=prefetch)
+
+    def iter_refunds(self, limit: int = 100, prefetch: bool = True, **kwargs) -> Iterator[Dict[str, Any]]:
+        return auto_paging_iter(self.list_refunds, dict(limit=limit, **kwargs), prefetch=prefetch)
+
+    def iter_charges(self, limit: int = 100, prefetch: bool = True, **kwargs) -> Iterator[Dict[str, Any]]:
+        return auto_paging_iter(self.list_charges, dict(limit=limit, **kwargs), prefetch=prefetch)
+
+    def iter_search_customers(self, query: str, limit: int = 100, prefetch: bool = True, **kwargs) -> Iterator[Dict[str, Any]]:
+        params = dict(query=query, limit=limit, **kwargs)
+        return auto_paging_iter(self.search_customers, params, cursor=SEARCH_CURSOR, prefetch=prefetch)
+
+    def iter_search_charges(self, query: str, limit: int = 100, prefetch: bool = True, **kwargs) -> Iterator[Dict[str, Any]]:
+        params = dict(query=query, limit=limit, **kwargs)
+        return auto_paging_iter(self.search_charges, params, cursor=SEARCH_CURSOR, prefetch=prefetch)
+    
+    # Streaming pages
+
+    def _stream(self, operation: str, params: Dict[str, Any]) -> StreamingList:
+        return self._call(operation, None, params=params, resource=StreamingList, stream=True)
+
+    def stream_payment_intents(self, **params) -> StreamingList:
+        """
+        Like list_payment_intents(**params), but the page is decoded as it
+        downloads: iterate it to get one PaymentIntent at a time.
+        """
+        return self._stream("list_payment_intents", params)
+
+    def stream_customers(self, **params) -> StreamingList:
+        return self._stream("list_customers", params)
+
+    def stream_refunds(self, **params) -> StreamingList:
+        return self._stream("list_refunds", params)
+
+    def stream_charges(self, **params) -> StreamingList:
+        return self._stream("list_charges", params)
+
+    def stream_search_customers(self, query: str, **params) -> StreamingList:
+        return self._stream("search_customers", {"query": query, **params})
+
+    def stream_search_charges(self, query: str, **params) -> StreamingList:
+        return self._stream("search_charges", {"query": query, **params})
+
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        resource: Type[StripeObject] = StripeObject,
+        url: Optional[str] = None,
+        template: Optional[str] = None,
+        **kwargs
+    ) -> StripeObject:
+        
+        url = url or self._build_url(endpoint)
+        body = encode_form(data)
+        query = encode_query(params)
+        cached = self._cached(method, endpoint, query)
+        if cached is not None:
+            return resource(cached)
+        generation = self.cache.generation if self.cache is not None else 0
+        headers = self._request_headers(method)
+        
+        attempt = 0
+        delay = 0.0
+        while True:
+            # Every attempt, retries included, spends a token.
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(endpoint)
+            try:
+                response = self._attempt(method, endpoint, url, body, query, headers, attempt, template, **kwargs)
+            except Exception as e:
+                delay = self.retry_policy.next_delay(
+                    attempt, delay, method, headers, endpoint,
+                    error=e, error_kind=self._error_kind(e))
+                if delay is None:
+                    if self.cache is not None and method != "GET":
+                        self.cache.invalidate(endpoint)
+                    raise
+            else:
+                delay = self.retry_policy.next_delay(
+                    attempt, delay, method, headers, endpoint, response=response)
+                if delay is None:
+                    if not kwargs.get("stream"):
+                        self._update_cache(method, endpoint, query, response, generation)
+                    return resource(response)
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+    
+    def _attempt(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        body: Any,
+        query: Optional[str],
+        headers: Dict[str, str],
+        attempt: int,
+        template: Optional[str] = None,
+        **kwargs
+    ) -> requests.Response:
+        if not self.hooks:
+            return self._send(method, url, body, query, headers, **kwargs)
+        
+        event = RequestEvent(method, endpoint, url, len(body or b"") + len(query or ""), attempt, template)
+        self.hooks.fire_before(event)
+        reset_connection_timings()
+        try:
+            response = self._send(method, url, body, query, headers, **kwargs)
+        except Exception as e:
+            event.dns, event.connect = connection_timings()
+            event.error = e
+            event.finish()
+            self.hooks.fire_error(event, e)
+            raise
+        
+        event.dns, event.connect = connection_timings()
+        event.ttfb = response.elapsed.total_seconds()
+        event.status_code = response.status_code
+        if kwargs.get("stream"):
+            # Reading content here would buffer the body the caller wants to stream.
+            event.response_size = int(response.headers.get("Content-Length", 0))
+        else:
+            event.response_size = len(response.content)
+        event.finish()
+        self.hooks.fire_after(event, response)
+        return response
+    
+    def _send(
+        self, method: str, url: str, body: Any, query: Optional[str], headers: Dict[str, str], **kwargs
+    ) -> requests.Response:
+        return self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            data=body,
+            params=query,
+            timeout=self.timeout,
+            verify=self.verify_ssl,
+            **kwargs
+        )
@@ -0,0 +1,264 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Tuple, Type
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config.settings import settings
+from src.api_client import BaseStripeClient
+from src.cache import ResponseCache
+from src.cassette import CassetteMiss, request_keys, settings_cassette
+from src.encoding import encode_form, encode_query
+from src.instrumentation import RequestEvent
+from src.mock_server import MockServer, default_server, response_headers
+from src.ratelimit import RateLimiter
+from src.resources import StripeObject
+from src.retry import RetryPolicy
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class AsyncResponse:
+    """
+    Fully-read aiohttp response exposing the parts of requests.Response the
+    resource objects rely on (status_code, headers, content, raise_for_status).
+    Header lookups ignore case, as they do on requests.Response.
+    """
+
+    __slots__ = ("status_code", "headers", "content", "url")
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes, url: str):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            # Same exception StripeClient raises, so callers handle one type.
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+def _trace_config() -> "aiohttp.TraceConfig":
+    # Feeds DNS and connection-setup timings into the RequestEvent passed as
+    # trace_request_ctx. Requests made without hooks carry no event.
+    import aiohttp
+
+    config = aiohttp.TraceConfig()
+
+    async def dns_start(session, ctx, params):
+        ctx.dns_start = time.perf_counter()
+
+    async def dns_end(session, ctx, params):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx.dns = time.perf_counter() - ctx.dns_start
+
+    async def connect_start(session, ctx, params):
+        ctx.connect_start = time.perf_counter()
+
+    async def connect_end(session, ctx, params):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx.connect = time.perf_counter() - ctx.connect_start
+
+    config.on_dns_resolvehost_start.append(dns_start)
+    config.on_dns_resolvehost_end.append(dns_end)
+    config.on_connection_create_start.append(connect_start)
+    config.on_connection_create_end.append(connect_end)
+    return config
+
+
+class AsyncStripeClient(BaseStripeClient):
+    """
+    asyncio counterpart of StripeClient. Every endpoint method is awaitable:
+
+        async with AsyncStripeClient() as client:
+            response = await client.create_customer(email="a@example.com")
+
+    All requests share one aiohttp connection pool, and at most
+    ``max_concurrency`` of them are in flight at any time. aiohttp itself is
+    imported when the first session is opened: it is the slowest import in
+    the project and most runs (sync tests, inprocess, xdist workers) never
+    need it.
+    """
+
+    _timeout_errors = (asyncio.TimeoutError,)
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        session: Optional["aiohttp.ClientSession"] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        super().__init__(
+            base_url=base_url, api_key=api_key, retry_policy=retry_policy, rate_limiter=rate_limiter, cache=cache)
+        self.max_concurrency = max_concurrency or settings.ASYNC_MAX_CONCURRENCY
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._session = session
+        self._owns_session = session is None
+        # Same record/replay cassette StripeClient mounts as an adapter.
+        self._cassette = settings_cassette()
+        self._cassette_mode = settings.CASSETTE_MODE
+        self._mock: Optional[MockServer] = default_server() if settings.MOCK_BACKEND == "inprocess" else None
+
+    async def __aenter__(self) -> "AsyncStripeClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def _connection_errors(self) -> Tuple[Type[BaseException], ...]:
+        import aiohttp
+
+        return (aiohttp.ClientConnectorError, aiohttp.ServerDisconnectedError)
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        # Created lazily so the client can be built outside a running loop.
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=settings.POOL_MAXSIZE,
+                ssl=None if self.verify_ssl else False,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[_trace_config()],
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._close_rate_limiter()
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        resource: Type[StripeObject] = StripeObject,
+        url: Optional[str] = None,
+        template: Optional[str] = None,
+        **kwargs
+    ) -> StripeObject:
+
+        url = url or self._build_url(endpoint)
+        body = encode_form(data)
+        query = encode_query(params)
+        cached = self._cached(method, endpoint, query)
+        if cached is not None:
+            return resource(cached)
+        generation = self.cache.generation if self.cache is not None else 0
+        headers = self._request_headers(method)
+
+        attempt = 0
+        delay = 0.0
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(endpoint)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            try:
+                raw = await self._attempt(method, endpoint, url, body, query, headers, attempt, template, **kwargs)
+            except Exception as e:
+                delay = self.retry_policy.next_delay(
+                    attempt, delay, method, headers, endpoint,
+                    error=e, error_kind=self._error_kind(e))
+                if delay is None:
+                    if self.cache is not None and method != "GET":
+                        self.cache.invalidate(endpoint)
+                    raise
+            else:
+                delay = self.retry_policy.next_delay(attempt, delay, method, headers, endpoint, response=raw)
+                if delay is None:
+                    self._update_cache(method, endpoint, query, raw, generation)
+                    return resource(raw)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _attempt(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        body: Any,
+        query: Optional[str],
+        headers: Dict[str, str],
+        attempt: int,
+        template: Optional[str] = None,
+        **kwargs
+    ) -> AsyncResponse:
+        async with self._semaphore:
+            # The event starts once a slot is free, so semaphore queueing is
+            # not counted as endpoint latency.
+            event = None
+            if self.hooks:
+                event = RequestEvent(method, endpoint, url, len(body or b"") + len(query or ""), attempt, template)
+                self.hooks.fire_before(event)
+            try:
+                if self._cassette_mode == "replay":
+                    raw = self._replay(method, url, body, query)
+                elif self._mock is not None:
+                    raw = self._call_mock(method, endpoint, url, body, query, headers)
+                else:
+                    async with self.session.request(
+                        method,
+                        url,
+                        headers=headers,
+                        data=body,
+                        params=query,
+                        trace_request_ctx=event,
+                        **kwargs
+                    ) as response:
+                        if event is not None:
+                            event.ttfb = time.perf_counter() - event.started
+                        content = await response.read()
+                        raw = AsyncResponse(response.status, response.headers, content, str(response.url))
+                        if self._cassette is not None:
+                            self._cassette.record(
+                                request_keys(method, raw.url, body), raw.status_code, response.reason, raw.headers, content)
+            except Exception as e:
+                if event is not None:
+                    event.error = e
+                    event.finish()
+                    self.hooks.fire_error(event, e)
+                raise
+
+        if event is not None:
+            event.status_code = raw.status_code
+            event.response_size = len(raw.content)
+            event.finish()
+            self.hooks.fire_after(event, raw)
+        return raw
+
+    def _call_mock(
+        self, method: str, endpoint: str, url: str, body: Any, query: Optional[str], headers: Dict[str, str]
+    ) -> AsyncResponse:
+        status, content, replayed = self._mock.handle(method, endpoint, query, body, headers)
+        if query:
+            url = f"{url}?{query}"
+        return AsyncResponse(status, response_headers(replayed), content, url)
+
+    def _replay(self, method: str, url: str, body: Any, query: Optional[str]) -> AsyncResponse:
+        if query:
+            url = f"{url}?{query}"
+        found = self._cassette.lookup(request_keys(method, url, body))
+        if found is None:
+            raise CassetteMiss(f"No recording for {method} {url} in {self._cassette.path}")
+        meta, content = found
+        return AsyncResponse(meta["status"], meta["headers"], content, url)
@@ -0,0 +1,74 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, NamedTuple, Optional, Set
+
+
+class BulkResult(NamedTuple):
+    index: int
+    payload: Dict[str, Any]
+    response: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.response is not None and self.response.status_code < 400
+
+
+def _call(func: Callable[..., Any], index: int, payload: Dict[str, Any]) -> BulkResult:
+    try:
+        return BulkResult(index, payload, response=func(**payload))
+    except Exception as e:
+        return BulkResult(index, payload, error=e)
+
+
+def run_bulk(
+    func: Callable[..., Any],
+    payloads: Iterable[Dict[str, Any]],
+    max_workers: int,
+    ordered: bool = True,
+) -> Iterator[BulkResult]:
+    """
+    Call ``func(**payload)`` for every payload on a pool of ``max_workers``
+    threads and yield a BulkResult per payload.
+
+    Failures are captured on the result instead of aborting the batch. At most
+    ``2 * max_workers`` payloads are in flight, so ``payloads`` can be a lazy
+    generator of any length. With ``ordered=False`` results are yielded as
+    they complete.
+    """
+    window = max_workers * 2
+    source = enumerate(payloads)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stripe-bulk") as executor:
+        def submit_next() -> bool:
+            for index, payload in source:
+                future = executor.submit(_call, func, index, payload)
+                if ordered:
+                    queue.append(future)
+                else:
+                    pending.add(future)
+                return True
+            return False
+
+        queue: Deque[Future] = deque()
+        pending: Set[Future] = set()
+        try:
+            while len(queue) + len(pending) < window and submit_next():
+                pass
+
+            if ordered:
+                while queue:
+                    result = queue.popleft().result()
+                    submit_next()
+                    yield result
+            else:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        submit_next()
+                        yield future.result()
+        finally:
+            # Consumer stopped early: drop work that has not started yet.
+            for future in list(queue) + list(pending):
+                future.cancel()
+
@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from config.settings import settings
+from src.routing import endpoint_family, object_path
+
+CacheKey = Tuple[str, Optional[str]]
+
+# Writes to one family that change objects of another: a refund updates its
+# charge's amount_refunded, confirming a payment intent creates a charge.
+RELATED_FAMILIES: Dict[str, Tuple[str, ...]] = {
+    "refunds": ("charges", "payment_intents"),
+    "payment_intents": ("charges",),
+}
+
+
+class _Entry:
+    __slots__ = ("response", "expires", "size", "family", "object_path")
+
+    def __init__(self, response: Any, expires: float, size: int, family: str, object_path: Optional[str]):
+        self.response = response
+        self.expires = expires
+        self.size = size
+        self.family = family
+        self.object_path = object_path
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of successful GET responses, keyed by path (endpoint
+    template plus id) and encoded query.
+
+    Bounded by ``max_entries`` and by ``max_bytes`` of response bodies. A
+    POST or DELETE invalidates the addressed object, every list/search of its
+    family and the families in RELATED_FAMILIES. A GET that was in flight
+    during an invalidation is not stored, so a stale read cannot outlive the
+    write that superseded it.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._by_object: Dict[str, Set[CacheKey]] = defaultdict(set)
+        self._collections: Dict[str, Set[CacheKey]] = defaultdict(set)
+        self._by_family: Dict[str, Set[CacheKey]] = defaultdict(set)
+        self._bytes = 0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls) -> Optional["ResponseCache"]:
+        if not settings.CACHE_ENABLED:
+            return None
+        return cls(
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            ttl=settings.CACHE_TTL,
+            max_bytes=settings.CACHE_MAX_BYTES,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidation; pass it back to put()."""
+        return self._generation
+
+    def get(self, path: str, query: Optional[str]) -> Optional[Any]:
+        key = (path, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response
+
+    def put(self, path: str, query: Optional[str], response: Any, generation: int) -> None:
+        size = len(response.content or b"")
+        if size > self.max_bytes:
+            return
+        key = (path, query)
+        owner = object_path(path)
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(response, time.monotonic() + self.ttl, size, endpoint_family(path), owner)
+            entry = self._entries[key]
+            self._bytes += size
+            index, name = self._index_for(entry)
+            index[name].add(key)
+            self._by_family[entry.family].add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        """Forget everything a write to ``path`` may have changed."""
+        family = endpoint_family(path)
+        owner = object_path(path)
+        with self._lock:
+            self._generation += 1
+            stale = set(self._by_object.get(owner, ())) if owner is not None else set()
+            stale.update(self._collections.get(family, ()))
+            for related in RELATED_FAMILIES.get(family, ()):
+                stale.update(self._by_family.get(related, ()))
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_object.clear()
+            self._collections.clear()
+            self._by_family.clear()
+            self._bytes = 0
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for index, name in (self._index_for(entry), (self._by_family, entry.family)):
+            bucket = index.get(name)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del index[name]
+
+    def _index_for(self, entry: _Entry) -> Tuple[Dict[str, Set[CacheKey]], str]:
+        # Object reads are indexed by object path, list/search reads by family.
+        if entry.object_path is not None:
+            return self._by_object, entry.object_path
+        return self._collections, entry.family
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
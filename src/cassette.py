@@ -0,0 +1,291 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from config.constants import ObjectPrefix
+from config.settings import settings
+from src.routing import resolve_template
+
+# File layout: MAGIC, then one record per exchange:
+#   <meta_len:u32><body_len:u32><meta json><response body>
+# The index only reads the meta of each record; bodies stay in the file and
+# are sliced out of the memory map when a response is replayed.
+MAGIC = b"SMCASSETTE1\n"
+_RECORD = struct.Struct("<II")
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+# Response headers that change on every run and are not worth storing.
+_VOLATILE_HEADERS = frozenset({"date", "request-id", "idempotency-key", "connection", "keep-alive"})
+
+
+class CassetteMiss(requests.RequestException):
+    """Replay mode got a request that was never recorded."""
+
+
+def _normalize(raw) -> bytes:
+    if not raw:
+        return b""
+    if isinstance(raw, str):
+        raw = raw.encode()
+    # Parameter order carries no meaning for the server.
+    return b"&".join(sorted(raw.split(b"&")))
+
+
+Key = Tuple[str, str, str]
+# (body offset, body length, meta)
+Entry = Tuple[int, int, dict]
+
+# Object ids inside params ("charge=ch_123"); replaced for the loose key.
+_ID_VALUE = re.compile(
+    ("=(?:" + "|".join(re.escape(v) for k, v in vars(ObjectPrefix).items() if not k.startswith("_")) + ")[A-Za-z0-9]+").encode()
+)
+
+
+def request_keys(method: str, url: str, body) -> Tuple[Key, Key]:
+    """
+    (exact, loose) keys for a request. Both are (method, path, digest of the
+    sorted query and body params); the loose key uses the endpoint template
+    as path and ignores object ids in the params, so a replayed run whose ids
+    differ from the recording still finds a response.
+    """
+    parts = urlsplit(url)
+    method = method.upper()
+    params = _normalize(parts.query) + b"\n" + _normalize(body)
+    exact = (method, parts.path, hashlib.sha1(params).hexdigest()[:16])
+    loose_params = _ID_VALUE.sub(b"={id}", params)
+    loose = (method, resolve_template(parts.path), hashlib.sha1(loose_params).hexdigest()[:16])
+    return exact, loose
+
+
+class Cassette:
+    """
+    Append-only store of recorded request/response pairs.
+
+    Recording appends one record per exchange with a single write. Replay
+    memory-maps the file and indexes it by both request_keys(); the exact key
+    wins over the loose one. Repeated requests for the same key are answered in recorded
+    order, and a request past the last recording is a miss. A loose hit for
+    a path that addresses one object ("/v1/refunds/{id}") was recorded for
+    another object; the requested id is put in place of the recorded one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._index: Dict[Key, List[Entry]] = defaultdict(list)
+        self._loose: Dict[Key, List[Entry]] = defaultdict(list)
+        self._cursors: Dict[Tuple[bool, Key], int] = defaultdict(int)
+        self._served: Set[int] = set()
+        self.recorded = 0
+        self.hits = 0
+        self.misses = 0
+
+    # Recording
+
+    def record(
+        self, keys: Tuple[Key, Key], status: int, reason: Optional[str], headers: Mapping[str, str], body: bytes
+    ) -> None:
+        meta = json.dumps({
+            "key": keys[0],
+            "loose": keys[1],
+            "status": status,
+            "reason": reason,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _VOLATILE_HEADERS},
+        }, separators=(",", ":")).encode()
+        body = body or b""
+        with self._lock:
+            if self._fd is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                if os.fstat(self._fd).st_size == 0:
+                    os.write(self._fd, MAGIC)
+            os.write(self._fd, _RECORD.pack(len(meta), len(body)) + meta + body)
+            self.recorded += 1
+
+    # Replay
+
+    def load(self) -> "Cassette":
+        with self._lock:
+            if self._map is None:
+                self._file = open(self.path, "rb")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if self._map[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f"{self.path} is not a cassette file")
+                self._build_index()
+        return self
+
+    def _build_index(self) -> None:
+        data, offset, end = self._map, len(MAGIC), len(self._map)
+        while offset + _RECORD.size <= end:
+            meta_len, body_len = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            meta = json.loads(data[offset:offset + meta_len])
+            offset += meta_len
+            if offset + body_len > end:
+                break  # torn final record from an interrupted run
+            exact, loose = tuple(meta.pop("key")), tuple(meta.pop("loose"))
+            meta["path"] = exact[1]
+            self._index[exact].append((offset, body_len, meta))
+            self._loose[loose].append((offset, body_len, meta))
+            offset += body_len
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._index.values())
+
+    def lookup(self, keys: Tuple[Key, Key]) -> Optional[Tuple[dict, bytes]]:
+        """Next recorded (meta, body) for request_keys(), or None if never recorded."""
+        exact, loose = keys
+        with self._lock:
+            entry = self._next((False, exact), self._index.get(exact, ()))
+            if entry is None:
+                entry = self._next((True, loose), self._loose.get(loose, ()))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            offset, length, meta = entry
+            body = self._map[offset:offset + length]
+            for recorded, requested in zip(meta["path"].split("/"), exact[1].split("/")):
+                if recorded != requested:
+                    body = body.replace(recorded.encode(), requested.encode())
+            return meta, body
+
+    def _next(self, cursor: Tuple[bool, Key], entries: Sequence[Entry]) -> Optional[Entry]:
+        # Both indexes hold every recording; one served through either is
+        # skipped by the other, so no response is handed out twice.
+        position = self._cursors[cursor]
+        while position < len(entries) and entries[position][0] in self._served:
+            position += 1
+        self._cursors[cursor] = position + 1
+        if position >= len(entries):
+            return None
+        self._served.add(entries[position][0])
+        return entries[position]
+
+    def rewind(self) -> None:
+        with self._lock:
+            self._cursors.clear()
+            self._served.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"recorded": self.recorded, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            if self._map is not None:
+                self._map.close()
+                self._file.close()
+                self._map = self._file = None
+                self._index.clear()
+                self._loose.clear()
+                self._cursors.clear()
+                self._served.clear()
+
+
+_open_cassettes: Dict[Tuple[str, str], Cassette] = {}
+_open_lock = threading.Lock()
+
+
+def open_cassette(path: str, mode: str) -> Cassette:
+    """
+    Process-wide Cassette for ``path``, so every client in a test run appends
+    to (or replays from) the same file and replay order spans clients.
+    """
+    path = os.path.abspath(path)
+    with _open_lock:
+        cassette = _open_cassettes.get((path, mode))
+        if cassette is None:
+            cassette = Cassette(path)
+            if mode == "replay":
+                cassette.load()
+            _open_cassettes[(path, mode)] = cassette
+        return cassette
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    Transport adapter that records through ``inner`` ("record") or answers
+    from the cassette without touching the network ("replay").
+    """
+
+    def __init__(self, cassette: Cassette, mode: str, inner: Optional[HTTPAdapter] = None):
+        super().__init__()
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}'. Expected 'record' or 'replay'")
+        if mode == "record" and inner is None:
+            raise ValueError("record mode needs an inner adapter to send requests")
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        keys = request_keys(request.method, request.url, request.body)
+        if self.mode == "record":
+            response = self.inner.send(request, **kwargs)
+            self.cassette.record(keys, response.status_code, response.reason, response.headers, response.content)
+            return response
+
+        found = self.cassette.lookup(keys)
+        if found is None:
+            raise CassetteMiss(f"No recording for {request.method} {request.url} in {self.cassette.path}", request=request)
+        meta, body = found
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta["reason"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response._content = body
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        if self.inner is not None and hasattr(self.inner, "stats"):
+            return self.inner.stats()
+        return {"requests": 0, "hits": 0, "misses": 0}
+
+    def close(self) -> None:
+        if self.inner is not None:
+            self.inner.close()
+
+
+def settings_cassette() -> Optional[Cassette]:
+    """The cassette selected by settings.CASSETTE_MODE/CASSETTE_PATH, or None when off."""
+    mode = settings.CASSETTE_MODE
+    if mode not in CASSETTE_MODES:
+        raise ValueError(f"Unknown CASSETTE_MODE '{mode}'. Expected one of {CASSETTE_MODES}")
+    if mode == "off":
+        return None
+    return open_cassette(settings.CASSETTE_PATH, mode)
+
+
+def cassette_adapter(inner: HTTPAdapter) -> Optional[CassetteAdapter]:
+    """CassetteAdapter wrapping ``inner`` for settings.CASSETTE_MODE, or None when off."""
+    cassette = settings_cassette()
+    if cassette is None:
+        return None
+    return CassetteAdapter(cassette, settings.CASSETTE_MODE, inner=inner)
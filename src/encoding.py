@@ -0,0 +1,131 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, quote_plus
+
+from config.settings import settings
+
+RawBody = Union[str, bytes]
+
+
+def _scalar(value: Any) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return str(value)
+
+
+def _flatten(value: Any, prefix: str, keys: List[str], values: List[str]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{prefix}[{key}]", keys, values)
+    elif isinstance(value, (list, tuple)):
+        for index, item in enumerate(value):
+            if isinstance(item, (dict, list, tuple)):
+                _flatten(item, f"{prefix}[{index}]", keys, values)
+            else:
+                _flatten(item, f"{prefix}[]", keys, values)
+    elif value is not None:
+        keys.append(prefix)
+        values.append(_scalar(value))
+
+
+def flatten(data: dict) -> Tuple[Tuple[str, ...], List[str]]:
+    """
+    Flatten nested params into Stripe's bracket notation.
+
+    Returns the flattened keys and their string values, e.g.
+    ``{"metadata": {"a": 1}, "expand": ["x"]}`` gives
+    ``("metadata[a]", "expand[]"), ["1", "x"]``. None values are dropped and
+    booleans become "true"/"false".
+    """
+    keys: List[str] = []
+    values: List[str] = []
+    for key, value in data.items():
+        if isinstance(value, (dict, list, tuple)):
+            _flatten(value, key, keys, values)
+        elif value is not None:
+            keys.append(key)
+            values.append(_scalar(value))
+    return tuple(keys), values
+
+
+@lru_cache(maxsize=settings.ENCODER_CACHE_SIZE)
+def _compile(keys: Tuple[str, ...]) -> Tuple[bytes, ...]:
+    # One payload shape -> its pre-quoted "&key=" prefixes.
+    return tuple((b"&" if i else b"") + quote_plus(key).encode("ascii") + b"=" for i, key in enumerate(keys))
+
+
+@lru_cache(maxsize=settings.ENCODER_CACHE_SIZE)
+def _quote(value: str) -> bytes:
+    return quote_plus(value).encode("ascii")
+
+
+def encode_form(data: Optional[Union[dict, RawBody]]) -> Optional[RawBody]:
+    """
+    URL-encode ``data`` into a form body. Strings and bytes are passed through
+    untouched so callers can still send raw (or deliberately malformed) bodies.
+    """
+    if data is None or isinstance(data, (str, bytes)):
+        return data
+    keys, values = flatten(data)
+    prefixes = _compile(keys)
+    return b"".join([prefix + _quote(value) for prefix, value in zip(prefixes, values)])
+
+
+def encode_query(params: Optional[Union[dict, RawBody]]) -> Optional[str]:
+    encoded = encode_form(params)
+    if isinstance(encoded, bytes):
+        encoded = encoded.decode("ascii")
+    return encoded or None
+
+
+def _child(next_part: str) -> Union[list, dict]:
+    return [] if next_part == "" or next_part.isdigit() else {}
+
+
+def _assign(container: Union[list, dict], parts: List[str], value: str) -> None:
+    for position, part in enumerate(parts):
+        last = position == len(parts) - 1
+        if isinstance(container, list):
+            if part == "":
+                container.append(value if last else _child(parts[position + 1]))
+                container = container[-1]
+                continue
+            index = int(part) if part.isdigit() else len(container)
+            while len(container) <= index:
+                container.append(None)
+            if last:
+                container[index] = value
+            elif container[index] is None:
+                container[index] = _child(parts[position + 1])
+            container = container[index]
+        elif last:
+            container[part] = value
+        else:
+            container = container.setdefault(part, _child(parts[position + 1]))
+
+
+def decode_form(raw: Optional[RawBody]) -> Dict[str, Any]:
+    """
+    Inverse of encode_form: ``b"metadata[a]=1&expand[]=x"`` gives
+    ``{"metadata": {"a": "1"}, "expand": ["x"]}``. Values stay strings.
+    """
+    decoded: Dict[str, Any] = {}
+    if not raw:
+        return decoded
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8", errors="replace")
+    for key, value in parse_qsl(raw, keep_blank_values=True):
+        name, _, rest = key.partition("[")
+        parts = [name] + (rest[:-1].split("][") if rest.endswith("]") else [])
+        try:
+            _assign(decoded, parts, value)
+        except (TypeError, AttributeError):
+            # Conflicting shapes ("a=1&a[b]=2"): keep the raw pair.
+            decoded[key] = value
+    return decoded
+
+
+def cache_info() -> dict:
+    return {"shapes": _compile.cache_info()._asdict(), "values": _quote.cache_info()._asdict()}
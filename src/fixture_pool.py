@@ -0,0 +1,137 @@
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Mapping, Optional
+
+from config.settings import settings
+
+Factory = Callable[[], Any]
+
+
+def _usable(response: Any) -> bool:
+    status = getattr(response, "status_code", None)
+    return status is not None and status < 400
+
+
+class FixturePool:
+    """
+    Pre-created objects for the ``created_*`` fixtures, one pool per kind.
+
+    ``prefill`` starts creating objects on a thread pool and returns at once;
+    ``take`` hands out the oldest one, waiting for it if it is still in
+    flight. Every object is handed out exactly once, so a test that updates,
+    captures or cancels what it got never affects another test. When a kind
+    drops to ``low_water`` ready-or-pending objects it is topped back up to
+    ``size`` in the background, never past the number of takes still
+    expected, so nothing is created that no test will use.
+
+    A background create that raised or returned an error is not handed out:
+    ``take`` falls back to calling the factory inline, which is exactly what
+    the fixture did before pooling.
+    """
+
+    def __init__(
+        self,
+        factories: Mapping[str, Factory],
+        size: int = 8,
+        max_workers: int = 8,
+        low_water: Optional[int] = None,
+    ):
+        self.factories = dict(factories)
+        self.size = size
+        self.low_water = size // 2 if low_water is None else low_water
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Future]] = defaultdict(deque)
+        self._remaining: Dict[str, int] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stripe-fixture-pool")
+        self._closed = False
+        self.hits = 0
+        self.waits = 0
+        self.fallbacks = 0
+        self.created = 0
+
+    @classmethod
+    def from_settings(cls, factories: Mapping[str, Factory]) -> Optional["FixturePool"]:
+        """
+        None when FIXTURE_POOL_SIZE is 0 or a cassette is recording or
+        replaying: background creates would interleave with the tests' own
+        requests in a different order on every run, and replay matches
+        repeated requests by the order they were recorded in.
+        """
+        if settings.FIXTURE_POOL_SIZE <= 0 or settings.CASSETTE_MODE != "off":
+            return None
+        return cls(factories, size=settings.FIXTURE_POOL_SIZE, max_workers=settings.FIXTURE_POOL_WORKERS)
+
+    def prefill(self, demand: Optional[Mapping[str, int]] = None) -> None:
+        """
+        Start creating objects for every kind, or only the kinds in
+        ``demand``, capped at the number of tests that will ask for them.
+        """
+        kinds = self.factories if demand is None else [kind for kind in demand if kind in self.factories]
+        for kind in kinds:
+            if demand is not None:
+                with self._lock:
+                    self._remaining[kind] = demand[kind]
+            self._top_up(kind)
+
+    def take(self, kind: str) -> Any:
+        factory = self.factories[kind]
+        with self._lock:
+            if kind in self._remaining:
+                self._remaining[kind] = max(self._remaining[kind] - 1, 0)
+            queue = self._queues[kind]
+            future = queue.popleft() if queue else None
+            if future is None:
+                self.fallbacks += 1
+            elif future.done():
+                self.hits += 1
+            else:
+                self.waits += 1
+        self._top_up(kind)
+        if future is None:
+            return factory()
+        try:
+            response = future.result()
+        except Exception:
+            response = None
+        if not _usable(response):
+            with self._lock:
+                self.fallbacks += 1
+            return factory()
+        return response
+
+    def _top_up(self, kind: str) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            queue = self._queues[kind]
+            target = min(self.size, self._remaining.get(kind, self.size))
+            if len(queue) > min(self.low_water, target - 1):
+                return
+            for _ in range(target - len(queue)):
+                queue.append(self._executor.submit(self._create, kind))
+
+    def _create(self, kind: str) -> Any:
+        response = self.factories[kind]()
+        with self._lock:
+            self.created += 1
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "waits": self.waits,
+                "fallbacks": self.fallbacks,
+                "created": self.created,
+                "ready": {kind: sum(f.done() for f in queue) for kind, queue in self._queues.items()},
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            pending = [future for queue in self._queues.values() for future in queue]
+            self._queues.clear()
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
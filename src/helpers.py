@@ -1,30 +1,55 @@
 import json
-from typing import Any, Dict, List, Optional
-from jsonschema import validate, ValidationError #type:ignore
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from requests import Response
+from config.constants import Currency, ObjectPrefix, PaymentIntentStatus, RefundReason, RefundStatus
+from src.resources import StreamingList, StripeObject
+from src.schemas import registry
 
-def assert_status_code(response: Response, expected_code: int, message: Optional[str] = None):
+# Anything the helpers accept: a StripeObject (body parsed once and memoized),
+# a raw requests.Response, or an already-decoded dict.
+ResponseLike = Union[StripeObject, Response, Dict[str, Any]]
+
+
+def _json(response: ResponseLike) -> Dict[str, Any]:
+    if isinstance(response, dict):
+        return response
+    return response.json()
+
+
+def get_data(response: Any) -> Dict[str, Any]:
+    if isinstance(response, dict):
+        return response
+    elif isinstance(response, str):
+        try:
+            return json.loads(response)
+        except json.JSONDecodeError:
+            return {"id": response}
+    else:
+        return response.json()
+
+
+def assert_status_code(response: ResponseLike, expected_code: int, message: Optional[str] = None):
 
     actual_code = response.status_code
     error_msg = message or f"Expected status code {expected_code}, got {actual_code}"
     if actual_code != expected_code:
         try:
-            body = response.json()
+            body = _json(response)
             error_msg += f"\nResponse body: {json.dumps(body, indent=2)}"
         except:
             error_msg += f"\nResponse text: {response.text}"
     assert actual_code == expected_code, error_msg
 
 
-def assert_response_contains(response:Response, key: str, expected_value: Any = None):
-    data = response.json()
+def assert_response_contains(response: ResponseLike, key: str, expected_value: Any = None):
+    data = _json(response)
     assert key in data, f"Response missing key '{key}'. Response: {data}"
     if expected_value is not None:
         assert data[key] == expected_value, f"Expected {key}={expected_value}, got {data[key]}"
 
 
-def assert_object_type(response:Response, expected_type: str):
-    data = response.json()
+def assert_object_type(response: ResponseLike, expected_type: str):
+    data = _json(response)
     assert "object" in data, f"Response missing 'object' field. Response: {data}"
     assert data["object"] == expected_type, f"Expected object type '{expected_type}', got '{data['object']}'"
 
@@ -38,8 +63,11 @@ def assert_id_prefix(data, expected_prefix: str):
     assert id_value.startswith(expected_prefix), f"Expected ID prefix '{expected_prefix}', got ID '{id_value}'"
 
 
-def assert_is_list_response(response:Response, expected_object_type: Optional[str] = None):
-    data = response.json()
+def assert_is_list_response(response: ResponseLike, expected_object_type: Optional[str] = None):
+    if isinstance(response, StreamingList) and response.streaming:
+        _assert_streamed_list(response, expected_object_type)
+        return
+    data = _json(response)
     assert "object" in data and data["object"] == "list", "Response is not a list object"
     assert "data" in data, "List response missing 'data' field"
     assert isinstance(data["data"], list), "'data' field is not a list"
@@ -49,8 +77,17 @@ def assert_is_list_response(response:Response, expected_object_type: Optional[st
             assert item.get("object") == expected_object_type, f"List item type mismatch: {item}"
 
 
-def assert_error_response(response:Response, expected_type: Optional[str] = None):
-    data = response.json()
+def _assert_streamed_list(response: StreamingList, expected_object_type: Optional[str]):
+    # Each item is checked as it arrives; this consumes the stream.
+    for item in response:
+        if expected_object_type:
+            assert item.get("object") == expected_object_type, f"List item type mismatch: {item.json()}"
+    assert response.meta.get("object") == "list", "Response is not a list object"
+    assert response.has_data, "List response missing 'data' field or it is not a list"
+
+
+def assert_error_response(response: ResponseLike, expected_type: Optional[str] = None):
+    data = _json(response)
     assert "error" in data, f"Response is not an error response. Response: {data}"
     
     if expected_type:
@@ -58,23 +95,39 @@ def assert_error_response(response:Response, expected_type: Optional[str] = None
         assert error.get("type") == expected_type, f"Expected error type '{expected_type}', got '{error.get('type')}'"
 
 
-def validate_json_schema(response:Response, schema: Dict[str, Any]):
-    try:
-        data = response.json()
-        validate(instance=data, schema=schema)
-    except ValidationError as e:
-        raise AssertionError(f"Schema validation failed: {e.message}")
+def validate_json_schema(response: ResponseLike, schema: Union[str, Dict[str, Any]]):
+    """
+    Validate a response body against a schema dict or a registered object
+    type ("payment_intent", "customer", "charge", "refund", "list"). The
+    validator is compiled once and reused.
+    """
+    errors = registry.errors(_json(response), schema)
+    if errors:
+        raise AssertionError(f"Schema validation failed: {errors[0]}" + (
+            f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""))
+
+
+def validate_list_schema(response: ResponseLike, object_type: Optional[str] = None):
+    """
+    Validate a list/search page and every item in it in one pass, reporting
+    all failures together instead of stopping at the first one.
+    """
+    data = _json(response)
+    failures = registry.errors(data, "list")
+    failures += registry.validate_items(data.get("data", []), object_type)
+    if failures:
+        raise AssertionError(f"Schema validation failed for {len(failures)} error(s):\n" + "\n".join(failures))
 
 
-def assert_field_types(response:Response, field_types: Dict[str, type]):
+def assert_field_types(response: ResponseLike, field_types: Dict[str, type]):
     """
     Assert that response fields have the expected types.
     
     Args:
-        response: requests.Response object
+        response: StripeObject, requests.Response or decoded dict
         field_types: Dictionary mapping field names to expected types
     """
-    data = response.json()
+    data = _json(response)
     for field, expected_type in field_types.items():
         assert field in data, f"Response missing field '{field}'"
         actual_value = data[field]
@@ -83,20 +136,203 @@ def assert_field_types(response:Response, field_types: Dict[str, type]):
                 f"Field '{field}' expected {expected_type.__name__}, got {type(actual_value).__name__}"
 
 
-def assert_required_fields(response:Response, required_fields: List[str]):
-    data = response.json()
+def assert_required_fields(response: ResponseLike, required_fields: List[str]):
+    data = _json(response)
     missing_fields = [field for field in required_fields if field not in data]
     assert not missing_fields, f"Response missing required fields: {missing_fields}"
 
 
-def get_response_json(response:Response) -> Dict[str, Any]:
+def get_response_json(response: ResponseLike) -> Dict[str, Any]:
     try:
-        return response.json()
+        return _json(response)
     except json.JSONDecodeError:
         raise AssertionError(f"Response is not valid JSON: {response.text}")
 
 
-def extract_id(response:Response) -> str:
-    data = response.json()
+def extract_id(response: ResponseLike) -> str:
+    data = _json(response)
     assert "id" in data, f"Response missing 'id' field. Response: {data}"
     return data["id"]
+
+
+# Batch list checks
+
+LIST_OBJECTS = frozenset({"list", "search_result"})
+CURRENCIES = frozenset(Currency.ALL)
+
+
+class ItemSpec:
+    """
+    What every item of one object type must satisfy, precomputed for list
+    checks. ``types`` and ``enums`` apply to fields that are present and not
+    None; ``required`` (plus id and object) must be present.
+    """
+
+    __slots__ = ("prefix", "required", "types", "enums")
+
+    def __init__(
+        self,
+        prefix: Optional[str] = None,
+        required: Iterable[str] = (),
+        types: Optional[Dict[str, Union[type, Tuple[type, ...]]]] = None,
+        enums: Optional[Dict[str, Iterable[str]]] = None,
+    ):
+        self.prefix = prefix
+        self.required = frozenset(required) | {"id", "object"}
+        self.types = dict(types or {})
+        self.enums = {field: frozenset(values) for field, values in (enums or {}).items()}
+
+    def extend(
+        self,
+        required: Iterable[str] = (),
+        types: Optional[Dict[str, Union[type, Tuple[type, ...]]]] = None,
+        enums: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> "ItemSpec":
+        return ItemSpec(
+            self.prefix,
+            self.required | frozenset(required),
+            {**self.types, **(types or {})},
+            {**self.enums, **(enums or {})},
+        )
+
+
+ITEM_SPECS: Dict[str, ItemSpec] = {
+    "payment_intent": ItemSpec(
+        ObjectPrefix.PAYMENT_INTENT,
+        required=("amount", "currency", "status"),
+        types={"amount": int, "currency": str, "status": str, "metadata": dict, "livemode": bool},
+        enums={"status": PaymentIntentStatus.ALL, "currency": CURRENCIES},
+    ),
+    "customer": ItemSpec(
+        ObjectPrefix.CUSTOMER,
+        types={"created": int, "metadata": dict, "livemode": bool},
+    ),
+    "charge": ItemSpec(
+        ObjectPrefix.CHARGE,
+        required=("amount", "currency"),
+        types={"amount": int, "amount_refunded": int, "currency": str, "captured": bool, "paid": bool,
+               "metadata": dict},
+        enums={"currency": CURRENCIES},
+    ),
+    "refund": ItemSpec(
+        ObjectPrefix.REFUND,
+        required=("amount", "currency", "status"),
+        types={"amount": int, "currency": str, "status": str, "metadata": dict},
+        enums={"status": RefundStatus.ALL, "currency": CURRENCIES, "reason": RefundReason.ALL},
+    ),
+}
+
+
+def _pages(source: Any) -> Iterator[Any]:
+    # A single page, or an iterable of pages / bare items (e.g. iter_charges()).
+    if isinstance(source, (dict, StripeObject, Response)):
+        yield source
+    else:
+        yield from source
+
+
+def _streamed_items(page: StreamingList, violations: List[Tuple]) -> Iterator[Any]:
+    # The page's own fields are only known once its items have gone by.
+    yield from page
+    if page.meta.get("object") not in LIST_OBJECTS:
+        violations.append((None, None, "object", page.meta.get("object"), "a list or search_result page"))
+    if not page.has_data:
+        violations.append((None, None, "data", "missing", "a list"))
+
+
+def _page_items(page: Any, violations: List[Tuple]) -> Iterable[Any]:
+    if isinstance(page, StreamingList) and page.streaming:
+        return _streamed_items(page, violations)
+    body = _json(page)
+    if "data" not in body and body.get("object") not in LIST_OBJECTS:
+        return (body,)
+    if body.get("object") not in LIST_OBJECTS:
+        violations.append((None, None, "object", body.get("object"), "a list or search_result page"))
+    items = body.get("data")
+    if not isinstance(items, list):
+        violations.append((None, None, "data", type(items).__name__, "a list"))
+        return ()
+    return items
+
+
+def list_violations(
+    source: Any,
+    object_type: Optional[str] = None,
+    spec: Optional[ItemSpec] = None,
+) -> List[Tuple]:
+    """
+    Check every item of a list page, a StreamingList, or an iterable of pages
+    or items in one pass. Returns raw (position, id, field, actual, expected)
+    tuples; nothing is formatted here. ``spec`` defaults to
+    ITEM_SPECS[object_type]; without either only the page shape and (given
+    object_type) the item type are checked.
+    """
+    spec = spec or ITEM_SPECS.get(object_type or "")
+    prefix = spec.prefix if spec is not None else None
+    required = spec.required if spec is not None else frozenset()
+    types = tuple(spec.types.items()) if spec is not None else ()
+    enums = tuple(spec.enums.items()) if spec is not None else ()
+    violations: List[Tuple] = []
+    position = 0
+    for page in _pages(source):
+        for item in _page_items(page, violations):
+            if isinstance(item, StripeObject):
+                item = item.json()
+            item_id = item.get("id")
+            if object_type is not None and item.get("object") != object_type:
+                violations.append((position, item_id, "object", item.get("object"), object_type))
+            if prefix is not None and not (isinstance(item_id, str) and item_id.startswith(prefix)):
+                violations.append((position, item_id, "id", item_id, f"prefix '{prefix}'"))
+            missing = required - item.keys()
+            if missing:
+                violations.append((position, item_id, "missing", sorted(missing), "present"))
+            for field, expected in types:
+                value = item.get(field)
+                if value is not None and not isinstance(value, expected):
+                    violations.append((position, item_id, field, type(value).__name__, expected))
+            for field, allowed in enums:
+                value = item.get(field)
+                if value is not None and value not in allowed:
+                    violations.append((position, item_id, field, value, allowed))
+            position += 1
+    return violations
+
+
+def _describe(expected: Any) -> str:
+    if isinstance(expected, type):
+        return expected.__name__
+    if isinstance(expected, tuple):
+        return " or ".join(t.__name__ for t in expected)
+    if isinstance(expected, frozenset):
+        return "one of " + ", ".join(sorted(expected))
+    return str(expected)
+
+
+def format_violations(violations: List[Tuple], limit: int = 20) -> str:
+    lines = []
+    for position, item_id, field, actual, expected in violations[:limit]:
+        where = "page" if position is None else f"[{position}] {item_id}"
+        if field == "missing":
+            lines.append(f"{where}: missing fields {actual}")
+        else:
+            lines.append(f"{where}: {field} is {actual!r}, expected {_describe(expected)}")
+    if len(violations) > limit:
+        lines.append(f"... and {len(violations) - limit} more")
+    return "\n".join(lines)
+
+
+def assert_list_items(
+    source: Any,
+    object_type: Optional[str] = None,
+    spec: Optional[ItemSpec] = None,
+    limit: int = 20,
+):
+    """
+    Assert that every item of one or more list pages has the right object
+    type, id prefix, required fields, field types and enum values (see
+    list_violations). All violations are reported together; the message is
+    only built when there are some.
+    """
+    violations = list_violations(source, object_type, spec)
+    if violations:
+        raise AssertionError(f"{len(violations)} list item violation(s):\n" + format_violations(violations, limit))
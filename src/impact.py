@@ -0,0 +1,342 @@
+import ast
+import glob
+import json
+import os
+import subprocess
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from config.constants import Endpoints
+from config.settings import settings
+from src.api_client import StripeClient
+from src.async_client import AsyncStripeClient
+from src.routing import endpoint_family, resolve_template
+
+# Objects the created_* fixtures may have made before the test started (see
+# the fixture pool), so their requests cannot be seen from the test.
+FIXTURE_ENDPOINTS: Dict[str, List[str]] = {
+    "created_customer": [Endpoints.CUSTOMERS],
+    "created_payment_intent": [Endpoints.PAYMENT_INTENTS],
+    "created_charge": [Endpoints.CHARGES],
+    "created_refund": [Endpoints.CHARGES, Endpoints.REFUNDS],
+}
+
+FIXTURE_PREFIX = "fixture:"
+
+# Changes to these never affect a test run.
+IGNORED_SUFFIXES = (".md", ".png")
+
+
+def _templates() -> List[str]:
+    return [value for name, value in vars(Endpoints).items() if not name.startswith("_") and isinstance(value, str)]
+
+
+def expand_endpoints(names: Iterable[str]) -> Set[str]:
+    """
+    Templates for a changed-endpoint list. Each name is a template or path
+    ("/v1/refunds/{id}", "/v1/refunds/re_1"), an Endpoints attribute
+    ("REFUND") or a family ("refunds", every refunds template).
+    """
+    templates = set()
+    for name in names:
+        if name.startswith("/"):
+            templates.add(resolve_template(name))
+        elif isinstance(getattr(Endpoints, name, None), str):
+            templates.add(getattr(Endpoints, name))
+        else:
+            family = [template for template in _templates() if endpoint_family(template) == name]
+            if not family:
+                raise ValueError(f"Unknown endpoint '{name}'. Use a path, an Endpoints name or a family like 'refunds'")
+            templates.update(family)
+    return templates
+
+
+class ImpactRecorder:
+    """
+    Endpoints templates requested while each test (setup, call and teardown)
+    ran. Requests made while a fixture is set up are kept per fixture name
+    and count for every test that uses it, so a module or session fixture
+    does not charge only the first test that triggered it. ``calls``
+    counts every request sent while a test ran, fixture setup and retries
+    included; a response served from a client's cache is not a call.
+    """
+
+    def __init__(self):
+        self.current: Optional[str] = None
+        self.running: Optional[str] = None
+        self.endpoints: Dict[str, Set[str]] = {}
+        self.fixtures: Dict[str, Set[str]] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._originals = {}
+
+    def install(self) -> None:
+        # Templates only: a request answered from the cache never gets sent.
+        for cls in (StripeClient, AsyncStripeClient):
+            original = cls._request
+            self._originals[(cls, "_request")] = original
+
+            def _request(client, method, endpoint, *args, _original=original, **kwargs):
+                self.record(kwargs.get("template") or resolve_template(endpoint), call=False)
+                return _original(client, method, endpoint, *args, **kwargs)
+            cls._request = _request
+        # Calls are counted once per attempt where they are sent: the
+        # session for StripeClient and callers that use a client's session
+        # directly (the Postman runner), _attempt for AsyncStripeClient.
+        attempt = AsyncStripeClient._attempt
+        self._originals[(AsyncStripeClient, "_attempt")] = attempt
+
+        def _attempt(client, method, endpoint, url, *args, **kwargs):
+            self.record(resolve_template(urlsplit(url).path))
+            return attempt(client, method, endpoint, url, *args, **kwargs)
+        AsyncStripeClient._attempt = _attempt
+        session_request = requests.Session.request
+        self._originals[(requests.Session, "request")] = session_request
+
+        def request(session, method, url, *args, **kwargs):
+            self.record(resolve_template(urlsplit(url).path))
+            return session_request(session, method, url, *args, **kwargs)
+        requests.Session.request = request
+
+    def uninstall(self) -> None:
+        for (owner, name), original in self._originals.items():
+            setattr(owner, name, original)
+        self._originals.clear()
+
+    def record(self, template: str, call: bool = True) -> None:
+        # Requests from background threads (bulk, workflows, the fixture
+        # pool) count for the running test: selecting too much is safe.
+        test, running = self.current, self.running
+        with self._lock:
+            if call and running is not None:
+                self.calls[running] = self.calls.get(running, 0) + 1
+            if test is not None:
+                target = self.fixtures if test.startswith(FIXTURE_PREFIX) else self.endpoints
+                target.setdefault(test, set()).add(template)
+
+    def touched(self, item) -> Set[str]:
+        templates = set(self.endpoints.get(item.nodeid, ()))
+        for fixture in getattr(item, "fixturenames", ()):
+            templates.update(self.fixtures.get(FIXTURE_PREFIX + fixture, ()))
+        return templates
+
+    def save(self, path: str, items) -> None:
+        """Merge this run's tests into the map at ``path``, replacing what was there for them."""
+        tests = load_impact_map(path, workers=False)
+        for item in items:
+            tests[item.nodeid] = sorted(self.touched(item))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "tests": tests}, f, indent=1, sort_keys=True)
+
+
+def _worker_path(path: str, worker: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{worker}{ext}"
+
+
+def load_impact_map(path: str, workers: bool = True) -> Dict[str, List[str]]:
+    """Test node id -> templates, merged with the per-worker maps of an xdist run."""
+    paths = [path] + (sorted(glob.glob(_worker_path(path, "gw*")), key=os.path.getmtime) if workers else [])
+    tests: Dict[str, List[str]] = {}
+    for candidate in paths:
+        if os.path.exists(candidate):
+            with open(candidate, encoding="utf-8") as f:
+                tests.update(json.load(f)["tests"])
+    return tests
+
+
+class ImportGraph:
+    """Repo-relative files each module imports, directly or not, from the repo itself."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._closures: Dict[str, FrozenSet[str]] = {}
+
+    def _resolve(self, name: str) -> Optional[str]:
+        base = os.path.join(*name.split("."))
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.exists(os.path.join(self.root, candidate)):
+                return candidate.replace(os.sep, "/")
+        return None
+
+    def imports(self, path: str) -> Set[str]:
+        try:
+            with open(os.path.join(self.root, path), encoding="utf-8") as f:
+                tree = ast.parse(f.read(), path)
+        except (OSError, SyntaxError):
+            return set()
+        found = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [f"{node.module}.{alias.name}" for alias in node.names] + [node.module]
+            else:
+                continue
+            for name in names:
+                resolved = self._resolve(name)
+                if resolved is not None:
+                    found.add(resolved)
+        return found
+
+    def closure(self, path: str) -> FrozenSet[str]:
+        if path not in self._closures:
+            seen = {path}
+            stack = [path]
+            while stack:
+                for dependency in self.imports(stack.pop()):
+                    if dependency not in seen:
+                        seen.add(dependency)
+                        stack.append(dependency)
+            self._closures[path] = frozenset(seen)
+        return self._closures[path]
+
+
+def changed_files(since: str, root: str) -> List[str]:
+    """Files changed since ``since`` (committed or not), relative to ``root``."""
+    output = subprocess.run(
+        ["git", "diff", "--name-only", "--relative", since], cwd=root, check=True, capture_output=True, text=True,
+    ).stdout
+    return [line for line in output.splitlines() if line]
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("impact", "test-impact selection")
+    group.addoption("--impact-record", action="store_true",
+                    help="save the endpoints each test requests to IMPACT_MAP")
+    group.addoption("--impact-endpoints", default=None,
+                    help="comma-separated changed endpoints (paths, Endpoints names or families); "
+                         "run only the tests that request them")
+    group.addoption("--impact-modules", default=None,
+                    help="comma-separated changed files; run only the tests that import them")
+    group.addoption("--impact-since", default=None,
+                    help="git ref; run only the tests affected by files changed since it")
+
+
+def recorder_for(config) -> ImpactRecorder:
+    """The session's ImpactRecorder, installed on first use (also by the timings plugin)."""
+    recorder = getattr(config, "_impact_recorder", None)
+    if recorder is None:
+        recorder = ImpactRecorder()
+        recorder.install()
+        config._impact_recorder = recorder
+    return recorder
+
+
+def pytest_configure(config):
+    if config.getoption("impact_record"):
+        recorder_for(config)
+
+
+def pytest_unconfigure(config):
+    recorder = getattr(config, "_impact_recorder", None)
+    if recorder is not None:
+        recorder.uninstall()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    recorder = getattr(item.config, "_impact_recorder", None)
+    if recorder is None:
+        yield
+        return
+    recorder.current = recorder.running = item.nodeid
+    try:
+        yield
+    finally:
+        recorder.current = recorder.running = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    recorder = getattr(request.config, "_impact_recorder", None)
+    if recorder is None:
+        yield
+        return
+    outer = recorder.current
+    recorder.current = FIXTURE_PREFIX + fixturedef.argname
+    try:
+        yield
+    finally:
+        recorder.current = outer
+
+
+def pytest_sessionfinish(session, exitstatus):
+    recorder = getattr(session.config, "_impact_recorder", None)
+    if recorder is None or not session.config.getoption("impact_record"):
+        return
+    path = settings.IMPACT_MAP
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if worker:
+        path = _worker_path(path, worker)
+    recorder.save(path, session.items)
+
+
+class ImpactSelection:
+    """Decides, per test, whether a change can affect it."""
+
+    def __init__(self, root: str, endpoints: Set[str], modules: Iterable[str], tests: Dict[str, List[str]]):
+        self.endpoints = endpoints
+        self.modules = {module.replace(os.sep, "/") for module in modules}
+        self.tests = tests
+        self.graph = ImportGraph(root)
+        # Anything but a Python module in the tree (pytest.ini, requirements,
+        # the postman collection...) can change any test.
+        self.everything = any(
+            not module.endswith(IGNORED_SUFFIXES)
+            and not (module.endswith(".py") and os.path.exists(os.path.join(root, module)))
+            for module in self.modules)
+        self.shared = self.graph.closure("conftest.py") if os.path.exists(os.path.join(root, "conftest.py")) else frozenset()
+
+    def reason(self, item) -> Optional[str]:
+        """Why ``item`` has to run, or None if the change cannot affect it."""
+        if self.everything:
+            return "non-module change"
+        if item.get_closest_marker("smoke") is not None:
+            return "smoke"
+        path = item.nodeid.split("::", 1)[0]
+        if self.modules & (self.shared | self.graph.closure(path)):
+            return "module"
+        if item.nodeid not in self.tests:
+            return "not in impact map"
+        touched = set(self.tests[item.nodeid])
+        for fixture in getattr(item, "fixturenames", ()):
+            touched.update(FIXTURE_ENDPOINTS.get(fixture, ()))
+        if touched & self.endpoints:
+            return "endpoint"
+        return None
+
+
+def pytest_collection_modifyitems(session, config, items):
+    endpoints = _split(config.getoption("impact_endpoints"))
+    modules = _split(config.getoption("impact_modules"))
+    since = config.getoption("impact_since")
+    if not endpoints and not modules and since is None:
+        return
+    root = str(config.rootpath)
+    if since is not None:
+        modules += changed_files(since, root)
+    try:
+        templates = expand_endpoints(endpoints)
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+    selection = ImpactSelection(root, templates, modules, load_impact_map(settings.IMPACT_MAP))
+    selected, deselected = [], []
+    for item in items:
+        (selected if selection.reason(item) else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+    config._impact_summary = f"impact: running {len(selected)} of {len(selected) + len(deselected)} tests"
+
+
+def pytest_report_collectionfinish(config, start_path, items):
+    return getattr(config, "_impact_summary", None)
@@ -0,0 +1,224 @@
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.routing import resolve_template
+
+HOOK_EVENTS = ("before_request", "after_response", "on_error")
+
+
+class RequestEvent:
+    """
+    Timing and size data for one HTTP request, passed to every hook.
+
+    All durations are in seconds. ``dns`` and ``connect`` are None when the
+    request reused a pooled connection; ``connect`` covers the whole setup
+    (DNS, TCP and TLS). ``ttfb`` runs from the start of the request to the
+    response headers, ``total`` also includes reading the body. Retries are
+    separate events with ``attempt`` > 0.
+    """
+
+    __slots__ = (
+        "method", "endpoint", "template", "url", "request_size", "status_code", "response_size",
+        "dns", "connect", "ttfb", "total", "error", "attempt", "started",
+    )
+
+    def __init__(
+        self, method: str, endpoint: str, url: str, request_size: int, attempt: int = 0, template: Optional[str] = None
+    ):
+        self.method = method
+        self.endpoint = endpoint
+        # Endpoint methods pass their route's template; raw get/post resolve it.
+        self.template = template or resolve_template(endpoint)
+        self.url = url
+        self.request_size = request_size
+        self.status_code: Optional[int] = None
+        self.response_size: Optional[int] = None
+        self.dns: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.total: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self.attempt = attempt
+        self.started = time.perf_counter()
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.template}"
+
+    def finish(self) -> None:
+        self.total = time.perf_counter() - self.started
+
+
+class Hooks:
+    """
+    Callbacks fired around every request made by a client:
+
+        before_request(event)
+        after_response(event, response)
+        on_error(event, exception)
+    """
+
+    def __init__(self):
+        self.before_request: List[Callable[[RequestEvent], Any]] = []
+        self.after_response: List[Callable[[RequestEvent, Any], Any]] = []
+        self.on_error: List[Callable[[RequestEvent, BaseException], Any]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.before_request or self.after_response or self.on_error)
+
+    def add(self, event: str, callback: Callable[..., Any]) -> None:
+        if event not in HOOK_EVENTS:
+            raise ValueError(f"Unknown hook '{event}'. Expected one of {HOOK_EVENTS}")
+        getattr(self, event).append(callback)
+
+    def remove(self, event: str, callback: Callable[..., Any]) -> None:
+        getattr(self, event).remove(callback)
+
+    def register(self, listener: Any) -> None:
+        """Add every hook method (before_request, after_response, on_error) ``listener`` defines."""
+        for event in HOOK_EVENTS:
+            callback = getattr(listener, event, None)
+            if callback is not None:
+                self.add(event, callback)
+
+    def unregister(self, listener: Any) -> None:
+        for event in HOOK_EVENTS:
+            callback = getattr(listener, event, None)
+            if callback is not None and callback in getattr(self, event):
+                self.remove(event, callback)
+
+    def fire_before(self, event: RequestEvent) -> None:
+        for callback in self.before_request:
+            callback(event)
+
+    def fire_after(self, event: RequestEvent, response: Any) -> None:
+        for callback in self.after_response:
+            callback(event, response)
+
+    def fire_error(self, event: RequestEvent, error: BaseException) -> None:
+        for callback in self.on_error:
+            callback(event, error)
+
+
+# Log-scaled buckets: 8 per power of two from 10us, ~200 buckets up to ~5 min.
+_MIN_LATENCY = 1e-5
+_BUCKETS_PER_DOUBLING = 8
+_BUCKET_COUNT = 200
+
+
+def _bucket(latency: float) -> int:
+    if latency <= _MIN_LATENCY:
+        return 0
+    index = int(math.log2(latency / _MIN_LATENCY) * _BUCKETS_PER_DOUBLING)
+    return min(index, _BUCKET_COUNT - 1)
+
+
+def _bucket_upper(index: int) -> float:
+    return _MIN_LATENCY * 2 ** ((index + 1) / _BUCKETS_PER_DOUBLING)
+
+
+class LatencyHistogram:
+    """Fixed-memory latency histogram (~9% relative precision)."""
+
+    __slots__ = ("count", "errors", "total", "min", "max", "bytes_out", "bytes_in", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.buckets = [0] * _BUCKET_COUNT
+
+    def record(self, latency: float, failed: bool, bytes_out: int, bytes_in: int) -> None:
+        self.count += 1
+        self.total += latency
+        if latency < self.min:
+            self.min = latency
+        if latency > self.max:
+            self.max = latency
+        if failed:
+            self.errors += 1
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.buckets[_bucket(latency)] += 1
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        target = math.ceil(self.count * pct / 100.0)
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= target:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_s": self.total,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "min_ms": self.min * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+        }
+
+
+class HistogramCollector:
+    """
+    Hook listener that aggregates request latencies per "METHOD template"
+    (e.g. "GET /v1/customers/{id}"), so per-id URLs share one histogram.
+
+        collector = HistogramCollector()
+        client.hooks.register(collector)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def _record(self, event: RequestEvent, failed: bool) -> None:
+        latency = event.total if event.total is not None else time.perf_counter() - event.started
+        with self._lock:
+            histogram = self._histograms.get(event.key)
+            if histogram is None:
+                histogram = self._histograms[event.key] = LatencyHistogram()
+            histogram.record(latency, failed, event.request_size, event.response_size or 0)
+
+    def after_response(self, event: RequestEvent, response: Any) -> None:
+        self._record(event, (event.status_code or 0) >= 400)
+
+    def on_error(self, event: RequestEvent, error: BaseException) -> None:
+        self._record(event, True)
+
+    @property
+    def request_count(self) -> int:
+        with self._lock:
+            return sum(h.count for h in self._histograms.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {key: histogram.summary() for key, histogram in self._histograms.items()}
+
+    def top(self, limit: int = 10) -> List[Tuple[str, Dict[str, float]]]:
+        """Endpoints ordered by total time spent, most expensive first."""
+        return sorted(self.snapshot().items(), key=lambda item: item[1]["total_s"], reverse=True)[:limit]
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2, sort_keys=True)
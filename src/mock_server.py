@@ -0,0 +1,880 @@
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+from http import HTTPStatus
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from config.constants import (
+    Currency,
+    Endpoints,
+    ErrorType,
+    ObjectPrefix,
+    PaymentIntentStatus,
+    RefundReason,
+    RefundStatus,
+    StatusCodes,
+)
+from src.encoding import decode_form
+from src.routing import resolve_template
+
+Payload = Dict[str, Any]
+
+# Statuses each PaymentIntent action may start from.
+PAYMENT_INTENT_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "confirm": frozenset({PaymentIntentStatus.REQUIRES_PAYMENT_METHOD, PaymentIntentStatus.REQUIRES_CONFIRMATION}),
+    "capture": frozenset({PaymentIntentStatus.REQUIRES_CAPTURE}),
+    "cancel": frozenset({
+        PaymentIntentStatus.REQUIRES_PAYMENT_METHOD,
+        PaymentIntentStatus.REQUIRES_CONFIRMATION,
+        PaymentIntentStatus.REQUIRES_ACTION,
+        PaymentIntentStatus.PROCESSING,
+        PaymentIntentStatus.REQUIRES_CAPTURE,
+    }),
+    # amount, currency, payment_method and capture_method are frozen after confirmation
+    "update_payment_details": frozenset({
+        PaymentIntentStatus.REQUIRES_PAYMENT_METHOD,
+        PaymentIntentStatus.REQUIRES_CONFIRMATION,
+        PaymentIntentStatus.REQUIRES_ACTION,
+    }),
+}
+
+# Statuses each Refund status may move to.
+REFUND_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    RefundStatus.REQUIRES_ACTION: frozenset({RefundStatus.PENDING, RefundStatus.CANCELED}),
+    RefundStatus.PENDING: frozenset({RefundStatus.SUCCEEDED, RefundStatus.FAILED, RefundStatus.CANCELED}),
+    RefundStatus.SUCCEEDED: frozenset({RefundStatus.FAILED}),
+    RefundStatus.FAILED: frozenset(),
+    RefundStatus.CANCELED: frozenset(),
+}
+
+DECLINED_PAYMENT_METHODS = frozenset({"pm_card_chargeDeclined", "tok_chargeDeclined"})
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_COMMON_PARAMS = frozenset({"expand"})
+_IDEMPOTENCY_CACHE_SIZE = 10_000
+
+
+class MockError(Exception):
+    """A Stripe-style error response: {"error": {"type", "message", "code", "param"}}."""
+
+    def __init__(
+        self,
+        message: str,
+        status: int = StatusCodes.BAD_REQUEST,
+        type: str = ErrorType.INVALID_REQUEST,
+        code: Optional[str] = None,
+        param: Optional[str] = None,
+        **extra: Any,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.body = {"type": type, "message": message}
+        if code:
+            self.body["code"] = code
+        if param:
+            self.body["param"] = param
+        self.body.update(extra)
+
+
+def _missing(param: str) -> MockError:
+    return MockError(f"Missing required param: {param}.", code="parameter_missing", param=param)
+
+
+def _no_such(kind: str, object_id: str, param: Optional[str] = None) -> MockError:
+    return MockError(
+        f"No such {kind}: '{object_id}'",
+        status=StatusCodes.NOT_FOUND if param is None else StatusCodes.BAD_REQUEST,
+        code="resource_missing",
+        param=param or "id",
+    )
+
+
+def _unexpected_state(kind: str, obj: Payload, action: str, allowed: Iterable[str]) -> MockError:
+    return MockError(
+        f"You cannot {action} this {kind} because it has a status of {obj['status']}. "
+        f"Only a {kind} with one of the following statuses may be {action}ed: {', '.join(sorted(allowed))}.",
+        code=f"{obj['object']}_unexpected_state",
+    )
+
+
+class _Store:
+    """
+    Objects of one type by id, in creation order, plus secondary indexes on
+    ``indexed`` fields (e.g. charges by customer) used to filter lists.
+    """
+
+    def __init__(self, kind: str, indexed: Tuple[str, ...] = ()):
+        self.kind = kind
+        self.objects: Dict[str, Payload] = {}
+        self._order: List[str] = []
+        self._position: Dict[str, int] = {}
+        self._indexes: Dict[str, Dict[Any, List[str]]] = {field: defaultdict(list) for field in indexed}
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def add(self, obj: Payload) -> Payload:
+        self.objects[obj["id"]] = obj
+        self._position[obj["id"]] = len(self._order)
+        self._order.append(obj["id"])
+        for field, index in self._indexes.items():
+            if obj.get(field) is not None:
+                index[obj[field]].append(obj["id"])
+        return obj
+
+    def get(self, object_id: str, param: Optional[str] = None) -> Payload:
+        obj = self.objects.get(object_id)
+        if obj is None:
+            raise _no_such(self.kind, object_id, param)
+        return obj
+
+    def set_field(self, obj: Payload, field: str, value: Any) -> None:
+        # Keeps the secondary index in step with the object.
+        index = self._indexes.get(field)
+        if index is not None and obj.get(field) != value:
+            if obj.get(field) is not None:
+                index[obj[field]].remove(obj["id"])
+            if value is not None:
+                index[value].append(obj["id"])
+                index[value].sort(key=self._position.__getitem__)
+        obj[field] = value
+
+    def remove(self, object_id: str) -> Payload:
+        obj = self.objects.pop(object_id)
+        for field, index in self._indexes.items():
+            if obj.get(field) is not None:
+                index[obj[field]].remove(object_id)
+        return obj
+
+    def newest_first(self, filters: Optional[Mapping[str, Any]] = None) -> List[Payload]:
+        ids: Iterable[str] = self._order
+        rest = dict(filters or {})
+        for field in list(rest):
+            if field in self._indexes:
+                ids = self._indexes[field].get(rest.pop(field), [])
+                break
+        return [
+            obj for obj in (self.objects.get(object_id) for object_id in reversed(list(ids)))
+            if obj is not None and all(obj.get(k) == v for k, v in rest.items())
+        ]
+
+    def page(self, params: Payload, filters: Optional[Mapping[str, Any]] = None) -> Tuple[List[Payload], bool]:
+        limit = _limit(params)
+        items = self.newest_first(filters)
+        if params.get("starting_after"):
+            cursor = self._position[self.get(params["starting_after"], "starting_after")["id"]]
+            items = [obj for obj in items if self._position[obj["id"]] < cursor]
+            return items[:limit], len(items) > limit
+        if params.get("ending_before"):
+            cursor = self._position[self.get(params["ending_before"], "ending_before")["id"]]
+            items = [obj for obj in items if self._position[obj["id"]] > cursor]
+            return items[-limit:], len(items) > limit
+        return items[:limit], len(items) > limit
+
+
+def _limit(params: Payload) -> int:
+    raw = params.get("limit", "10")
+    if not str(raw).isdigit() or not 1 <= int(raw) <= 100:
+        raise MockError("Invalid integer: limit must be between 1 and 100", code="parameter_invalid_integer", param="limit")
+    return int(raw)
+
+
+def _int(params: Payload, name: str, required: bool = False, minimum: int = 1) -> Optional[int]:
+    raw = params.get(name)
+    if raw is None or raw == "":
+        if required:
+            raise _missing(name)
+        return None
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise MockError(f"Invalid integer: {raw}", code="parameter_invalid_integer", param=name)
+    if value < minimum:
+        raise MockError(f"Invalid positive integer: {name} must be at least {minimum}", code="parameter_invalid_integer", param=name)
+    return value
+
+
+def _bool(params: Payload, name: str, default: bool) -> bool:
+    raw = params.get(name)
+    if raw is None:
+        return default
+    if raw not in ("true", "false"):
+        raise MockError(f"Invalid boolean: {raw}", param=name)
+    return raw == "true"
+
+
+def _currency(params: Payload, required: bool = True) -> Optional[str]:
+    raw = params.get("currency")
+    if not raw:
+        if required:
+            raise _missing("currency")
+        return None
+    if raw.lower() not in Currency.ALL:
+        raise MockError(f"Invalid currency: {raw}.", param="currency")
+    return raw.lower()
+
+
+def _metadata(params: Payload, current: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    # Stripe merges metadata on update; "" unsets a key and metadata="" clears it.
+    raw = params.get("metadata")
+    if raw is None:
+        return dict(current or {})
+    if raw == "":
+        return {}
+    if not isinstance(raw, dict):
+        raise MockError("Invalid object", param="metadata")
+    merged = dict(current or {})
+    for key, value in raw.items():
+        if value == "":
+            merged.pop(key, None)
+        elif not isinstance(value, str):
+            raise MockError(f"Invalid value for metadata[{key}]", param=f"metadata[{key}]")
+        else:
+            merged[key] = value
+    return merged
+
+
+def _check_params(params: Payload, allowed: FrozenSet[str]) -> None:
+    for name in params:
+        if name not in allowed and name not in _COMMON_PARAMS:
+            raise MockError(f"Received unknown parameter: {name}", code="parameter_unknown", param=name)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}{uuid.uuid4().hex[:24]}"
+
+
+# Search: clauses like email:'a@b.com', name~'ann', amount>1000, metadata['k']:'v'
+_SEARCH_CLAUSE = re.compile(
+    r"""^\s*(?P<negate>-)?(?P<field>metadata\[['"](?P<key>[^'"]+)['"]\]|[a-z_]+)"""
+    r"""\s*(?P<op>:|~|>=|<=|>|<)\s*(?:'(?P<single>[^']*)'|"(?P<double>[^"]*)"|(?P<number>-?\d+))\s*$"""
+)
+_SEARCH_FIELDS = {
+    "customer": frozenset({"email", "name", "phone", "created", "metadata"}),
+    "charge": frozenset({"amount", "currency", "customer", "status", "created", "refunded", "metadata"}),
+}
+
+
+def _compile_search(query: str, kind: str) -> Callable[[Payload], bool]:
+    if not query or not query.strip():
+        raise _missing("query")
+    if " AND " in query and " OR " in query:
+        raise MockError("Search queries cannot mix AND and OR", param="query")
+    joiner = any if " OR " in query else all
+    clauses = []
+    for text in re.split(r" AND | OR ", query):
+        match = _SEARCH_CLAUSE.match(text)
+        if match is None:
+            raise MockError(f"Invalid search query: {text.strip()!r}", param="query")
+        field = "metadata" if match["key"] else match["field"]
+        if field not in _SEARCH_FIELDS[kind]:
+            raise MockError(f"Field `{match['field']}` is an unsupported search field for {kind}", param="query")
+        value = match["number"] if match["number"] is not None else (match["single"] if match["single"] is not None else match["double"])
+        clauses.append((bool(match["negate"]), field, match["key"], match["op"], value))
+
+    def clause_matches(obj: Payload, clause) -> bool:
+        negate, field, key, op, expected = clause
+        actual = obj.get("metadata", {}).get(key) if key else obj.get(field)
+        if isinstance(actual, bool):
+            actual = "true" if actual else "false"
+        if op == ":":
+            result = actual is not None and str(actual) == expected
+        elif op == "~":
+            result = actual is not None and expected.lower() in str(actual).lower()
+        else:
+            if not isinstance(actual, int):
+                return negate
+            bound = int(expected)
+            result = {">": actual > bound, "<": actual < bound, ">=": actual >= bound, "<=": actual <= bound}[op]
+        return result != negate
+
+    return lambda obj: joiner(clause_matches(obj, clause) for clause in clauses)
+
+
+class MockServer:
+    """
+    Stateful, in-process stand-in for stripe-mock serving config.constants
+    Endpoints. Objects live in indexed in-memory stores, so a retrieve
+    returns what was created and updates persist. PaymentIntents and Refunds
+    follow PAYMENT_INTENT_TRANSITIONS and REFUND_TRANSITIONS; an illegal
+    transition is a 400 like on Stripe.
+
+    ``handle()`` takes a raw request and returns (status, JSON body).
+    InProcessAdapter mounts it under a requests.Session.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._routes: Dict[Tuple[str, str], Callable[..., Payload]] = {
+            ("POST", Endpoints.PAYMENT_INTENTS): self.create_payment_intent,
+            ("GET", Endpoints.PAYMENT_INTENTS): self.list_payment_intents,
+            ("GET", Endpoints.PAYMENT_INTENT): self.retrieve_payment_intent,
+            ("POST", Endpoints.PAYMENT_INTENT): self.update_payment_intent,
+            ("POST", Endpoints.CONFIRM_PAYMENT_INTENT): self.confirm_payment_intent,
+            ("POST", Endpoints.CAPTURE_PAYMENT_INTENT): self.capture_payment_intent,
+            ("POST", Endpoints.CANCEL_PAYMENT_INTENT): self.cancel_payment_intent,
+            ("POST", Endpoints.CUSTOMERS): self.create_customer,
+            ("GET", Endpoints.CUSTOMERS): self.list_customers,
+            ("GET", Endpoints.SEARCH_CUSTOMERS): self.search_customers,
+            ("GET", Endpoints.CUSTOMER): self.retrieve_customer,
+            ("POST", Endpoints.CUSTOMER): self.update_customer,
+            ("DELETE", Endpoints.CUSTOMER): self.delete_customer,
+            ("POST", Endpoints.REFUNDS): self.create_refund,
+            ("GET", Endpoints.REFUNDS): self.list_refunds,
+            ("GET", Endpoints.REFUND): self.retrieve_refund,
+            ("POST", Endpoints.REFUND): self.update_refund,
+            ("POST", Endpoints.CANCEL_REFUND): self.cancel_refund,
+            ("POST", Endpoints.CHARGES): self.create_charge,
+            ("GET", Endpoints.CHARGES): self.list_charges,
+            ("GET", Endpoints.SEARCH_CHARGES): self.search_charges,
+            ("GET", Endpoints.CHARGE): self.retrieve_charge,
+            ("POST", Endpoints.CHARGE): self.update_charge,
+            ("POST", Endpoints.CAPTURE_CHARGE): self.capture_charge,
+        }
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.payment_intents = _Store("payment_intent", indexed=("customer",))
+            self.customers = _Store("customer", indexed=("email",))
+            self.charges = _Store("charge", indexed=("customer", "payment_intent"))
+            self.refunds = _Store("refund", indexed=("charge", "payment_intent"))
+            self._deleted_customers: Dict[str, Payload] = {}
+            self._idempotent: "OrderedDict[Tuple[str, str], Tuple[int, bytes]]" = OrderedDict()
+
+    # Dispatch
+
+    def handle(
+        self, method: str, path: str, query: Optional[str], body: Any, headers: Mapping[str, str]
+    ) -> Tuple[int, bytes, bool]:
+        """
+        (status, JSON body, replayed) for one request; ``replayed`` marks an
+        Idempotency-Key hit. The body is serialized under the lock, so it is
+        the object as this request left it, and a replay returns exactly the
+        bytes of the first response.
+        """
+        try:
+            self._authenticate(headers.get("Authorization"))
+            template = resolve_template(path)
+            handler = self._routes.get((method.upper(), template))
+            if handler is None:
+                raise MockError(
+                    f"Unrecognized request URL ({method.upper()}: {path}).", status=StatusCodes.NOT_FOUND)
+            params = decode_form(query) if method.upper() in ("GET", "DELETE") else decode_form(body)
+            key = headers.get("Idempotency-Key")
+            args = (path.split("/")[3],) if "{id}" in template else ()
+            with self._lock:
+                if key and method.upper() == "POST":
+                    cached = self._idempotent.get((key, path))
+                    if cached is not None:
+                        return cached[0], cached[1], True
+                try:
+                    result = StatusCodes.OK, _encode(handler(*args, params))
+                except MockError as e:
+                    result = e.status, _encode({"error": e.body})
+                if key and method.upper() == "POST":
+                    self._idempotent[(key, path)] = result
+                    if len(self._idempotent) > _IDEMPOTENCY_CACHE_SIZE:
+                        self._idempotent.popitem(last=False)
+                return result[0], result[1], False
+        except MockError as e:
+            return e.status, _encode({"error": e.body}), False
+
+    @staticmethod
+    def _authenticate(authorization: Optional[str]) -> None:
+        if not authorization:
+            raise MockError(
+                "You did not provide an API key. You need to provide your API key in the Authorization header.",
+                status=StatusCodes.UNAUTHORIZED,
+            )
+        scheme, _, api_key = authorization.partition(" ")
+        if scheme != "Bearer" or not api_key.startswith("sk_test_"):
+            raise MockError(f"Invalid API Key provided: {api_key[:8]}****", status=StatusCodes.UNAUTHORIZED)
+
+    @staticmethod
+    def _list(url: str, items: List[Payload], has_more: bool) -> Payload:
+        return {"object": "list", "data": items, "has_more": has_more, "url": url}
+
+    @staticmethod
+    def _search(url: str, store: _Store, params: Payload) -> Payload:
+        _check_params(params, frozenset({"query", "limit", "page"}))
+        matches = list(filter(_compile_search(params.get("query", ""), store.kind), store.newest_first()))
+        limit = _limit(params)
+        page = params.get("page") or "0"
+        if not page.isdigit():
+            raise MockError(f"Invalid page token: {page}", param="page")
+        start = int(page)
+        has_more = start + limit < len(matches)
+        return {
+            "object": "search_result",
+            "data": matches[start:start + limit],
+            "has_more": has_more,
+            "next_page": str(start + limit) if has_more else None,
+            "total_count": len(matches),
+            "url": url,
+        }
+
+    # Customers
+
+    _CUSTOMER_PARAMS = frozenset({"email", "name", "phone", "description", "metadata", "address", "shipping", "balance"})
+
+    def _customer_fields(self, params: Payload, customer: Payload) -> None:
+        email = params.get("email")
+        if email and not _EMAIL.match(email):
+            raise MockError(f"Invalid email address: {email}", code="email_invalid", param="email")
+        for field in ("name", "phone", "description", "address", "shipping"):
+            if field in params:
+                customer[field] = params[field] or None
+        if "balance" in params:
+            customer["balance"] = _int(params, "balance", minimum=-(10 ** 12)) or 0
+        if "email" in params:
+            if customer["id"] in self.customers.objects:
+                self.customers.set_field(customer, "email", email or None)
+            else:
+                customer["email"] = email or None
+        customer["metadata"] = _metadata(params, customer.get("metadata"))
+
+    def create_customer(self, params: Payload) -> Payload:
+        _check_params(params, self._CUSTOMER_PARAMS)
+        customer = {
+            "id": _new_id(ObjectPrefix.CUSTOMER),
+            "object": "customer",
+            "address": None,
+            "balance": 0,
+            "created": int(time.time()),
+            "currency": None,
+            "delinquent": False,
+            "description": None,
+            "email": None,
+            "livemode": False,
+            "metadata": {},
+            "name": None,
+            "phone": None,
+            "shipping": None,
+        }
+        self._customer_fields(params, customer)
+        return self.customers.add(customer)
+
+    def retrieve_customer(self, customer_id: str, params: Payload) -> Payload:
+        if customer_id in self._deleted_customers:
+            return self._deleted_customers[customer_id]
+        return self.customers.get(customer_id)
+
+    def update_customer(self, customer_id: str, params: Payload) -> Payload:
+        _check_params(params, self._CUSTOMER_PARAMS)
+        customer = self.customers.get(customer_id)
+        self._customer_fields(params, customer)
+        return customer
+
+    def delete_customer(self, customer_id: str, params: Payload) -> Payload:
+        self.customers.get(customer_id)
+        self.customers.remove(customer_id)
+        deleted = {"id": customer_id, "object": "customer", "deleted": True}
+        self._deleted_customers[customer_id] = deleted
+        return deleted
+
+    def list_customers(self, params: Payload) -> Payload:
+        _check_params(params, frozenset({"limit", "starting_after", "ending_before", "email"}))
+        filters = {"email": params["email"]} if params.get("email") else None
+        return self._list(Endpoints.CUSTOMERS, *self.customers.page(params, filters))
+
+    def search_customers(self, params: Payload) -> Payload:
+        return self._search(Endpoints.SEARCH_CUSTOMERS, self.customers, params)
+
+    def _customer_param(self, params: Payload) -> Optional[str]:
+        customer_id = params.get("customer") or None
+        if customer_id is not None:
+            self.customers.get(customer_id, param="customer")
+        return customer_id
+
+    # Charges
+
+    def _new_charge(
+        self, amount: int, currency: str, customer: Optional[str], captured: bool,
+        payment_intent: Optional[str] = None, description: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None, receipt_email: Optional[str] = None,
+    ) -> Payload:
+        return self.charges.add({
+            "id": _new_id(ObjectPrefix.CHARGE),
+            "object": "charge",
+            "amount": amount,
+            "amount_captured": amount if captured else 0,
+            "amount_refunded": 0,
+            "captured": captured,
+            "created": int(time.time()),
+            "currency": currency,
+            "customer": customer,
+            "description": description,
+            "livemode": False,
+            "metadata": metadata or {},
+            "paid": True,
+            "payment_intent": payment_intent,
+            "receipt_email": receipt_email,
+            "refunded": False,
+            "status": "succeeded",
+        })
+
+    def create_charge(self, params: Payload) -> Payload:
+        _check_params(params, frozenset({
+            "amount", "currency", "customer", "source", "description", "metadata", "capture",
+            "receipt_email", "statement_descriptor",
+        }))
+        amount = _int(params, "amount", required=True)
+        currency = _currency(params)
+        customer = self._customer_param(params)
+        if params.get("source") in DECLINED_PAYMENT_METHODS:
+            raise MockError(
+                "Your card was declined.", status=StatusCodes.REQUEST_FAILED, type=ErrorType.CARD_ERROR,
+                code="card_declined", decline_code="generic_decline",
+            )
+        return self._new_charge(
+            amount, currency, customer, _bool(params, "capture", True),
+            description=params.get("description"), metadata=_metadata(params),
+            receipt_email=params.get("receipt_email"),
+        )
+
+    def retrieve_charge(self, charge_id: str, params: Payload) -> Payload:
+        return self.charges.get(charge_id)
+
+    def update_charge(self, charge_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset({"description", "metadata", "receipt_email", "customer"}))
+        charge = self.charges.get(charge_id)
+        for field in ("description", "receipt_email"):
+            if field in params:
+                charge[field] = params[field] or None
+        if "customer" in params:
+            self.charges.set_field(charge, "customer", self._customer_param(params))
+        charge["metadata"] = _metadata(params, charge["metadata"])
+        return charge
+
+    def capture_charge(self, charge_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset({"amount", "receipt_email", "statement_descriptor"}))
+        charge = self.charges.get(charge_id)
+        if charge["captured"]:
+            raise MockError(f"Charge {charge_id} has already been captured.", code="charge_already_captured")
+        amount = _int(params, "amount") or charge["amount"]
+        if amount > charge["amount"]:
+            raise MockError("Amount to capture exceeds the charge amount.", code="amount_too_large", param="amount")
+        charge.update(captured=True, amount_captured=amount)
+        return charge
+
+    def list_charges(self, params: Payload) -> Payload:
+        _check_params(params, frozenset({"limit", "starting_after", "ending_before", "customer", "payment_intent"}))
+        filters = {k: params[k] for k in ("customer", "payment_intent") if params.get(k)}
+        return self._list(Endpoints.CHARGES, *self.charges.page(params, filters))
+
+    def search_charges(self, params: Payload) -> Payload:
+        return self._search(Endpoints.SEARCH_CHARGES, self.charges, params)
+
+    # Payment intents
+
+    def _payment_intent_state(self, intent: Payload, action: str, verb: Optional[str] = None) -> None:
+        allowed = PAYMENT_INTENT_TRANSITIONS[action]
+        if intent["status"] not in allowed:
+            raise _unexpected_state("PaymentIntent", intent, verb or action, allowed)
+
+    def create_payment_intent(self, params: Payload) -> Payload:
+        _check_params(params, frozenset({
+            "amount", "currency", "customer", "description", "metadata", "payment_method",
+            "payment_method_types", "capture_method", "confirm", "receipt_email", "statement_descriptor",
+        }))
+        capture_method = params.get("capture_method", "automatic")
+        if capture_method not in ("automatic", "manual"):
+            raise MockError(f"Invalid capture_method: {capture_method}", param="capture_method")
+        payment_method = params.get("payment_method") or None
+        intent = self.payment_intents.add({
+            "id": _new_id(ObjectPrefix.PAYMENT_INTENT),
+            "object": "payment_intent",
+            "amount": _int(params, "amount", required=True),
+            "amount_capturable": 0,
+            "amount_received": 0,
+            "canceled_at": None,
+            "cancellation_reason": None,
+            "capture_method": capture_method,
+            "created": int(time.time()),
+            "currency": _currency(params),
+            "customer": self._customer_param(params),
+            "description": params.get("description"),
+            "last_payment_error": None,
+            "latest_charge": None,
+            "livemode": False,
+            "metadata": _metadata(params),
+            "payment_method": payment_method,
+            "payment_method_types": params.get("payment_method_types") or ["card"],
+            "receipt_email": params.get("receipt_email"),
+            "status": (
+                PaymentIntentStatus.REQUIRES_CONFIRMATION if payment_method
+                else PaymentIntentStatus.REQUIRES_PAYMENT_METHOD
+            ),
+        })
+        if _bool(params, "confirm", False):
+            self.confirm_payment_intent(intent["id"], {})
+        return intent
+
+    def retrieve_payment_intent(self, intent_id: str, params: Payload) -> Payload:
+        return self.payment_intents.get(intent_id)
+
+    def update_payment_intent(self, intent_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset({
+            "amount", "currency", "customer", "description", "metadata", "payment_method",
+            "capture_method", "receipt_email", "statement_descriptor",
+        }))
+        intent = self.payment_intents.get(intent_id)
+        if {"amount", "currency", "payment_method", "capture_method"} & params.keys():
+            self._payment_intent_state(intent, "update_payment_details", "update")
+            if "amount" in params:
+                intent["amount"] = _int(params, "amount", required=True)
+            if "currency" in params:
+                intent["currency"] = _currency(params)
+            if "capture_method" in params:
+                if params["capture_method"] not in ("automatic", "manual"):
+                    raise MockError(f"Invalid capture_method: {params['capture_method']}", param="capture_method")
+                intent["capture_method"] = params["capture_method"]
+            if "payment_method" in params:
+                intent["payment_method"] = params["payment_method"] or None
+                intent["status"] = (
+                    PaymentIntentStatus.REQUIRES_CONFIRMATION if intent["payment_method"]
+                    else PaymentIntentStatus.REQUIRES_PAYMENT_METHOD
+                )
+        if "customer" in params:
+            self.payment_intents.set_field(intent, "customer", self._customer_param(params))
+        for field in ("description", "receipt_email"):
+            if field in params:
+                intent[field] = params[field] or None
+        intent["metadata"] = _metadata(params, intent["metadata"])
+        return intent
+
+    def confirm_payment_intent(self, intent_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset({"payment_method", "receipt_email", "return_url", "capture_method"}))
+        intent = self.payment_intents.get(intent_id)
+        self._payment_intent_state(intent, "confirm")
+        payment_method = params.get("payment_method") or intent["payment_method"]
+        if not payment_method:
+            raise MockError(
+                "You cannot confirm this PaymentIntent because it's missing a payment method.",
+                code="payment_intent_unexpected_state",
+            )
+        intent["payment_method"] = payment_method
+        if params.get("capture_method") in ("automatic", "manual"):
+            intent["capture_method"] = params["capture_method"]
+        if payment_method in DECLINED_PAYMENT_METHODS:
+            error = {
+                "type": ErrorType.CARD_ERROR, "message": "Your card was declined.",
+                "code": "card_declined", "decline_code": "generic_decline",
+            }
+            intent.update(status=PaymentIntentStatus.REQUIRES_PAYMENT_METHOD, last_payment_error=error)
+            raise MockError(
+                error["message"], status=StatusCodes.REQUEST_FAILED, type=ErrorType.CARD_ERROR,
+                code="card_declined", decline_code="generic_decline", payment_intent=intent,
+            )
+
+        manual = intent["capture_method"] == "manual"
+        charge = self._new_charge(
+            intent["amount"], intent["currency"], intent["customer"], captured=not manual,
+            payment_intent=intent_id, description=intent["description"],
+        )
+        intent.update(last_payment_error=None, latest_charge=charge["id"])
+        if manual:
+            intent.update(status=PaymentIntentStatus.REQUIRES_CAPTURE, amount_capturable=intent["amount"])
+        else:
+            intent.update(status=PaymentIntentStatus.SUCCEEDED, amount_received=intent["amount"])
+        return intent
+
+    def capture_payment_intent(self, intent_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset({"amount_to_capture", "metadata"}))
+        intent = self.payment_intents.get(intent_id)
+        self._payment_intent_state(intent, "capture")
+        amount = _int(params, "amount_to_capture") or intent["amount_capturable"]
+        if amount > intent["amount_capturable"]:
+            raise MockError(
+                "The amount to capture exceeds the amount capturable.",
+                code="amount_too_large", param="amount_to_capture",
+            )
+        charge = self.charges.get(intent["latest_charge"])
+        charge.update(captured=True, amount_captured=amount)
+        intent.update(
+            status=PaymentIntentStatus.SUCCEEDED, amount_received=amount, amount_capturable=0,
+            metadata=_metadata(params, intent["metadata"]),
+        )
+        return intent
+
+    def cancel_payment_intent(self, intent_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset({"cancellation_reason"}))
+        intent = self.payment_intents.get(intent_id)
+        self._payment_intent_state(intent, "cancel")
+        intent.update(
+            status=PaymentIntentStatus.CANCELED,
+            canceled_at=int(time.time()),
+            cancellation_reason=params.get("cancellation_reason"),
+            amount_capturable=0,
+        )
+        return intent
+
+    def list_payment_intents(self, params: Payload) -> Payload:
+        _check_params(params, frozenset({"limit", "starting_after", "ending_before", "customer"}))
+        filters = {"customer": params["customer"]} if params.get("customer") else None
+        return self._list(Endpoints.PAYMENT_INTENTS, *self.payment_intents.page(params, filters))
+
+    # Refunds
+
+    def create_refund(self, params: Payload) -> Payload:
+        _check_params(params, frozenset({
+            "charge", "payment_intent", "amount", "reason", "metadata", "instructions_email", "currency",
+        }))
+        if params.get("charge"):
+            charge = self.charges.get(params["charge"], param="charge")
+        elif params.get("payment_intent"):
+            intent = self.payment_intents.get(params["payment_intent"], param="payment_intent")
+            if intent["status"] != PaymentIntentStatus.SUCCEEDED:
+                raise MockError(
+                    f"This PaymentIntent ({intent['id']}) does not have a successful charge to refund.",
+                    code="charge_not_refundable", param="payment_intent",
+                )
+            charge = self.charges.get(intent["latest_charge"])
+        else:
+            raise MockError(
+                "One of the following params should be provided for this request: payment_intent or charge.",
+                code="parameter_missing",
+            )
+        if not charge["captured"]:
+            raise MockError(f"Charge {charge['id']} has not been captured.", code="charge_not_refundable", param="charge")
+        reason = params.get("reason")
+        if reason is not None and reason not in RefundReason.ALL:
+            raise MockError(f"Invalid reason: must be one of {', '.join(RefundReason.ALL)}", param="reason")
+        refundable = charge["amount_captured"] - charge["amount_refunded"]
+        if refundable <= 0:
+            raise MockError(f"Charge {charge['id']} has already been refunded.", code="charge_already_refunded")
+        amount = _int(params, "amount") or refundable
+        if amount > refundable:
+            raise MockError(
+                f"Refund amount ({amount}) is greater than unrefunded amount on charge ({refundable})",
+                code="amount_too_large", param="amount",
+            )
+        refund = self.refunds.add({
+            "id": _new_id(ObjectPrefix.REFUND),
+            "object": "refund",
+            "amount": amount,
+            "charge": charge["id"],
+            "created": int(time.time()),
+            "currency": charge["currency"],
+            "metadata": _metadata(params),
+            "payment_intent": charge["payment_intent"],
+            "reason": reason,
+            # Card refunds settle at once; ones needing customer instructions wait for them.
+            "status": RefundStatus.REQUIRES_ACTION if params.get("instructions_email") else RefundStatus.SUCCEEDED,
+        })
+        self._apply_refund(charge, amount)
+        return refund
+
+    @staticmethod
+    def _apply_refund(charge: Payload, amount: int) -> None:
+        charge["amount_refunded"] += amount
+        charge["refunded"] = charge["amount_refunded"] >= charge["amount_captured"]
+
+    def retrieve_refund(self, refund_id: str, params: Payload) -> Payload:
+        return self.refunds.get(refund_id)
+
+    def update_refund(self, refund_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset({"metadata"}))
+        refund = self.refunds.get(refund_id)
+        refund["metadata"] = _metadata(params, refund["metadata"])
+        return refund
+
+    def cancel_refund(self, refund_id: str, params: Payload) -> Payload:
+        _check_params(params, frozenset())
+        refund = self.refunds.get(refund_id)
+        if RefundStatus.CANCELED not in REFUND_TRANSITIONS[refund["status"]]:
+            raise MockError(
+                f"You cannot cancel this refund because it has a status of {refund['status']}. "
+                f"Only refunds with a status of {RefundStatus.REQUIRES_ACTION} or {RefundStatus.PENDING} may be canceled.",
+                code="refund_unexpected_state",
+            )
+        return self.set_refund_status(refund_id, RefundStatus.CANCELED)
+
+    def set_refund_status(self, refund_id: str, status: str) -> Payload:
+        """
+        Move a refund along REFUND_TRANSITIONS, as Stripe's async processing
+        would. Canceled and failed refunds give the amount back to the charge.
+        """
+        with self._lock:
+            refund = self.refunds.get(refund_id)
+            if status not in REFUND_TRANSITIONS[refund["status"]]:
+                raise MockError(
+                    f"Refund {refund_id} cannot move from {refund['status']} to {status}",
+                    code="refund_unexpected_state",
+                )
+            refund["status"] = status
+            if status in (RefundStatus.CANCELED, RefundStatus.FAILED):
+                self._apply_refund(self.charges.get(refund["charge"]), -refund["amount"])
+            return refund
+
+    def list_refunds(self, params: Payload) -> Payload:
+        _check_params(params, frozenset({"limit", "starting_after", "ending_before", "charge", "payment_intent"}))
+        filters = {k: params[k] for k in ("charge", "payment_intent") if params.get(k)}
+        return self._list(Endpoints.REFUNDS, *self.refunds.page(params, filters))
+
+
+class InProcessAdapter(BaseAdapter):
+    """
+    Transport adapter that answers requests from a MockServer in the same
+    process, with no sockets involved:
+
+        session = build_session(InProcessAdapter(MockServer()))
+        client = StripeClient(session=session)
+    """
+
+    def __init__(self, server: Optional[MockServer] = None):
+        super().__init__()
+        self.server = server or default_server()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        parts = urlsplit(request.url)
+        status, content, replayed = self.server.handle(request.method, parts.path, parts.query, request.body, request.headers)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict(response_headers(replayed))
+        response._content = content
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=time.perf_counter() - start)
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def _encode(payload: Payload) -> bytes:
+    return json.dumps(payload).encode()
+
+
+def response_headers(replayed: bool) -> Dict[str, str]:
+    headers = {"Content-Type": "application/json", "Request-Id": _new_id("req_")}
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+    return headers
+
+
+_default_server: Optional[MockServer] = None
+_default_lock = threading.Lock()
+
+
+def default_server() -> MockServer:
+    """Process-wide MockServer, so every client in a test run sees the same objects."""
+    global _default_server
+    with _default_lock:
+        if _default_server is None:
+            _default_server = MockServer()
+        return _default_server
@@ -0,0 +1,308 @@
+import itertools
+import re
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from config.constants import Currency, ObjectPrefix, RefundReason, TestData
+from config.settings import settings
+from src.api_client import StripeClient
+from src.bulk import BulkResult, run_bulk
+from src.routing import ROUTES
+
+# A variant with this value leaves its parameter out of the request.
+OMIT = object()
+
+# Sent to every operation as an extra parameter the API does not know.
+UNKNOWN_PARAM = "not_a_param"
+
+# Parameters exercised per StripeClient create_*/update_* method ("id" is
+# the object in the path). Required ones are also tried missing.
+PARAMS: Dict[str, Tuple[str, ...]] = {
+    "create_payment_intent": ("amount", "currency", "customer", "description", "metadata", UNKNOWN_PARAM),
+    "update_payment_intent": ("id", "amount", "currency", "description", "metadata", UNKNOWN_PARAM),
+    "create_customer": ("email", "name", "phone", "description", "metadata", UNKNOWN_PARAM),
+    "update_customer": ("id", "email", "name", "phone", "metadata", UNKNOWN_PARAM),
+    "create_refund": ("charge", "amount", "reason", "metadata", UNKNOWN_PARAM),
+    "update_refund": ("id", "metadata", UNKNOWN_PARAM),
+    "create_charge": ("amount", "currency", "customer", "description", "metadata", UNKNOWN_PARAM),
+    "update_charge": ("id", "description", "metadata", UNKNOWN_PARAM),
+}
+REQUIRED: Dict[str, Set[str]] = {
+    "create_payment_intent": {"amount", "currency"},
+    "create_refund": {"charge"},
+    "create_charge": {"amount", "currency"},
+}
+# Which seeded object an "id" parameter takes, per operation family.
+_ID_KINDS = {"payment_intent": "payment_intent", "customer": "customer", "refund": "refund", "charge": "charge"}
+
+
+class Variant(NamedTuple):
+    param: str
+    label: str
+    value: Any
+    valid: bool
+
+
+class Case(NamedTuple):
+    operation: str
+    object_id: Optional[str]
+    data: Dict[str, Any]
+    # (param, label) of every variant that differs from the baseline.
+    mutations: Tuple[Tuple[str, str], ...]
+    expect_error: bool
+
+
+Signature = Tuple[str, Optional[int], Optional[str], Optional[str]]
+
+
+def _values(param: str, seeds: Dict[str, str]) -> List[Variant]:
+    """Valid values first (the first one is the baseline), built from config.constants."""
+    if param == "amount":
+        return [
+            Variant(param, "valid", TestData.VALID_AMOUNT, True),
+            Variant(param, "minimum", TestData.MIN_AMOUNT, True),
+            Variant(param, "maximum", TestData.MAX_AMOUNT, True),
+            Variant(param, "negative", TestData.NEGATIVE_AMOUNT, False),
+            Variant(param, "zero", 0, False),
+            Variant(param, "below_minimum", TestData.MIN_AMOUNT - 1, False),
+            Variant(param, "above_maximum", TestData.MAX_AMOUNT + 1, False),
+            Variant(param, "not_a_number", "twenty", False),
+        ]
+    if param == "currency":
+        return ([Variant(param, code, code, True) for code in Currency.ALL]
+                + [Variant(param, "invalid", TestData.INVALID_CURRENCY, False)])
+    if param == "email":
+        return [Variant(param, "valid", TestData.VALID_EMAIL, True),
+                Variant(param, "invalid", TestData.INVALID_EMAIL, False)]
+    if param == "name":
+        return [Variant(param, "valid", TestData.VALID_NAME, True)]
+    if param == "phone":
+        return [Variant(param, "valid", TestData.VALID_PHONE, True)]
+    if param == "description":
+        return [Variant(param, "valid", "negative-testing case", True)]
+    if param == "metadata":
+        return [Variant(param, "valid", {"source": "negative"}, True),
+                Variant(param, "not_an_object", "not_an_object", False)]
+    if param == "reason":
+        return ([Variant(param, reason, reason, True) for reason in RefundReason.ALL]
+                + [Variant(param, "invalid", "not_a_reason", False)])
+    if param in ("customer", "charge"):
+        prefix = ObjectPrefix.CUSTOMER if param == "customer" else ObjectPrefix.CHARGE
+        other = seeds["charge"] if param == "customer" else seeds["customer"]
+        return [Variant(param, "existing", seeds[param], True),
+                Variant(param, "missing", prefix + "missing", False),
+                Variant(param, "wrong_kind", other, False)]
+    if param == UNKNOWN_PARAM:
+        return [Variant(param, "unknown", "x", False)]
+    raise KeyError(f"No values for parameter '{param}'")
+
+
+def matrix(operation: str, seeds: Dict[str, str]) -> List[List[Variant]]:
+    """Every parameter's variants for ``operation``, baseline first, OMIT included."""
+    kind = operation.split("_", 1)[1]
+    domains = []
+    for param in PARAMS[operation]:
+        if param == "id":
+            prefix = getattr(ObjectPrefix, kind.upper())
+            domains.append([Variant("id", "existing", seeds[_ID_KINDS[kind]], True),
+                            Variant("id", "missing", prefix + "missing", False)])
+            continue
+        values = _values(param, seeds)
+        if operation == "create_refund" and param == "amount":
+            # Every refund draws on the one seeded charge: keep them small,
+            # and never leave the amount out (that refunds all of it).
+            domains.append([v for v in values if v.label not in ("valid", "maximum")])
+            continue
+        if param == UNKNOWN_PARAM:
+            # Left out of the baseline; sending it is the mutation.
+            values = [Variant(param, "omitted", OMIT, True)] + values
+        else:
+            values.append(Variant(param, "missing" if param in REQUIRED.get(operation, ()) else "omitted",
+                                  OMIT, param not in REQUIRED.get(operation, ())))
+        domains.append(values)
+    return domains
+
+
+def _case(operation: str, chosen: Sequence[Variant], baseline: Sequence[Variant]) -> Case:
+    data, object_id = {}, None
+    for variant in chosen:
+        if variant.param == "id":
+            object_id = variant.value
+        elif variant.value is not OMIT:
+            data[variant.param] = variant.value
+    mutations = tuple((v.param, v.label) for v, base in zip(chosen, baseline) if v is not base)
+    return Case(operation, object_id, data, mutations, not all(v.valid for v in chosen))
+
+
+def generate(operation: str, domains: List[List[Variant]], max_order: int) -> Iterator[Case]:
+    """
+    The baseline, then every single-parameter mutation of it, then every
+    pair, and so on up to ``max_order`` parameters mutated at once (the
+    whole matrix when that is the parameter count). Lazy: nothing past
+    what the caller pulls is built.
+    """
+    baseline = [values[0] for values in domains]
+    yield _case(operation, baseline, baseline)
+    for order in range(1, min(max_order, len(domains)) + 1):
+        for positions in itertools.combinations(range(len(domains)), order):
+            for replacements in itertools.product(*(domains[p][1:] for p in positions)):
+                chosen = list(baseline)
+                for position, variant in zip(positions, replacements):
+                    chosen[position] = variant
+                yield _case(operation, chosen, baseline)
+
+
+def operations() -> List[str]:
+    """Every StripeClient create_*/update_* endpoint method."""
+    return sorted(name for name in ROUTES
+                  if name.startswith(("create_", "update_")) and callable(getattr(StripeClient, name, None)))
+
+
+def signature(case: Case, result: BulkResult) -> Signature:
+    """(endpoint template, status, error type, error param) of one response."""
+    template = ROUTES[case.operation].template
+    if result.error is not None:
+        return (template, None, type(result.error).__name__, None)
+    response = result.response
+    if response.status_code < 400:
+        return (template, response.status_code, None, None)
+    try:
+        error = response.json().get("error") or {}
+    except ValueError:
+        error = {}
+    param = error.get("param")
+    # metadata[key] and metadata[other] are the same region.
+    return (template, response.status_code, error.get("type"), re.sub(r"\[.*$", "", param) if param else None)
+
+
+class NegativeRun:
+    """What one exploration sent, skipped and found, with the first case per signature."""
+
+    def __init__(self):
+        self.sent = 0
+        self.pruned = 0
+        self.saturated: List[str] = []
+        self.signatures: Dict[Signature, Case] = {}
+        self.counts: Dict[Signature, int] = {}
+        self.server_errors: List[Tuple[Case, Signature]] = []
+        self.accepted_invalid: List[Case] = []
+        self.rejected_valid: List[Tuple[Case, Signature]] = []
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """No 5xx and no exceptions; what the API accepts or rejects is reported, not judged."""
+        return not self.server_errors
+
+    def report(self) -> str:
+        lines = [f"{self.sent} cases in {self.elapsed:.1f}s ({self.sent / max(self.elapsed, 1e-9):.0f}/s), "
+                 f"{len(self.signatures)} signatures, {self.pruned} pruned, saturated: {', '.join(self.saturated) or '-'}"]
+        for sig in sorted(self.signatures, key=lambda s: (s[0], s[1] or 0, s[2] or "", s[3] or "")):
+            template, status, error_type, param = sig
+            example = self.signatures[sig]
+            lines.append(f"{template:<32} {status or '-':>4} {error_type or '-':<22} {param or '-':<12} "
+                         f"x{self.counts[sig]:<5} e.g. {example.operation} {', '.join('='.join(m) for m in example.mutations) or 'baseline'}")
+        for case, sig in self.server_errors:
+            lines.append(f"SERVER ERROR {sig}: {case.operation} {case.object_id or ''} {case.data}")
+        return "\n".join(lines)
+
+
+class NegativeExplorer:
+    """
+    Fires the parameter matrix of every create_*/update_* method at the API
+    concurrently, for at most ``time_budget`` seconds, and keeps one example
+    per (endpoint, status, error type, param) signature.
+
+    Two rules keep it off ground already covered. A single mutation that is
+    rejected with an error naming its own parameter is decisive: the API
+    answers the same for every combination containing it, so those are
+    skipped. And an operation whose last ``patience`` results produced no
+    new signature is saturated and stops generating. Operations are
+    interleaved, so all of them get coverage before any goes deep.
+    """
+
+    def __init__(
+        self,
+        client: StripeClient,
+        time_budget: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        patience: Optional[int] = None,
+        max_order: Optional[int] = None,
+        max_cases: Optional[int] = None,
+    ):
+        self.client = client
+        self.time_budget = settings.NEGATIVE_TIME_BUDGET if time_budget is None else time_budget
+        self.max_workers = max_workers or settings.NEGATIVE_MAX_WORKERS
+        self.patience = patience or settings.NEGATIVE_PATIENCE
+        self.max_order = max_order or settings.NEGATIVE_MAX_ORDER
+        self.max_cases = max_cases
+        self._decisive: Set[Tuple[str, str, str]] = set()
+        self._stale: Dict[str, int] = {}
+
+    def seed(self) -> Dict[str, str]:
+        """Real objects for the "existing" ids; a valid create failing here is an error in itself."""
+        customer = self.client.create_customer(email=TestData.VALID_EMAIL)
+        charge = self.client.create_charge(amount=TestData.MAX_AMOUNT, currency=TestData.VALID_CURRENCY,
+                                           customer=customer.id)
+        refund = self.client.create_refund(charge=charge.id, amount=TestData.MIN_AMOUNT)
+        payment_intent = self.client.create_payment_intent(amount=TestData.VALID_AMOUNT,
+                                                           currency=TestData.VALID_CURRENCY)
+        for response in (customer, charge, refund, payment_intent):
+            response.raise_for_status()
+        return {"customer": customer.id, "charge": charge.id, "refund": refund.id, "payment_intent": payment_intent.id}
+
+    def _cases(self, names: Sequence[str], seeds: Dict[str, str], run: NegativeRun, deadline: float) -> Iterator[Case]:
+        live = {name: generate(name, matrix(name, seeds), self.max_order) for name in names}
+        while live:
+            for name in list(live):
+                if time.monotonic() >= deadline or (self.max_cases is not None and run.sent >= self.max_cases):
+                    return
+                if self._stale.get(name, 0) >= self.patience:
+                    run.saturated.append(name)
+                    del live[name]
+                    continue
+                for case in live[name]:
+                    if len(case.mutations) > 1 and any((name,) + m in self._decisive for m in case.mutations):
+                        run.pruned += 1
+                        continue
+                    run.sent += 1
+                    yield case
+                    break
+                else:
+                    del live[name]
+
+    def _send(self, case: Case):
+        return self.client._call(case.operation, case.object_id, data=case.data or None)
+
+    def _record(self, run: NegativeRun, case: Case, result: BulkResult) -> None:
+        sig = signature(case, result)
+        run.counts[sig] = run.counts.get(sig, 0) + 1
+        if sig in run.signatures:
+            self._stale[case.operation] = self._stale.get(case.operation, 0) + 1
+        else:
+            run.signatures[sig] = case
+            self._stale[case.operation] = 0
+        status = sig[1]
+        if status is None or status >= 500:
+            run.server_errors.append((case, sig))
+        elif status < 400 and case.expect_error:
+            run.accepted_invalid.append(case)
+        elif status >= 400 and not case.expect_error:
+            run.rejected_valid.append((case, sig))
+        if status is not None and 400 <= status < 500 and len(case.mutations) == 1:
+            param, label = case.mutations[0]
+            if sig[3] == param or (param == "id" and status == 404):
+                self._decisive.add((case.operation, param, label))
+
+    def run(self, names: Optional[Sequence[str]] = None) -> NegativeRun:
+        """Explore ``names`` (default: every create_*/update_* method) until the budget runs out."""
+        run = NegativeRun()
+        self._decisive.clear()
+        self._stale.clear()
+        start = time.monotonic()
+        seeds = self.seed()
+        cases = self._cases(names or operations(), seeds, run, start + self.time_budget)
+        for result in run_bulk(self._send, ({"case": case} for case in cases), self.max_workers, ordered=False):
+            self._record(run, result.payload["case"], result)
+        run.elapsed = time.monotonic() - start
+        return run
@@ -0,0 +1,66 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import requests
+
+LIST_CURSOR = "starting_after"
+SEARCH_CURSOR = "page"
+
+
+def _next_params(params: Dict[str, Any], page: Dict[str, Any], cursor: str) -> Optional[Dict[str, Any]]:
+    if not page.get("has_more") or not page.get("data"):
+        return None
+    if cursor == SEARCH_CURSOR:
+        token = page.get("next_page")
+        if not token:
+            return None
+        return {**params, SEARCH_CURSOR: token}
+    return {**params, LIST_CURSOR: page["data"][-1]["id"]}
+
+
+def _fetch(fetch_page: Callable[..., requests.Response], params: Dict[str, Any]) -> Dict[str, Any]:
+    response = fetch_page(**params)
+    response.raise_for_status()
+    return response.json()
+
+
+def auto_paging_iter(
+    fetch_page: Callable[..., requests.Response],
+    params: Optional[Dict[str, Any]] = None,
+    cursor: str = LIST_CURSOR,
+    prefetch: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every object of a list or search endpoint, one page at a time.
+
+    ``fetch_page`` is called with ``params`` plus the cursor for the next page
+    (``starting_after`` for lists, ``page`` for search). With ``prefetch`` the
+    next page is requested in the background while the current one is being
+    consumed, so at most two pages are held at once. Breaking out of the loop
+    stops further fetching.
+    """
+    params = dict(params or {})
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stripe-prefetch") if prefetch else None
+    pending: Optional[Future] = None
+    try:
+        page = _fetch(fetch_page, params)
+        while True:
+            next_params = _next_params(params, page, cursor)
+            if next_params is not None and executor is not None:
+                pending = executor.submit(_fetch, fetch_page, next_params)
+
+            for item in page["data"]:
+                yield item
+
+            if next_params is None:
+                return
+            if pending is not None:
+                page, pending = pending.result(), None
+            else:
+                page = _fetch(fetch_page, next_params)
+            params = next_params
+    finally:
+        if pending is not None:
+            pending.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
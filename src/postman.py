@@ -0,0 +1,336 @@
+import json
+import re
+import time
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from config.settings import settings
+from src.workflow import FlowRun, Workflow, WorkflowRunner
+
+_VARIABLE = re.compile(r"\{\{([\w.-]+)\}\}")
+
+# The pm.* statements the collection's test scripts use. Anything else is
+# reported as a failed check rather than silently ignored.
+_TEST = re.compile(r'pm\.test\(\s*"([^"]*)"\s*,')
+_STATUS = re.compile(r"pm\.response\.to\.have\.status\((\d+)\)")
+_EXPECT = re.compile(
+    r"pm\.expect\((?:data|pm\.response\.json\(\))\.([\w.]+)\)\.to\."
+    r"(?:(include|eql)\((\"[^\"]*\"|-?\d+(?:\.\d+)?|pm\.environment\.get\(\"([\w.-]+)\"\))\)|be\.(true|false))")
+_SET = re.compile(r'pm\.environment\.set\(\s*"([\w.-]+)"\s*,\s*pm\.response\.json\(\)\.([\w.]+)\s*\)')
+_PARSED_DATA = re.compile(r"(?:const|let|var)\s+data\s*=\s*pm\.response\.json\(\)")
+
+
+class Check(NamedTuple):
+    """One assertion of a pm.test block: kind is status, include, eql, true or false."""
+
+    test: str
+    kind: str
+    field: Optional[str] = None
+    expected: Any = None
+    variable: Optional[str] = None  # expected is pm.environment.get(variable)
+
+
+class PostmanItem:
+    """A request of the collection with its test checks and the variables it sets."""
+
+    __slots__ = ("name", "folder", "method", "url", "headers", "token", "body", "checks", "captures", "uses")
+
+    def __init__(self, name: str, folder: str, raw: Mapping[str, Any]):
+        request = raw["request"]
+        self.name = name
+        self.folder = folder
+        self.method = request.get("method", "GET").upper()
+        url = request.get("url", "")
+        self.url: str = url.get("raw", "") if isinstance(url, dict) else url
+        self.headers = [(h["key"], h["value"]) for h in request.get("header", []) if not h.get("disabled")]
+        self.token = _bearer_token(request.get("auth"))
+        self.body = _form_pairs(request.get("body"), name)
+        script = "\n".join(
+            line.rstrip("\r")
+            for event in raw.get("event", []) if event.get("listen") == "test"
+            for line in event["script"].get("exec", []))
+        self.checks, self.captures = parse_test_script(script)
+        templates = [self.url, self.token or ""] + [value for _, value in self.headers + self.body]
+        self.uses: Set[str] = {name for text in templates for name in _VARIABLE.findall(text)}
+        self.uses.update(check.variable for check in self.checks if check.variable)
+
+    @property
+    def key(self) -> str:
+        return f"{self.folder}/{self.name}"
+
+
+def _bearer_token(auth: Optional[Mapping[str, Any]]) -> Optional[str]:
+    if not auth or auth.get("type") == "noauth":
+        return None
+    if auth.get("type") != "bearer":
+        raise ValueError(f"Unsupported auth type '{auth.get('type')}'. Only bearer auth is supported")
+    return next((entry["value"] for entry in auth.get("bearer", []) if entry["key"] == "token"), None)
+
+
+def _form_pairs(body: Optional[Mapping[str, Any]], name: str) -> List[Tuple[str, str]]:
+    if not body:
+        return []
+    if body.get("mode") != "urlencoded":
+        raise ValueError(f"'{name}' has a {body.get('mode')} body; only urlencoded bodies are supported")
+    return [(field["key"], field.get("value", "")) for field in body.get("urlencoded", []) if not field.get("disabled")]
+
+
+def parse_test_script(script: str) -> Tuple[List[Check], Dict[str, str]]:
+    """
+    Translate a Postman test script into checks and captured variables
+    (variable -> response field). Supports status checks, pm.expect on a
+    response field with include/eql/be.true/be.false, and
+    pm.environment.set from a response field.
+    """
+    captures: Dict[str, str] = {}
+    tests = [(match.start(), match.group(1)) for match in _TEST.finditer(script)]
+
+    def test_at(offset: int) -> str:
+        names = [name for start, name in tests if start < offset]
+        return names[-1] if names else "(no test)"
+
+    found: List[Tuple[int, Check]] = []
+    for match in _STATUS.finditer(script):
+        found.append((match.start(), Check(test_at(match.start()), "status", expected=int(match.group(1)))))
+    for match in _EXPECT.finditer(script):
+        field, kind, operand, variable, boolean = match.groups()
+        if boolean:
+            check = Check(test_at(match.start()), boolean, field)
+        elif variable:
+            check = Check(test_at(match.start()), kind, field, variable=variable)
+        else:
+            check = Check(test_at(match.start()), kind, field, json.loads(operand))
+        found.append((match.start(), check))
+    for match in _SET.finditer(script):
+        captures[match.group(1)] = match.group(2)
+
+    # Blank out what was understood, keeping offsets, and flag any pm.* left.
+    rest = script
+    for pattern in (_STATUS, _EXPECT, _SET, _TEST, _PARSED_DATA):
+        rest = pattern.sub(lambda match: " " * len(match.group()), rest)
+    offset = 0
+    for line, original in zip(rest.split("\n"), script.split("\n")):
+        if "pm." in line:
+            start = offset + line.index("pm.")
+            found.append((start, Check(test_at(start), "unsupported", expected=original.strip())))
+        offset += len(line) + 1
+    return [check for _, check in sorted(found, key=lambda pair: pair[0])], captures
+
+
+class PostmanCollection:
+    """The requests of a v2.1 collection in run order, folder paths joined with "/"."""
+
+    def __init__(self, data: Mapping[str, Any]):
+        self.name: str = data.get("info", {}).get("name", "collection")
+        self.items: List[PostmanItem] = []
+        self._add(data.get("item", []), self.name)
+
+    def _add(self, entries: List[Mapping[str, Any]], folder: str) -> None:
+        for entry in entries:
+            if "item" in entry:
+                self._add(entry["item"], entry["name"] if folder == self.name else f"{folder}/{entry['name']}")
+            else:
+                self.items.append(PostmanItem(entry["name"], folder, entry))
+
+    @property
+    def folders(self) -> List[str]:
+        return list(dict.fromkeys(item.folder for item in self.items))
+
+
+def load_collection(path: Optional[str] = None) -> PostmanCollection:
+    with open(path or settings.POSTMAN_COLLECTION, encoding="utf-8") as f:
+        return PostmanCollection(json.load(f))
+
+
+def load_environment(path: Optional[str] = None) -> Dict[str, str]:
+    with open(path or settings.POSTMAN_ENVIRONMENT, encoding="utf-8") as f:
+        data = json.load(f)
+    return {value["key"]: value.get("value", "") for value in data.get("values", []) if value.get("enabled", True)}
+
+
+def substitute(text: str, lookup: Callable[[str], Optional[str]]) -> str:
+    """Replace {{name}} with lookup(name); unknown variables stay as written, like in Postman."""
+    def replace(match: "re.Match[str]") -> str:
+        value = lookup(match.group(1))
+        return match.group(0) if value is None else value
+    return _VARIABLE.sub(replace, text)
+
+
+def _field(data: Any, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            raise KeyError(path)
+        data = data[part]
+    return data
+
+
+class ItemResult:
+    """What one request returned and how its checks went."""
+
+    __slots__ = ("item", "url", "status", "elapsed", "failures", "passed", "variables")
+
+    def __init__(self, item: PostmanItem, url: str, status: int, elapsed: float):
+        self.item = item
+        self.url = url
+        # Not status_code: an expected 4xx must not count as a failed step.
+        self.status = status
+        self.elapsed = elapsed
+        self.failures: List[Tuple[str, str]] = []  # (test name, message)
+        self.passed: List[str] = []
+        self.variables: Dict[str, Any] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+
+class CollectionRun:
+    """Outcome of running a collection: per-item results in collection order plus timings."""
+
+    def __init__(self, collection: PostmanCollection, flow: FlowRun, stats: Dict[str, Dict[str, float]]):
+        self.collection = collection
+        self.results: Dict[str, ItemResult] = {
+            item.key: flow.results[item.key] for item in collection.items if item.key in flow.results}
+        self.errors: Dict[str, BaseException] = dict(flow.errors)
+        self.skipped: Set[str] = set(flow.skipped)
+        self.timings = dict(flow.timings)
+        self.elapsed = flow.elapsed
+        self.stats = stats
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and not self.skipped and all(result.ok for result in self.results.values())
+
+    def failures(self) -> List[str]:
+        lines = [f"{key}: {error!r}" for key, error in self.errors.items()]
+        lines += [f"{key}: skipped, a request it depends on failed" for key in sorted(self.skipped)]
+        for key, result in self.results.items():
+            lines += [f"{key}: {test}: {message}" for test, message in result.failures]
+        return lines
+
+    def report(self) -> str:
+        lines = []
+        for item in self.collection.items:
+            result = self.results.get(item.key)
+            if result is None:
+                lines.append(f"ERROR {item.method:<6} {item.key}")
+                continue
+            status = "PASS" if result.ok else "FAIL"
+            lines.append(f"{status}  {item.method:<6} {item.key:<55} {result.status} {result.elapsed * 1000:7.1f}ms")
+        lines.append(f"{len(self.collection.items)} requests in {self.elapsed or 0.0:.3f}s")
+        return "\n".join(lines)
+
+
+class PostmanRunner:
+    """
+    Runs a Postman collection through a StripeClient's session, so requests
+    use the same transport as the tests (pooled HTTP, in-process mock,
+    cassette or shards):
+
+        run = PostmanRunner(client).run(load_collection())
+        assert run.ok, "\\n".join(run.failures())
+
+    Requests of a folder run in order, as in Postman. Folders run
+    concurrently, except that a request reading a variable waits for the
+    request that sets it (the last one before it in the collection), and
+    reads the value that request captured. {{STRIPE_MOCK_URL}} is the
+    client's base_url; other variables come from ``environment``
+    (default: the environment file) and ``variables``.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        environment: Optional[Mapping[str, str]] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.client = client
+        self.environment = dict(load_environment() if environment is None else environment)
+        self.runner = WorkflowRunner(client, max_workers=max_workers)
+
+    def workflow(self, collection: PostmanCollection, variables: Mapping[str, str]) -> Workflow:
+        flow = Workflow(collection.name)
+        last_in_folder: Dict[str, str] = {}
+        producers: Dict[str, str] = {}
+        for item in collection.items:
+            if item.key in flow.steps:
+                raise ValueError(f"Duplicate request name '{item.key}'")
+            sources = {name: producers[name] for name in item.uses if name in producers}
+            needs = set(sources.values())
+            if item.folder in last_in_folder:
+                needs.add(last_in_folder[item.folder])
+            flow.step(item.key, self._step(item, sources, variables), needs=sorted(needs))
+            last_in_folder[item.folder] = item.key
+            for name in item.captures:
+                producers[name] = item.key
+        return flow
+
+    def _step(self, item: PostmanItem, sources: Dict[str, str], variables: Mapping[str, str]):
+        def call(client: Any, ctx: Any) -> ItemResult:
+            def lookup(name: str) -> Optional[str]:
+                if name in sources:
+                    captured = ctx[sources[name]].variables
+                    if name in captured:
+                        return str(captured[name])
+                return variables.get(name)
+            return self.execute(item, lookup)
+        return call
+
+    def execute(self, item: PostmanItem, lookup: Callable[[str], Optional[str]]) -> ItemResult:
+        url = substitute(item.url, lookup)
+        headers = {key: substitute(value, lookup) for key, value in item.headers}
+        if item.token is not None:
+            headers["Authorization"] = f"Bearer {substitute(item.token, lookup)}"
+        data = None
+        if item.body:
+            headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+            data = urlencode([(key, substitute(value, lookup)) for key, value in item.body])
+        start = time.perf_counter()
+        response = self.client.session.request(
+            item.method, url, headers=headers, data=data,
+            timeout=self.client.timeout, verify=self.client.verify_ssl)
+        result = ItemResult(item, url, response.status_code, time.perf_counter() - start)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        for check in item.checks:
+            message = self._evaluate(check, response.status_code, body, lookup)
+            if message is None:
+                result.passed.append(check.test)
+            else:
+                result.failures.append((check.test, message))
+        for name, path in item.captures.items():
+            try:
+                result.variables[name] = _field(body, path)
+            except KeyError:
+                result.failures.append(("(capture)", f"response has no '{path}' to set {{{{{name}}}}}"))
+        return result
+
+    def _evaluate(
+        self, check: Check, status_code: int, body: Any, lookup: Callable[[str], Optional[str]]
+    ) -> Optional[str]:
+        """None if the check passes, else why it failed."""
+        if check.kind == "unsupported":
+            return f"unsupported test script: {check.expected}"
+        if check.kind == "status":
+            return None if status_code == check.expected else f"status is {status_code}, expected {check.expected}"
+        try:
+            actual = _field(body, check.field)
+        except KeyError:
+            return f"response has no '{check.field}'"
+        expected = lookup(check.variable) if check.variable else check.expected
+        if check.kind == "true" or check.kind == "false":
+            passed = actual is (check.kind == "true")
+        elif check.kind == "include":
+            passed = isinstance(actual, list) and expected in actual or (
+                isinstance(actual, str) and isinstance(expected, str) and expected in actual)
+        else:
+            passed = actual == expected
+        return None if passed else f"{check.field} is {actual!r}, expected {check.kind} {expected!r}"
+
+    def run(self, collection: PostmanCollection, variables: Optional[Mapping[str, str]] = None) -> CollectionRun:
+        scope = {**self.environment, "STRIPE_MOCK_URL": self.client.base_url, **(variables or {})}
+        flow = self.workflow(collection, scope)
+        run, = self.runner.run(flow)
+        return CollectionRun(collection, run, self.runner.stats())
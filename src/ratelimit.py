@@ -0,0 +1,182 @@
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from config.settings import settings
+from src.routing import endpoint_family
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at ``rate`` tokens/second up to
+    ``capacity``.
+
+    ``reserve()`` takes a token immediately and returns how long the caller
+    must wait before using it; the balance may go negative, which queues
+    callers fairly without holding the lock while they sleep.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in a 16-byte file guarded by flock, so
+    every process on the host that opens the same ``path`` (e.g. all
+    pytest-xdist workers) draws from one budget.
+    """
+
+    _STATE = struct.Struct("dd")  # tokens, last refill (epoch seconds)
+
+    def __init__(self, path: str, rate: float, capacity: Optional[float] = None):
+        if fcntl is None:
+            raise RuntimeError("SharedTokenBucket needs fcntl (POSIX only)")
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                raw = os.pread(self._fd, self._STATE.size, 0)
+                if len(raw) == self._STATE.size:
+                    balance, updated = self._STATE.unpack(raw)
+                    # Clamp so a clock step backwards cannot drain the bucket.
+                    balance = min(self.capacity, balance + max(now - updated, 0.0) * self.rate)
+                else:
+                    balance = self.capacity
+                balance -= tokens
+                os.pwrite(self._fd, self._STATE.pack(balance, now), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return -balance / self.rate if balance < 0 else 0.0
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def parse_family_rates(spec: str) -> Dict[str, float]:
+    """Parse "charges=25,refunds=10" into requests/second per family."""
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        family, _, rate = part.partition("=")
+        rates[family.strip()] = float(rate)
+    return rates
+
+
+class RateLimiter:
+    """
+    Client-side limiter with an optional global bucket plus one bucket per
+    endpoint family (payment_intents, customers, refunds, charges). A request
+    waits for a token from its family bucket and from the global bucket.
+    ``burst`` is the capacity of every bucket and defaults to one second's
+    worth of its rate.
+
+    With ``shared=True`` the buckets are SharedTokenBucket files in
+    ``state_dir``. Every process limiting the same ``scope`` (the base URL)
+    then shares one budget.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+        family_rates: Optional[Dict[str, float]] = None,
+        shared: bool = False,
+        state_dir: Optional[str] = None,
+        scope: str = "",
+    ):
+        self.shared = shared
+        self._state_dir = state_dir or os.path.join(tempfile.gettempdir(), "stripe-mock-ratelimit")
+        self._scope = hashlib.sha1(scope.encode()).hexdigest()[:12]
+        if shared:
+            os.makedirs(self._state_dir, exist_ok=True)
+        self._global = self._bucket("global", rate, burst) if rate > 0 else None
+        self._families = {
+            family: self._bucket(family, family_rate, burst)
+            for family, family_rate in (family_rates or {}).items() if family_rate > 0
+        }
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.waited = 0.0
+
+    @classmethod
+    def from_settings(cls, scope: str) -> Optional["RateLimiter"]:
+        family_rates = parse_family_rates(settings.RATE_LIMIT_FAMILIES)
+        if settings.RATE_LIMIT_RPS <= 0 and not family_rates:
+            return None
+        shared = settings.RATE_LIMIT_SHARED
+        return cls(
+            rate=settings.RATE_LIMIT_RPS,
+            burst=settings.RATE_LIMIT_BURST or None,
+            family_rates=family_rates,
+            shared=bool(os.getenv("PYTEST_XDIST_WORKER")) if shared == "auto" else shared == "true",
+            state_dir=settings.RATE_LIMIT_DIR or None,
+            scope=scope,
+        )
+
+    def _bucket(self, name: str, rate: float, burst: Optional[float]):
+        if self.shared:
+            return SharedTokenBucket(os.path.join(self._state_dir, f"{self._scope}-{name}.bucket"), rate, burst)
+        return TokenBucket(rate, burst)
+
+    def reserve(self, endpoint: str) -> float:
+        """Take the tokens for one request to ``endpoint`` and return the wait in seconds."""
+        wait = 0.0
+        family = self._families.get(endpoint_family(endpoint))
+        if family is not None:
+            wait = family.reserve()
+        if self._global is not None:
+            wait = max(wait, self._global.reserve())
+        if wait > 0:
+            with self._stats_lock:
+                self.waits += 1
+                self.waited += wait
+        return wait
+
+    def acquire(self, endpoint: str) -> float:
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {"waits": self.waits, "waited_s": self.waited}
+
+    def close(self) -> None:
+        for bucket in [self._global, *self._families.values()]:
+            if isinstance(bucket, SharedTokenBucket):
+                bucket.close()
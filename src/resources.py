@@ -0,0 +1,244 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from src.streaming import ListStream
+
+
+class StripeObject:
+    """
+    A Stripe API object backed by an HTTP response.
+
+    The body is decoded lazily on first access and memoized, so helpers and
+    tests can call ``json()`` (or index the object) as often as they like
+    without re-parsing. The response attributes the suite relies on
+    (status_code, headers, text, ok, raise_for_status) are passed through, so
+    a StripeObject can be used anywhere a requests.Response was before.
+    """
+
+    __slots__ = ("_response", "_data")
+
+    OBJECT_NAME: Optional[str] = None
+
+    def __init__(self, response: Any = None, data: Optional[Dict[str, Any]] = None):
+        self._response = response
+        self._data = data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StripeObject":
+        return cls(data=data)
+
+    # Response passthrough
+
+    @property
+    def response(self) -> Any:
+        return self._response
+
+    @property
+    def status_code(self) -> Optional[int]:
+        return self._response.status_code if self._response is not None else None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self._response.headers if self._response is not None else {}
+
+    @property
+    def content(self) -> bytes:
+        if self._response is None:
+            return json.dumps(self._data).encode("utf-8")
+        return self._response.content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self._response is None or self._response.status_code < 400
+
+    def raise_for_status(self) -> None:
+        if self._response is not None:
+            self._response.raise_for_status()
+
+    # Body access
+
+    def json(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = json.loads(self._response.content)
+        return self._data
+
+    @property
+    def error(self) -> Optional[Dict[str, Any]]:
+        return self.json().get("error")
+
+    def __getitem__(self, key: str) -> Any:
+        return self.json()[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.json()
+
+    def __bool__(self) -> bool:
+        # Like requests.Response: falsy for 4xx/5xx, even when the body is empty.
+        return self.ok
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.json().get(key, default)
+
+    def keys(self):
+        return self.json().keys()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names that are not slots/properties: expose body fields.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.json()[name]
+        except (KeyError, TypeError, ValueError):
+            raise AttributeError(f"{type(self).__name__} has no field '{name}'") from None
+
+    def __repr__(self) -> str:
+        if self._data is None:
+            return f"<{type(self).__name__} status={self.status_code} (unparsed)>"
+        return f"<{type(self).__name__} id={self._data.get('id')!r} status={self.status_code}>"
+
+
+class PaymentIntent(StripeObject):
+    __slots__ = ()
+    OBJECT_NAME = "payment_intent"
+
+
+class Customer(StripeObject):
+    __slots__ = ()
+    OBJECT_NAME = "customer"
+
+
+class Charge(StripeObject):
+    __slots__ = ()
+    OBJECT_NAME = "charge"
+
+
+class Refund(StripeObject):
+    __slots__ = ()
+    OBJECT_NAME = "refund"
+
+
+OBJECT_CLASSES: Dict[str, Type[StripeObject]] = {
+    cls.OBJECT_NAME: cls for cls in (PaymentIntent, Customer, Charge, Refund)
+}
+
+
+def class_for(object_name: Optional[str]) -> Type[StripeObject]:
+    return OBJECT_CLASSES.get(object_name, StripeObject)  # type: ignore[arg-type]
+
+
+class ListObject(StripeObject):
+    """
+    A list or search_result page. ``data`` is the raw list of dicts; iterating
+    the page yields typed objects built on demand, one at a time.
+    """
+
+    __slots__ = ()
+    OBJECT_NAME = "list"
+
+    @property
+    def data(self) -> List[Dict[str, Any]]:
+        return self.json().get("data", [])
+
+    @property
+    def has_more(self) -> bool:
+        return bool(self.json().get("has_more"))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[StripeObject]:
+        for item in self.data:
+            yield class_for(item.get("object")).from_dict(item)
+
+
+class StreamingList(ListObject):
+    """
+    A list or search_result page whose body is decoded while it downloads.
+
+    Iterating yields typed objects one at a time as each one arrives (see
+    ListStream), so item assertions start before the page has finished and
+    the full ``data`` array is never held. A page can be iterated once;
+    ``has_more``, ``url`` and ``next_page`` are available after that. Calling
+    ``json()`` or ``data`` before iterating reads the rest of the body into
+    memory like a plain ListObject.
+    """
+
+    __slots__ = ("_stream", "_started")
+
+    def __init__(self, response: Any = None, data: Optional[Dict[str, Any]] = None, chunk_size: int = 16384):
+        super().__init__(response, data)
+        self._stream = ListStream(response.iter_content(chunk_size)) if data is None and response is not None else None
+        self._started = False
+
+    def json(self) -> Dict[str, Any]:
+        if self._data is None:
+            stream = self._stream
+            if stream is None or self._started:
+                raise RuntimeError("StreamingList was already iterated; its body is not kept")
+            self._started = True
+            items = list(stream)
+            self._data = {**stream.meta, "data": items}
+            self._close()
+        return self._data
+
+    @property
+    def streaming(self) -> bool:
+        """True until the body has been iterated or read into memory."""
+        return self._data is None and self._stream is not None and not self._started
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """Top-level fields other than ``data``, complete once iteration has finished."""
+        if self._data is not None:
+            return {key: value for key, value in self._data.items() if key != "data"}
+        return self._stream.meta if self._stream is not None else {}
+
+    @property
+    def has_more(self) -> bool:
+        return bool(self.meta.get("has_more"))
+
+    @property
+    def has_data(self) -> bool:
+        """Whether the body had a ``data`` array (known once iteration has finished)."""
+        if self._data is not None:
+            return isinstance(self._data.get("data"), list)
+        return self._stream is not None and self._stream.has_data
+
+    def __getattr__(self, name: str) -> Any:
+        if self._data is None and self._stream is not None and self._stream.done:
+            try:
+                return self._stream.meta[name]
+            except KeyError:
+                raise AttributeError(f"{type(self).__name__} has no field '{name}'") from None
+        return super().__getattr__(name)
+
+    def __len__(self) -> int:
+        if self.streaming:
+            # TypeError lets list(page) fall back to plain iteration instead
+            # of reading the whole body up front to size the list.
+            raise TypeError("length of a StreamingList is unknown until its body has been read; call json() first")
+        return super().__len__()
+
+    def __iter__(self) -> Iterator[StripeObject]:
+        if self._data is not None:
+            yield from super().__iter__()
+            return
+        if self._stream is None or self._started:
+            raise RuntimeError("StreamingList can only be iterated once")
+        self._started = True
+        try:
+            for item in self._stream:
+                yield class_for(item.get("object")).from_dict(item)
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+        if self._response is not None:
+            self._response.close()
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} status={self.status_code} streamed={self._data is None}>"
@@ -0,0 +1,168 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, FrozenSet, Mapping, Optional
+
+from config.constants import StatusCodes
+from config.settings import settings
+from src.routing import resolve_template
+
+RETRYABLE_STATUSES: FrozenSet[int] = frozenset({
+    StatusCodes.TOO_MANY_REQUESTS,
+    StatusCodes.BAD_GATEWAY,
+    StatusCodes.SERVICE_UNAVAILABLE,
+    StatusCodes.GATEWAY_TIMEOUT,
+})
+
+IDEMPOTENT_METHODS: FrozenSet[str] = frozenset({"GET", "HEAD", "OPTIONS", "DELETE"})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """Caps the number of retries across every request sharing this budget."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return max(self.total - self.spent, 0)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.spent >= self.total:
+                return False
+            self.spent += 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed attempt is retried and how long to wait first.
+
+    Retries happen on RETRYABLE_STATUSES (or whatever Stripe-Should-Retry
+    says) and on connection errors and timeouts. An error is only retried when
+    the request is idempotent: a safe method, or a POST carrying an
+    Idempotency-Key, since the server may have processed a request whose
+    connection dropped before the response came back. A server Retry-After wins over the
+    computed delay; otherwise the delay uses decorrelated jitter
+    (min(max_delay, uniform(base_delay, 3 * previous_delay))). Every retry
+    spends one unit of the shared RetryBudget.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 0.1,
+        max_delay: float = 5.0,
+        max_retry_after: float = 30.0,
+        budget: Optional[RetryBudget] = None,
+        statuses: FrozenSet[int] = RETRYABLE_STATUSES,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget or RetryBudget(settings.RETRY_BUDGET)
+        self.statuses = statuses
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._retries_by_reason: Dict[str, int] = {}
+        self._retries_by_endpoint: Dict[str, int] = {}
+        self._budget_exhausted = 0
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            max_retries=settings.RETRY_MAX_RETRIES,
+            base_delay=settings.RETRY_BASE_DELAY,
+            max_delay=settings.RETRY_MAX_DELAY,
+            max_retry_after=settings.RETRY_AFTER_MAX,
+            budget=RetryBudget(settings.RETRY_BUDGET),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_retries > 0
+
+    def _retryable_response(self, response: Any) -> bool:
+        should_retry = response.headers.get("Stripe-Should-Retry")
+        if should_retry is not None:
+            return should_retry == "true"
+        return response.status_code in self.statuses
+
+    def next_delay(
+        self,
+        attempt: int,
+        previous_delay: float,
+        method: str,
+        headers: Mapping[str, str],
+        endpoint: str,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+        error_kind: Optional[str] = None,
+    ) -> Optional[float]:
+        """
+        Delay in seconds before retry number ``attempt + 1``, or None to stop
+        and surface the current response/error.
+
+        ``error_kind`` is the client's classification of ``error``:
+        "connection", "timeout", or None for errors that are never retried.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if error is not None:
+            if error_kind is None:
+                return None
+            if method not in IDEMPOTENT_METHODS and "Idempotency-Key" not in headers:
+                return None
+            reason = type(error).__name__
+        else:
+            if not self._retryable_response(response):
+                return None
+            reason = str(response.status_code)
+
+        if not self.budget.try_spend():
+            with self._lock:
+                self._budget_exhausted += 1
+            return None
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            delay = min(retry_after, self.max_retry_after)
+        else:
+            upper = (previous_delay or self.base_delay) * 3
+            delay = min(self.max_delay, self._rng.uniform(self.base_delay, upper))
+
+        with self._lock:
+            self._retries_by_reason[reason] = self._retries_by_reason.get(reason, 0) + 1
+            key = f"{method} {resolve_template(endpoint)}"
+            self._retries_by_endpoint[key] = self._retries_by_endpoint.get(key, 0) + 1
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "retries": sum(self._retries_by_reason.values()),
+                "by_reason": dict(self._retries_by_reason),
+                "by_endpoint": dict(self._retries_by_endpoint),
+                "budget_exhausted": self._budget_exhausted,
+                "budget_remaining": self.budget.remaining,
+            }
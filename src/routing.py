@@ -0,0 +1,109 @@
+import re
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
+
+from config.constants import Endpoints
+
+
+def _templates() -> List[str]:
+    return [value for name, value in vars(Endpoints).items() if not name.startswith("_") and isinstance(value, str)]
+
+
+_LITERALS: FrozenSet[str] = frozenset(t for t in _templates() if "{" not in t)
+_PATTERNS: List[Tuple[Pattern[str], str]] = [
+    (re.compile("^" + re.escape(t).replace(r"\{id\}", "[^/]+") + "$"), t)
+    for t in _templates() if "{" in t
+]
+
+
+def resolve_template(path: str) -> str:
+    """
+    Map a request path back to its Endpoints template, e.g.
+    "/v1/customers/cus_123" -> "/v1/customers/{id}". Literal templates win
+    over parameterised ones ("/v1/customers/search" is not a customer id).
+    Paths that match no template are returned unchanged.
+    """
+    path = path.split("?", 1)[0]
+    if path in _LITERALS:
+        return path
+    for pattern, template in _PATTERNS:
+        if pattern.match(path):
+            return template
+    return path
+
+
+def endpoint_family(path: str) -> str:
+    """"/v1/charges/ch_1/capture" -> "charges"."""
+    parts = path.split("?", 1)[0].strip("/").split("/")
+    return parts[1] if len(parts) > 1 else parts[0]
+
+
+def object_path(path: str) -> Optional[str]:
+    """
+    Path of the object a request addresses, e.g. "/v1/charges/ch_1/capture"
+    -> "/v1/charges/ch_1". None for collection, search and unknown paths.
+    """
+    template = resolve_template(path)
+    if "{id}" not in template:
+        return None
+    return "/".join(path.split("?", 1)[0].split("/")[:4])
+
+
+class Route:
+    """
+    One client operation: its HTTP method and Endpoints template, split
+    around "{id}" once so building a path is string concatenation.
+    """
+
+    __slots__ = ("method", "template", "head", "tail")
+
+    def __init__(self, method: str, template: str):
+        self.method = method
+        self.template = template
+        self.head, _, self.tail = template.partition("{id}")
+
+
+class BoundRoute:
+    """A Route with the client's base_url folded into its URL prefix."""
+
+    __slots__ = ("method", "template", "head", "tail", "url_head")
+
+    def __init__(self, route: Route, base_url: str):
+        self.method = route.method
+        self.template = route.template
+        self.head = route.head
+        self.tail = route.tail
+        self.url_head = base_url + route.head
+
+
+# Every endpoint method of BaseStripeClient, by method name.
+ROUTES: Dict[str, Route] = {
+    "create_payment_intent": Route("POST", Endpoints.PAYMENT_INTENTS),
+    "retrieve_payment_intent": Route("GET", Endpoints.PAYMENT_INTENT),
+    "update_payment_intent": Route("POST", Endpoints.PAYMENT_INTENT),
+    "list_payment_intents": Route("GET", Endpoints.PAYMENT_INTENTS),
+    "confirm_payment_intent": Route("POST", Endpoints.CONFIRM_PAYMENT_INTENT),
+    "capture_payment_intent": Route("POST", Endpoints.CAPTURE_PAYMENT_INTENT),
+    "cancel_payment_intent": Route("POST", Endpoints.CANCEL_PAYMENT_INTENT),
+    "create_customer": Route("POST", Endpoints.CUSTOMERS),
+    "retrieve_customer": Route("GET", Endpoints.CUSTOMER),
+    "update_customer": Route("POST", Endpoints.CUSTOMER),
+    "delete_customer": Route("DELETE", Endpoints.CUSTOMER),
+    "list_customers": Route("GET", Endpoints.CUSTOMERS),
+    "search_customers": Route("GET", Endpoints.SEARCH_CUSTOMERS),
+    "create_refund": Route("POST", Endpoints.REFUNDS),
+    "retrieve_refund": Route("GET", Endpoints.REFUND),
+    "update_refund": Route("POST", Endpoints.REFUND),
+    "list_refunds": Route("GET", Endpoints.REFUNDS),
+    "cancel_refund": Route("POST", Endpoints.CANCEL_REFUND),
+    "create_charge": Route("POST", Endpoints.CHARGES),
+    "retrieve_charge": Route("GET", Endpoints.CHARGE),
+    "update_charge": Route("POST", Endpoints.CHARGE),
+    "capture_charge": Route("POST", Endpoints.CAPTURE_CHARGE),
+    "list_charges": Route("GET", Endpoints.CHARGES),
+    "search_charges": Route("GET", Endpoints.SEARCH_CHARGES),
+}
+
+
+def bind_routes(base_url: str) -> Dict[str, BoundRoute]:
+    """The route table for one client, built when its base_url is set."""
+    return {name: BoundRoute(route, base_url) for name, route in ROUTES.items()}
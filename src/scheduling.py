@@ -0,0 +1,290 @@
+import heapq
+import json
+import os
+import posixpath
+import time
+from statistics import median
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pytest
+
+from config.settings import settings
+from src.impact import recorder_for
+
+try:
+    from xdist.scheduler import LoadScheduling
+except ImportError:  # xdist not installed: --lpt has nothing to schedule
+    LoadScheduling = object
+
+# Fixtures every test of a module/class/package shares. Session fixtures are
+# built once per worker whatever the schedule, function fixtures per test.
+SHARED_SCOPES = ("package", "module", "class")
+
+Unit = Tuple[float, List[int]]
+
+
+def fixture_key(nodeid: str, scope: str, argname: str) -> str:
+    """The instance of a shared fixture a test uses, e.g. "tests/test_postman.py::collection_run"."""
+    parts = nodeid.split("::")
+    if scope == "package":
+        base = posixpath.dirname(parts[0])
+    elif scope == "class" and len(parts) > 2:
+        base = "::".join(parts[:2])
+    else:
+        base = parts[0]
+    return f"{base}::{argname}"
+
+
+def load_timings(path: str) -> Dict[str, dict]:
+    """Test node id -> {"duration", "calls", "fixtures"} from a previous run."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["tests"]
+
+
+def save_timings(path: str, observed: Dict[str, dict], smoothing: float) -> None:
+    """
+    Merge this run into ``path``. Durations are averaged with what was
+    there (``smoothing`` is the weight of this run) so one slow run does not
+    reorder the next; call counts and fixtures are replaced.
+    """
+    tests = load_timings(path)
+    for nodeid, entry in observed.items():
+        previous = tests.get(nodeid)
+        if previous is not None:
+            entry = {**entry, "duration": smoothing * entry["duration"] + (1 - smoothing) * previous["duration"]}
+        tests[nodeid] = entry
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "tests": tests}, f, indent=1, sort_keys=True)
+
+
+def plan_units(collection: Sequence[str], timings: Dict[str, dict], threshold: float) -> List[Unit]:
+    """
+    Collection indices grouped into units that must run on one worker,
+    most expensive first. Tests sharing a fixture whose setup took at least
+    ``threshold`` seconds form one unit, so it is built once rather than on
+    every worker. A test without timings costs the median of those with.
+    """
+    known = [timings[nodeid]["duration"] for nodeid in collection if nodeid in timings]
+    default = median(known) if known else 1.0
+    setup: Dict[str, float] = {}
+    for nodeid in collection:
+        for key, seconds in timings.get(nodeid, {}).get("fixtures", {}).items():
+            setup[key] = max(setup.get(key, 0.0), seconds)
+
+    parent = list(range(len(collection)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    owner: Dict[str, int] = {}
+    for index, nodeid in enumerate(collection):
+        for key in timings.get(nodeid, {}).get("fixtures", {}):
+            if setup[key] < threshold:
+                continue
+            if key in owner:
+                parent[find(index)] = find(owner[key])
+            else:
+                owner[key] = index
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(collection)):
+        groups.setdefault(find(index), []).append(index)
+    units = []
+    for members in groups.values():
+        cost = sum(timings[collection[i]]["duration"] if collection[i] in timings else default for i in members)
+        calls = sum(timings.get(collection[i], {}).get("calls", 0) for i in members)
+        units.append((cost, calls, members))
+    # Stable: equal costs (no timings yet) keep collection order.
+    units.sort(key=lambda unit: (-unit[0], -unit[1]))
+    return [(cost, members) for cost, _, members in units]
+
+
+def makespan(costs: Sequence[float], workers: int) -> float:
+    """Finish time of the busiest worker when each cost, in order, goes to the least loaded one."""
+    loads = [0.0] * max(workers, 1)
+    for cost in costs:
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+
+class LPTScheduling(LoadScheduling):
+    """
+    xdist scheduler that hands out units from ``plan_units`` longest first,
+    each to the next worker that runs low. Big units start early and the
+    cheap ones fill the gaps at the end, instead of one worker finishing a
+    chunk of slow tests long after the others went idle. A worker is kept
+    at two pending tests, the minimum xdist needs to keep it running.
+    """
+
+    def __init__(self, config, log=None):
+        super().__init__(config, log)
+        self.units: List[List[int]] = []
+        self.plan: List[Unit] = []
+        self.timed = False
+
+    def schedule(self) -> None:
+        assert self.collection_is_completed
+        if self.collection is not None:
+            for node in self.nodes:
+                self.check_schedule(node)
+            return
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+        self.collection = next(iter(self.node2collection.values()))
+        timings = load_timings(settings.TEST_TIMINGS)
+        self.timed = bool(timings)
+        self.plan = plan_units(self.collection, timings, settings.LPT_GROUP_THRESHOLD)
+        self.units = [members for _, members in self.plan]
+        self.pending[:] = [index for unit in self.units for index in unit]
+        for node in self.nodes:
+            self.check_schedule(node)
+
+    def check_schedule(self, node, duration: float = 0) -> None:
+        if node.shutting_down:
+            return
+        node_pending = self.node2pending[node]
+        while self.units and len(node_pending) < 2:
+            self._send_unit(node)
+        if not self.units:
+            node.shutdown()
+        self.log("num items waiting for node:", len(self.pending))
+
+    def _send_unit(self, node) -> None:
+        unit = self.units.pop(0)
+        sent = set(unit)
+        self.pending[:] = [index for index in self.pending if index not in sent]
+        self.node2pending[node].extend(unit)
+        node.send_runtest_some(unit)
+
+    def _requeue(self, indices: List[int]) -> None:
+        # Work taken back from a node goes first, as one unit: it may share
+        # a fixture and it has already waited.
+        self.units.insert(0, indices)
+        self.pending[:0] = indices
+        for node in self.nodes:
+            self.check_schedule(node)
+
+    def mark_test_pending(self, item: str) -> None:
+        assert self.collection is not None
+        self._requeue([self.collection.index(item)])
+
+    def remove_node(self, node) -> Optional[str]:
+        pending = self.node2pending.pop(node)
+        if not pending:
+            return None
+        assert self.collection is not None
+        crashitem = self.collection[pending.pop(0)]
+        if pending:
+            self._requeue(pending)
+        return crashitem
+
+
+class TimingsRecorder:
+    """Per-test duration (setup + call + teardown), request count and shared-fixture setup times."""
+
+    def __init__(self):
+        self.observed: Dict[str, dict] = {}
+        self.busy: Dict[str, float] = {}
+        self.setup: Dict[str, float] = {}
+
+    def fixture_times(self, item) -> Dict[str, float]:
+        info = getattr(item, "_fixtureinfo", None)
+        fixtures = {}
+        for name, definitions in (getattr(info, "name2fixturedefs", None) or {}).items():
+            if definitions and definitions[-1].scope in SHARED_SCOPES:
+                fixtures[fixture_key(item.nodeid, definitions[-1].scope, name)] = round(self.setup.get(name, 0.0), 4)
+        self.setup.clear()
+        return fixtures
+
+    def pytest_runtest_logreport(self, report):
+        # On the xdist controller this sees every worker's reports.
+        if report.when in ("setup", "call", "teardown"):
+            self.add(report)
+
+    def add(self, report) -> None:
+        entry = self.observed.setdefault(report.nodeid, {"duration": 0.0, "calls": 0, "fixtures": {}})
+        entry["duration"] = round(entry["duration"] + report.duration, 4)
+        entry.update(getattr(report, "test_timings", None) or {})
+        node = getattr(report, "node", None)
+        if node is not None:
+            worker = node.gateway.id
+            self.busy[worker] = self.busy.get(worker, 0.0) + report.duration
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("timings", "duration-aware scheduling")
+    group.addoption("--timings-record", action="store_true",
+                    help="save each test's duration and request count to TEST_TIMINGS")
+    group.addoption("--lpt", action="store_true",
+                    help="with -n: run the most expensive tests first, by TEST_TIMINGS, keeping tests "
+                         "that share an expensive fixture on one worker (implies --timings-record)")
+
+
+def pytest_configure(config):
+    if config.getoption("timings_record") or config.getoption("lpt"):
+        recorder_for(config)
+        config._timings_recorder = TimingsRecorder()
+        config.pluginmanager.register(config._timings_recorder, "timings-recorder")
+
+
+@pytest.hookimpl(optionalhook=True, tryfirst=True)
+def pytest_xdist_make_scheduler(config, log):
+    if config.getoption("lpt"):
+        scheduler = LPTScheduling(config, log)
+        config._lpt_scheduler = scheduler
+        return scheduler
+    return None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    timings = getattr(request.config, "_timings_recorder", None)
+    if timings is None or fixturedef.scope not in SHARED_SCOPES:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.setup[fixturedef.argname] = timings.setup.get(fixturedef.argname, 0.0) + time.perf_counter() - start
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    timings = getattr(item.config, "_timings_recorder", None)
+    if timings is None or call.when != "teardown":
+        return
+    # Extra report attributes travel from xdist workers to the controller.
+    outcome.get_result().test_timings = {
+        "calls": item.config._impact_recorder.calls.pop(item.nodeid, 0),
+        "fixtures": timings.fixture_times(item),
+    }
+
+
+def pytest_sessionfinish(session, exitstatus):
+    timings = getattr(session.config, "_timings_recorder", None)
+    if timings is None or os.getenv("PYTEST_XDIST_WORKER") or not timings.observed:
+        return
+    save_timings(settings.TEST_TIMINGS, timings.observed, settings.TEST_TIMINGS_SMOOTHING)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    timings = getattr(config, "_timings_recorder", None)
+    if timings is None or not timings.busy:
+        return
+    busy = ", ".join(f"{worker} {seconds:.2f}s" for worker, seconds in sorted(timings.busy.items()))
+    line = f"worker busy time: {busy} (spread {max(timings.busy.values()) - min(timings.busy.values()):.2f}s)"
+    scheduler = getattr(config, "_lpt_scheduler", None)
+    if scheduler is not None and not scheduler.timed:
+        line += "; lpt: no timings yet, ran in collection order"
+    elif scheduler is not None and scheduler.plan:
+        predicted = makespan([cost for cost, _ in scheduler.plan], len(timings.busy))
+        line += f"; lpt: {len(scheduler.plan)} units, predicted busiest worker {predicted:.2f}s"
+    terminalreporter.write_line(line)
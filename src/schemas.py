@@ -0,0 +1,170 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.constants import PaymentIntentStatus, RefundStatus
+from config.settings import settings
+
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_METADATA = {"type": "object", "additionalProperties": {"type": "string"}}
+_CURRENCY = {"type": "string", "pattern": "^[a-z]{3}$"}
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "payment_intent": {
+        "type": "object",
+        "required": ["id", "object", "amount", "currency", "status", "created", "livemode"],
+        "properties": {
+            "id": {"type": "string", "pattern": "^pi_"},
+            "object": {"const": "payment_intent"},
+            "amount": {"type": "integer", "minimum": 0},
+            "currency": _CURRENCY,
+            "status": {"enum": PaymentIntentStatus.ALL},
+            "customer": _NULLABLE_STRING,
+            "description": _NULLABLE_STRING,
+            "created": {"type": "integer"},
+            "livemode": {"type": "boolean"},
+            "metadata": _METADATA,
+        },
+    },
+    "customer": {
+        "type": "object",
+        "required": ["id", "object", "created", "livemode"],
+        "properties": {
+            "id": {"type": "string", "pattern": "^cus_"},
+            "object": {"const": "customer"},
+            "email": _NULLABLE_STRING,
+            "name": _NULLABLE_STRING,
+            "phone": _NULLABLE_STRING,
+            "description": _NULLABLE_STRING,
+            "created": {"type": "integer"},
+            "livemode": {"type": "boolean"},
+            "metadata": _METADATA,
+        },
+    },
+    "charge": {
+        "type": "object",
+        "required": ["id", "object", "amount", "currency", "status", "created", "livemode"],
+        "properties": {
+            "id": {"type": "string", "pattern": "^ch_"},
+            "object": {"const": "charge"},
+            "amount": {"type": "integer", "minimum": 0},
+            "currency": _CURRENCY,
+            "status": {"enum": ["succeeded", "pending", "failed"]},
+            "customer": _NULLABLE_STRING,
+            "description": _NULLABLE_STRING,
+            "created": {"type": "integer"},
+            "livemode": {"type": "boolean"},
+            "metadata": _METADATA,
+        },
+    },
+    "refund": {
+        "type": "object",
+        "required": ["id", "object", "amount", "currency", "status", "created"],
+        "properties": {
+            "id": {"type": "string", "pattern": "^(re|pyr)_"},
+            "object": {"const": "refund"},
+            "amount": {"type": "integer", "minimum": 0},
+            "currency": _CURRENCY,
+            "status": {"enum": RefundStatus.ALL},
+            "charge": _NULLABLE_STRING,
+            "payment_intent": _NULLABLE_STRING,
+            "reason": _NULLABLE_STRING,
+            "created": {"type": "integer"},
+            "metadata": _METADATA,
+        },
+    },
+    "list": {
+        "type": "object",
+        "required": ["object", "data", "has_more"],
+        "properties": {
+            "object": {"enum": ["list", "search_result"]},
+            "data": {"type": "array"},
+            "has_more": {"type": "boolean"},
+            "url": {"type": "string"},
+        },
+    },
+}
+
+
+class SchemaRegistry:
+    """
+    Compiles each JSON schema once and hands out the cached validator.
+
+    Named schemas come from SCHEMAS (keyed by Stripe object type); ad-hoc
+    schema dicts are cached by content, so an inline literal written out
+    again on every call is compiled once. The ad-hoc cache keeps the
+    ``cache_size`` most recently used.
+    """
+
+    def __init__(self, schemas: Optional[Dict[str, Dict[str, Any]]] = None, cache_size: Optional[int] = None):
+        self._schemas = dict(SCHEMAS if schemas is None else schemas)
+        self._named: Dict[str, Any] = {}
+        self._adhoc: "OrderedDict[str, Any]" = OrderedDict()
+        self.cache_size = settings.SCHEMA_CACHE_SIZE if cache_size is None else cache_size
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile(schema: Dict[str, Any]) -> Any:
+        # jsonschema takes longer to import than the rest of src/; only
+        # tests that validate pay for it.
+        from jsonschema import validators  # type: ignore
+
+        cls = validators.validator_for(schema)
+        cls.check_schema(schema)
+        return cls(schema)
+
+    def register(self, object_type: str, schema: Dict[str, Any]) -> None:
+        with self._lock:
+            self._schemas[object_type] = schema
+            self._named.pop(object_type, None)
+
+    def validator(self, schema: Any) -> Any:
+        if isinstance(schema, str):
+            validator = self._named.get(schema)
+            if validator is None:
+                if schema not in self._schemas:
+                    raise KeyError(f"No schema registered for object type '{schema}'")
+                with self._lock:
+                    validator = self._named.get(schema)
+                    if validator is None:
+                        validator = self._named[schema] = self._compile(self._schemas[schema])
+            return validator
+
+        key = json.dumps(schema, sort_keys=True)
+        with self._lock:
+            validator = self._adhoc.get(key)
+            if validator is None:
+                # From the key, not the caller's dict: changing that dict
+                # later must not change what the cached validator checks.
+                validator = self._adhoc[key] = self._compile(json.loads(key))
+                if len(self._adhoc) > self.cache_size:
+                    self._adhoc.popitem(last=False)
+            else:
+                self._adhoc.move_to_end(key)
+        return validator
+
+    def errors(self, instance: Any, schema: Any) -> List[str]:
+        return [
+            f"{'/'.join(str(p) for p in error.absolute_path) or '<root>'}: {error.message}"
+            for error in self.validator(schema).iter_errors(instance)
+        ]
+
+    def validate_items(self, items: Iterable[Dict[str, Any]], object_type: Optional[str] = None) -> List[str]:
+        """
+        Validate every item in one pass and return all failures, each prefixed
+        with the item's index and id. Without ``object_type`` each item is
+        checked against the schema for its own ``object`` field.
+        """
+        failures = []
+        for index, item in enumerate(items):
+            item_type = object_type or item.get("object")
+            if item_type not in self._schemas:
+                failures.append(f"[{index}] {item.get('id')}: no schema for object type '{item_type}'")
+                continue
+            for error in self.errors(item, item_type):
+                failures.append(f"[{index}] {item.get('id')}: {error}")
+        return failures
+
+
+registry = SchemaRegistry()
@@ -0,0 +1,257 @@
+import bisect
+import hashlib
+import itertools
+import json
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from config.settings import settings
+
+POLICIES = ("round_robin", "least_outstanding", "hash")
+
+# Params whose value names the object a request is about, checked in order.
+_KEY_PARAMS = ("charge", "payment_intent", "customer")
+_PATH_ID = re.compile(r"^/v1/[a-z_]+/([A-Za-z]+_[A-Za-z0-9]+)")
+
+
+def parse_shard_urls(raw: str) -> List[str]:
+    """Parse "http://localhost:12111,http://localhost:12112" into a list."""
+    return [url.strip().rstrip("/") for url in raw.split(",") if url.strip()]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def routing_key(request: requests.PreparedRequest) -> Optional[str]:
+    """
+    Object ID a request is about: the ID in its path, else the charge,
+    payment_intent or customer it references in the query or form body.
+    None for creates and lists that name no object.
+    """
+    parts = urlsplit(request.url)
+    match = _PATH_ID.match(parts.path)
+    if match is not None:
+        return match.group(1)
+    params = dict(parse_qsl(parts.query))
+    body = request.body
+    if body:
+        params.update(parse_qsl(body.decode() if isinstance(body, bytes) else body))
+    for name in _KEY_PARAMS:
+        value = params.get(name)
+        if value:
+            return value
+    return None
+
+
+class Shard:
+    __slots__ = ("url", "in_flight", "requests", "errors", "failures", "ejections", "ejected_until", "probing")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0  # consecutive connection failures
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.probing = False
+
+    def available(self, now: float) -> bool:
+        # Once the cooldown is over a single trial request is let through;
+        # its outcome readmits or re-ejects the shard.
+        if not self.ejected_until:
+            return True
+        return now >= self.ejected_until and not self.probing
+
+
+class ShardedAdapter(BaseAdapter):
+    """
+    Transport adapter that spreads requests over several stripe-mock
+    instances. Each request keeps its path and query and is sent through
+    ``inner`` (normally a PooledHTTPAdapter, which pools per host) to the
+    shard picked by ``policy`` (default settings.SHARD_POLICY):
+
+    - "round_robin": every request goes to the next shard in turn
+    - "least_outstanding": the shard with the fewest requests in flight
+    - "hash": requests about an object (retrieve, update, a refund of a
+      charge, ...) go to the shard that created it, or else to its point
+      on a consistent-hash ring; the rest go round robin
+
+    A shard is ejected after ``eject_after`` consecutive connection errors
+    and gets one trial request once ``cooldown`` seconds have passed.
+    ``check_health()`` probes every shard with a TCP connect. Only
+    connection errors count: an HTTP error status means the shard is up.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        inner: BaseAdapter,
+        policy: Optional[str] = None,
+        eject_after: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        affinity_size: Optional[int] = None,
+        replicas: int = 64,
+    ):
+        super().__init__()
+        if not urls:
+            raise ValueError("ShardedAdapter needs at least one URL")
+        policy = policy or settings.SHARD_POLICY
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown shard policy '{policy}'. Expected one of {', '.join(POLICIES)}")
+        self.policy = policy
+        self.inner = inner
+        self.shards = [Shard(url) for url in urls]
+        self.eject_after = eject_after or settings.SHARD_EJECT_AFTER
+        self.cooldown = settings.SHARD_COOLDOWN if cooldown is None else cooldown
+        self.affinity_size = affinity_size or settings.SHARD_AFFINITY_SIZE
+        self._affinity: "OrderedDict[str, Shard]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        points = sorted((_hash(f"{shard.url}#{i}"), index)
+                        for index, shard in enumerate(self.shards) for i in range(replicas))
+        self._ring = [point for point, _ in points]
+        self._ring_shards = [self.shards[index] for _, index in points]
+
+    @classmethod
+    def from_settings(cls, inner: BaseAdapter) -> Optional["ShardedAdapter"]:
+        urls = parse_shard_urls(settings.SHARD_URLS)
+        if len(urls) < 2:
+            return None
+        return cls(urls, inner)
+
+    def _rotate(self, candidates: List[Shard]) -> Shard:
+        return candidates[next(self._turn) % len(candidates)]
+
+    def _on_ring(self, key: str, now: float) -> Optional[Shard]:
+        start = bisect.bisect(self._ring, _hash(key))
+        for offset in range(len(self._ring)):
+            shard = self._ring_shards[(start + offset) % len(self._ring)]
+            if shard.available(now):
+                return shard
+        return None
+
+    def _pick(self, key: Optional[str]) -> Shard:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [shard for shard in self.shards if shard.available(now)]
+            if not candidates:
+                raise requests.ConnectionError(
+                    f"All {len(self.shards)} shards are ejected: " + ", ".join(shard.url for shard in self.shards))
+            shard = None
+            if key is not None and self.policy == "hash":
+                shard = self._affinity.get(key)
+                if shard is not None and not shard.available(now):
+                    shard = None
+                if shard is None:
+                    shard = self._on_ring(key, now)
+            if shard is None:
+                if self.policy == "least_outstanding":
+                    fewest = min(candidate.in_flight for candidate in candidates)
+                    shard = self._rotate([candidate for candidate in candidates if candidate.in_flight == fewest])
+                else:
+                    shard = self._rotate(candidates)
+            if shard.ejected_until:
+                shard.probing = True
+            shard.in_flight += 1
+            shard.requests += 1
+            return shard
+
+    def _remember(self, response: requests.Response, shard: Shard) -> None:
+        try:
+            object_id = json.loads(response.content).get("id")
+        except (ValueError, AttributeError):
+            return
+        if not isinstance(object_id, str):
+            return
+        with self._lock:
+            self._affinity[object_id] = shard
+            self._affinity.move_to_end(object_id)
+            if len(self._affinity) > self.affinity_size:
+                self._affinity.popitem(last=False)
+
+    def _eject(self, shard: Shard) -> None:
+        shard.ejected_until = time.monotonic() + self.cooldown
+        shard.ejections += 1
+
+    def _readmit(self, shard: Shard) -> None:
+        shard.failures = 0
+        shard.ejected_until = 0.0
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = routing_key(request)
+        shard = self._pick(key)
+        parts = urlsplit(request.url)
+        routed = request.copy()
+        routed.url = shard.url + parts.path + (f"?{parts.query}" if parts.query else "")
+        try:
+            response = self.inner.send(routed, **kwargs)
+        except requests.ConnectionError:
+            with self._lock:
+                shard.errors += 1
+                shard.failures += 1
+                # A failed trial request ejects again straight away.
+                if shard.ejected_until or shard.failures >= self.eject_after:
+                    self._eject(shard)
+            raise
+        else:
+            with self._lock:
+                self._readmit(shard)
+        finally:
+            with self._lock:
+                shard.in_flight -= 1
+                shard.probing = False
+        # A create lands wherever the policy sent it (or beside the object it
+        # references); later requests naming the new ID follow it there.
+        if self.policy == "hash" and request.method == "POST" and response.status_code < 300:
+            self._remember(response, shard)
+        return response
+
+    def check_health(self, timeout: float = 1.0) -> Dict[str, bool]:
+        """Open a TCP connection to every shard; readmit the ones that answer and eject the rest."""
+        results = {}
+        for shard in self.shards:
+            parts = urlsplit(shard.url)
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            try:
+                socket.create_connection((parts.hostname, port), timeout=timeout).close()
+                healthy = True
+            except OSError:
+                healthy = False
+            with self._lock:
+                if healthy:
+                    self._readmit(shard)
+                elif not shard.ejected_until:
+                    self._eject(shard)
+            results[shard.url] = healthy
+        return results
+
+    def shard_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                shard.url: {
+                    "requests": shard.requests,
+                    "errors": shard.errors,
+                    "in_flight": shard.in_flight,
+                    "ejections": shard.ejections,
+                    "healthy": int(not shard.ejected_until),
+                }
+                for shard in self.shards
+            }
+
+    def stats(self) -> Dict[str, int]:
+        if hasattr(self.inner, "stats"):
+            return self.inner.stats()
+        return {"requests": 0, "hits": 0, "misses": 0}
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,155 @@
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator
+
+_NON_WS = re.compile(rb"[^ \t\r\n]")
+_STRUCTURAL = re.compile(rb'[\[\]{}"]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_SCALAR_END = re.compile(rb"[ \t\r\n,\]}]")
+
+
+class ListStream:
+    """
+    Incremental decoder for a list or search_result body.
+
+    Iterating yields the elements of the top-level ``data`` array one at a
+    time, each decoded with ``json.loads`` as soon as its closing bracket has
+    arrived. Only the undecoded tail of the download is buffered, so memory
+    stays at roughly one chunk plus one object however long the page is.
+    Every other top-level field (object, has_more, url, next_page, or error
+    for a failed request) is collected in ``meta``, in whatever order the
+    server sends it. ``meta`` is complete once iteration has finished, and
+    ``has_data`` tells whether a ``data`` array was present.
+
+    The scan only tracks brackets and string boundaries; each element is
+    validated by ``json.loads`` and malformed or truncated input raises
+    ValueError.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buf = b""
+        self._pos = 0
+        self.meta: Dict[str, Any] = {}
+        self.has_data = False
+        self.done = False
+
+    def _fill(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                # Drop what has been decoded so the buffer never holds more
+                # than the partial value plus one chunk.
+                self._buf = self._buf[self._pos:] + chunk
+                self._pos = 0
+                return True
+        return False
+
+    def _peek(self) -> bytes:
+        while True:
+            match = _NON_WS.search(self._buf, self._pos)
+            if match is not None:
+                self._pos = match.start()
+                return self._buf[self._pos:self._pos + 1]
+            self._pos = len(self._buf)
+            if not self._fill():
+                raise ValueError("List body ended unexpectedly")
+
+    def _expect(self, char: bytes) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos}, got {found!r}")
+        self._pos += 1
+
+    def _value_end(self) -> int:
+        """Offset just past the JSON value starting at ``self._pos``, reading more as needed."""
+        first = self._buf[self._pos:self._pos + 1]
+        offset = 1
+        depth = 1 if first in (b"{", b"[") else 0
+        in_string = first == b'"'
+        if not depth and not in_string:
+            while True:
+                match = _SCALAR_END.search(self._buf, self._pos + offset)
+                if match is not None:
+                    return match.start()
+                offset = len(self._buf) - self._pos
+                if not self._fill():
+                    return len(self._buf)
+        while True:
+            pos = self._pos + offset
+            if in_string:
+                match = _STRING_SPECIAL.search(self._buf, pos)
+                if match is None:
+                    pos = len(self._buf)
+                elif match.group() == b"\\":
+                    if match.end() < len(self._buf):
+                        offset = match.end() + 1 - self._pos
+                        continue
+                    pos = match.start()
+                else:
+                    in_string = False
+                    if not depth:
+                        return match.end()
+                    offset = match.end() - self._pos
+                    continue
+            else:
+                match = _STRUCTURAL.search(self._buf, pos)
+                if match is None:
+                    pos = len(self._buf)
+                else:
+                    char = match.group()
+                    offset = match.end() - self._pos
+                    if char == b'"':
+                        in_string = True
+                    elif char in (b"{", b"["):
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if not depth:
+                            return match.end()
+                    continue
+            offset = pos - self._pos
+            if not self._fill():
+                raise ValueError("List body ended inside a value")
+
+    def _read_value(self) -> Any:
+        self._peek()
+        end = self._value_end()
+        raw = self._buf[self._pos:end]
+        self._pos = end
+        return json.loads(raw)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self.done:
+            return
+        self._expect(b"{")
+        if self._peek() == b"}":
+            self._pos += 1
+        else:
+            while True:
+                key = self._read_value()
+                self._expect(b":")
+                if key == "data" and self._peek() == b"[":
+                    self.has_data = True
+                    self._pos += 1
+                    if self._peek() == b"]":
+                        self._pos += 1
+                    else:
+                        while True:
+                            yield self._read_value()
+                            separator = self._peek()
+                            self._pos += 1
+                            if separator == b"]":
+                                break
+                            if separator != b",":
+                                raise ValueError(f"Expected ',' or ']' at offset {self._pos - 1}, got {separator!r}")
+                else:
+                    self.meta[key] = self._read_value()
+                separator = self._peek()
+                self._pos += 1
+                if separator == b"}":
+                    break
+                if separator != b",":
+                    raise ValueError(f"Expected ',' or '}}' at offset {self._pos - 1}, got {separator!r}")
+        self.done = True
+        self._buf, self._pos = b"", 0
+
@@ -0,0 +1,159 @@
+import ipaddress
+import socket
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from config.settings import settings
+from src.cassette import cassette_adapter
+from src.mock_server import InProcessAdapter
+from src.sharding import ShardedAdapter
+
+_timings = threading.local()
+
+
+def reset_connection_timings() -> None:
+    """Time the DNS lookup of a connection opened by this thread's next request."""
+    _timings.dns = None
+    _timings.connect = None
+    _timings.wanted = True
+
+
+def connection_timings() -> Tuple[Optional[float], Optional[float]]:
+    """
+    (dns, connect) seconds for the connection opened by the last request on
+    this thread, or (None, None) if it reused a pooled connection. DNS is
+    only timed after reset_connection_timings().
+    """
+    _timings.wanted = False
+    return getattr(_timings, "dns", None), getattr(_timings, "connect", None)
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class _TimedConnectionMixin:
+    def connect(self) -> None:
+        start = time.perf_counter()
+        host = self._dns_host  # type: ignore[attr-defined]
+        if getattr(_timings, "wanted", False) and not _is_ip(host):
+            # urllib3 resolves inside create_connection without a timing hook,
+            # so resolve once up front to time it. That is a second lookup
+            # for the new connection (nothing guarantees it is cached), so it
+            # is only done while a hook is waiting for the timings.
+            try:
+                socket.getaddrinfo(host, self.port, type=socket.SOCK_STREAM)  # type: ignore[attr-defined]
+            except OSError:
+                pass  # let connect() raise urllib3's own error
+            _timings.dns = time.perf_counter() - start
+        super().connect()  # type: ignore[misc]
+        _timings.connect = time.perf_counter() - start
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps per-host keep-alive pools and reports reuse.
+
+    A pool "hit" is a request served on an already-open connection, a "miss"
+    is a request that had to open a new one.
+    """
+
+    def __init__(
+        self,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        pool_block: Optional[bool] = None,
+    ):
+        self._stats_lock = threading.Lock()
+        self._retired: Dict[str, int] = {"requests": 0, "connections": 0}
+        retries = settings.POOL_MAX_RETRIES if max_retries is None else max_retries
+        super().__init__(
+            pool_connections=pool_connections or settings.POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or settings.POOL_MAXSIZE,
+            # Only connection-level failures are retried here: a request that
+            # reached the server must not be replayed behind the caller's back.
+            max_retries=Retry(total=retries, connect=retries, read=0, status=0, redirect=0, raise_on_status=False),
+            pool_block=settings.POOL_BLOCK if pool_block is None else pool_block,
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pools.dispose_func = self._retire_pool
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def _retire_pool(self, pool) -> None:
+        # Keep the counters of pools evicted from the manager, then close them.
+        with self._stats_lock:
+            self._retired["requests"] += pool.num_requests
+            self._retired["connections"] += pool.num_connections
+        pool.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            requests_made = self._retired["requests"]
+            connections = self._retired["connections"]
+            pools = self.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    requests_made += pool.num_requests
+                    connections += pool.num_connections
+        return {
+            "requests": requests_made,
+            "hits": max(requests_made - connections, 0),
+            "misses": connections,
+        }
+
+
+def build_session(adapter: Optional[HTTPAdapter] = None, shard_urls: Optional[Sequence[str]] = None) -> requests.Session:
+    """
+    Session with ``adapter`` mounted for http and https. The default is a
+    PooledHTTPAdapter, spread over ``shard_urls`` (or settings.SHARD_URLS)
+    by a ShardedAdapter when there are several, or an InProcessAdapter when
+    settings.MOCK_BACKEND is "inprocess". It is wrapped for recording or
+    replay when settings.CASSETTE_MODE is set.
+    """
+    session = requests.Session()
+    if adapter is None:
+        if settings.MOCK_BACKEND == "inprocess":
+            adapter = InProcessAdapter()
+        elif shard_urls:
+            adapter = ShardedAdapter(shard_urls, PooledHTTPAdapter())
+        else:
+            pooled = PooledHTTPAdapter()
+            adapter = ShardedAdapter.from_settings(pooled) or pooled
+        adapter = cassette_adapter(adapter) or adapter
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,241 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from config.settings import settings
+from src.instrumentation import LatencyHistogram
+
+
+class Step:
+    __slots__ = ("name", "call", "needs")
+
+    def __init__(self, name: str, call: Callable[[Any, "StepContext"], Any], needs: Tuple[str, ...]):
+        self.name = name
+        self.call = call
+        self.needs = needs
+
+
+class Workflow:
+    """
+    A named DAG of steps. Each step is ``call(client, ctx)`` and lists the
+    steps whose results it reads in ``needs``:
+
+        flow = Workflow("refund_captured_intent")
+        flow.step("intent", lambda c, ctx: c.create_payment_intent(amount=2000, currency="usd", capture_method="manual"))
+        flow.step("confirm", lambda c, ctx: c.confirm_payment_intent(ctx["intent"].id, payment_method="pm_card_visa"),
+                  needs=("intent",))
+        flow.step("customer", lambda c, ctx: c.create_customer(email="e2e@example.com"))
+
+    Dependencies must already be declared, so a workflow is acyclic by
+    construction. Steps with no path between them run concurrently.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.steps: Dict[str, Step] = {}
+        self.dependents: Dict[str, List[str]] = {}
+
+    def step(self, name: str, call: Callable[[Any, "StepContext"], Any], needs: Iterable[str] = ()) -> "Workflow":
+        if name in self.steps:
+            raise ValueError(f"Step '{name}' is already defined in workflow '{self.name}'")
+        needs = tuple(needs)
+        for dependency in needs:
+            if dependency not in self.steps:
+                raise ValueError(f"Step '{name}' needs unknown step '{dependency}'")
+        self.steps[name] = Step(name, call, needs)
+        self.dependents[name] = []
+        for dependency in needs:
+            self.dependents[dependency].append(name)
+        return self
+
+    @property
+    def roots(self) -> List[str]:
+        return [name for name, step in self.steps.items() if not step.needs]
+
+    def descendants(self, name: str) -> List[str]:
+        seen: List[str] = []
+        queue = deque(self.dependents[name])
+        while queue:
+            child = queue.popleft()
+            if child not in seen:
+                seen.append(child)
+                queue.extend(self.dependents[child])
+        return seen
+
+
+class FlowRun:
+    """
+    Outcome of one execution of a workflow.
+
+    ``results`` holds the return value of every step that succeeded,
+    ``errors`` the exception or >= 400 response of every step that failed,
+    and ``skipped`` the steps not run because something they need failed.
+    ``timings`` are per-step seconds, ``elapsed`` the whole flow.
+    """
+
+    def __init__(self, index: int, workflow: Workflow, input: Mapping[str, Any]):
+        self.index = index
+        self.workflow = workflow
+        self.input = input
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Any] = {}
+        self.skipped: Set[str] = set()
+        self.timings: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.elapsed: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and not self.skipped
+
+    def __getitem__(self, step: str) -> Any:
+        return self.results[step]
+
+
+class StepContext:
+    """What a step sees: the run's input and the results of the steps it needs."""
+
+    __slots__ = ("run", "step")
+
+    def __init__(self, run: FlowRun, step: Step):
+        self.run = run
+        self.step = step
+
+    @property
+    def input(self) -> Mapping[str, Any]:
+        return self.run.input
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.step.needs:
+            raise KeyError(f"Step '{self.step.name}' reads '{name}' without listing it in needs")
+        return self.run.results[name]
+
+
+def _failed(result: Any) -> bool:
+    status = getattr(result, "status_code", None)
+    return status is not None and status >= 400
+
+
+class _FlowState:
+    __slots__ = ("run", "waiting", "remaining")
+
+    def __init__(self, run: FlowRun):
+        self.run = run
+        self.waiting = {name: len(step.needs) for name, step in run.workflow.steps.items()}
+        self.remaining = len(run.workflow.steps)
+
+
+class WorkflowRunner:
+    """
+    Executes many runs of a workflow on one thread pool.
+
+    A step is submitted the moment the last step it needs succeeds, so
+    independent branches of a run, and steps of different runs, overlap their
+    network waits. At most ``max_in_flight`` runs are active at once
+    (default ``2 * max_workers``); the next input starts as soon as a run
+    finishes. Per-step and per-flow latencies accumulate across ``run``
+    calls and are reported by ``stats``.
+    """
+
+    def __init__(self, client: Any, max_workers: Optional[int] = None, max_in_flight: Optional[int] = None):
+        self.client = client
+        self.max_workers = max_workers or settings.BULK_MAX_WORKERS
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._done: List[FlowRun] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def run(
+        self,
+        workflow: Workflow,
+        inputs: Optional[Iterable[Mapping[str, Any]]] = None,
+        runs: int = 1,
+    ) -> List[FlowRun]:
+        """
+        Run ``workflow`` once per item of ``inputs`` (``ctx.input`` in each
+        step), or ``runs`` times with an empty input. Returns the runs in
+        input order once all of them have finished.
+        """
+        if not workflow.steps:
+            raise ValueError(f"Workflow '{workflow.name}' has no steps")
+        source = enumerate(inputs if inputs is not None else ({} for _ in range(runs)))
+        completed: List[FlowRun] = []
+        active = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stripe-workflow") as executor:
+            self._executor = executor
+            for index, input in source:
+                with self._lock:
+                    active -= self._collect(completed)
+                    while active >= self.max_in_flight:
+                        self._finished.wait()
+                        active -= self._collect(completed)
+                    active += 1
+                state = _FlowState(FlowRun(index, workflow, input))
+                for name in workflow.roots:
+                    executor.submit(self._run_step, state, workflow.steps[name])
+            with self._lock:
+                active -= self._collect(completed)
+                while active:
+                    self._finished.wait()
+                    active -= self._collect(completed)
+        return sorted(completed, key=lambda run: run.index)
+
+    def _collect(self, completed: List[FlowRun]) -> int:
+        done = self._done
+        self._done = []
+        completed.extend(done)
+        return len(done)
+
+    def _run_step(self, state: _FlowState, step: Step) -> None:
+        run = state.run
+        started = time.perf_counter()
+        error: Any = None
+        try:
+            result = step.call(self.client, StepContext(run, step))
+            if _failed(result):
+                error = result
+        except Exception as e:
+            result, error = None, e
+        elapsed = time.perf_counter() - started
+
+        ready: List[Step] = []
+        with self._lock:
+            self._record(f"{run.workflow.name}.{step.name}", elapsed, error is not None)
+            run.timings[step.name] = elapsed
+            state.remaining -= 1
+            if error is None:
+                run.results[step.name] = result
+                for name in run.workflow.dependents[step.name]:
+                    state.waiting[name] -= 1
+                    if state.waiting[name] == 0 and name not in run.skipped:
+                        ready.append(run.workflow.steps[name])
+            else:
+                run.errors[step.name] = error
+                # Everything downstream can never run; count it as finished.
+                for name in run.workflow.descendants(step.name):
+                    if name not in run.skipped:
+                        run.skipped.add(name)
+                        state.remaining -= 1
+            if state.remaining == 0:
+                run.elapsed = time.perf_counter() - run.started
+                self._record(run.workflow.name, run.elapsed, not run.ok)
+                self._done.append(run)
+                self._finished.notify()
+        for next_step in ready:
+            self._executor.submit(self._run_step, state, next_step)  # type: ignore[union-attr]
+
+    def _record(self, label: str, elapsed: float, failed: bool) -> None:
+        histogram = self._histograms.get(label)
+        if histogram is None:
+            histogram = self._histograms[label] = LatencyHistogram()
+        histogram.record(elapsed, failed, 0, 0)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Latency summary per "workflow.step" and per workflow, like HistogramCollector.summary()."""
+        with self._lock:
+            return {label: histogram.summary() for label, histogram in sorted(self._histograms.items())}
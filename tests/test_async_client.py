@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from config.constants import StatusCodes, ObjectPrefix
+from src.helpers import assert_status_code, assert_id_prefix, assert_is_list_response, assert_error_response
+
+class TestAsyncClient:
+    @pytest.mark.client
+    @pytest.mark.asyncio
+    async def test_create_customer(self, async_api_client, sample_customer_data):
+        response = await async_api_client.create_customer(**sample_customer_data)
+        assert_status_code(response, StatusCodes.OK)
+        assert_id_prefix(response.json(), ObjectPrefix.CUSTOMER)
+
+    @pytest.mark.client
+    @pytest.mark.asyncio
+    async def test_payment_intent_flow(self, async_api_client, sample_payment_intent_data):
+        created = await async_api_client.create_payment_intent(capture_method="manual", **sample_payment_intent_data)
+        pi_id = created.json()["id"]
+        confirmed = await async_api_client.confirm_payment_intent(pi_id, payment_method="pm_card_visa")
+        assert "id" in confirmed.json()
+        canceled = await async_api_client.cancel_payment_intent(pi_id)
+        assert "id" in canceled.json()
+
+    @pytest.mark.client
+    @pytest.mark.asyncio
+    async def test_list_charges(self, async_api_client):
+        response = await async_api_client.list_charges(limit=3)
+        assert_is_list_response(response, "charge")
+
+    @pytest.mark.client
+    @pytest.mark.asyncio
+    async def test_concurrent_creates(self, async_api_client):
+        responses = await asyncio.gather(
+            *(async_api_client.create_charge(amount=1000 + i, currency="usd") for i in range(200))
+        )
+        assert all(r.status_code == StatusCodes.OK for r in responses)
+        assert len({r.json()["id"] for r in responses}) == len(responses)
+
+    @pytest.mark.auth
+    @pytest.mark.asyncio
+    async def test_no_api_key_401(self, async_unauthenticated_client):
+        response = await async_unauthenticated_client.list_payment_intents()
+        assert_status_code(response, StatusCodes.UNAUTHORIZED)
+        assert_error_response(response, "invalid_request_error")
+
+    @pytest.mark.client
+    @pytest.mark.asyncio
+    async def test_headers_ignore_case(self, async_api_client):
+        response = await async_api_client.list_charges(limit=1)
+        assert "json" in response.headers["content-type"]
+        assert response.headers["CONTENT-TYPE"] == response.headers["Content-Type"]
@@ -0,0 +1,54 @@
+import time
+import pytest
+from benchmarks.runner import BenchmarkRunner, parse_mix, percentile
+
+class TestBenchmarkRunner:
+    @pytest.mark.client
+    def test_percentile(self):
+        assert percentile([], 99) == 0.0
+        assert percentile([0.5], 50) == 0.5
+        samples = [0.1, 0.2, 0.3, 0.4]
+        assert percentile(samples, 0) == 0.1
+        assert percentile(samples, 50) == 0.2
+        assert percentile(samples, 99) == 0.4
+        assert percentile(samples, 100) == 0.4
+
+    @pytest.mark.client
+    def test_parse_mix(self):
+        assert parse_mix("payment_intent_flow=3, charge_refund") == {"payment_intent_flow": 3.0, "charge_refund": 1.0}
+        for spec, message in [
+            ("", "empty"),
+            (" , ", "empty"),
+            ("nope=1", "Unknown scenario 'nope'"),
+            ("charge_refund=lots", "not a number"),
+            ("charge_refund=0", "must be positive"),
+            ("charge_refund=-2", "must be positive"),
+        ]:
+            with pytest.raises(ValueError, match=message):
+                parse_mix(spec)
+
+    @pytest.mark.client
+    def test_fixed_rate_drops_arrivals_beyond_backlog(self):
+        runner = BenchmarkRunner({"list_pages": 1}, workers=1, mode="fixed", rate=200, max_backlog=2)
+        started = []
+
+        def slow_iteration(scheduled):
+            started.append(scheduled)
+            time.sleep(0.05)
+
+        runner._iteration = slow_iteration
+        runner._fixed_rate(time.perf_counter() + 0.3)
+        runner.client.close()
+        # ~60 arrivals for ~6 iterations of room: the rest were dropped, not queued.
+        assert len(started) <= 10
+        assert runner.dropped >= 40
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_report(self):
+        report = BenchmarkRunner({"list_pages": 1}, workers=2, duration=0.2, seed=1).run()
+        assert report["meta"]["mode"] == "closed" and report["meta"]["max_backlog"] is None
+        assert report["total"]["requests"] > 0 and report["total"]["dropped"] == 0
+        assert set(report["scenarios"]) == {"list_pages"}
+        for stats in report["endpoints"].values():
+            assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
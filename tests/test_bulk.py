@@ -0,0 +1,36 @@
+import pytest
+from config.constants import ObjectPrefix
+from src.helpers import assert_id_prefix
+
+class TestBulkOperations:
+    @pytest.mark.client
+    def test_create_customers_many_ordered(self, api_client):
+        payloads = [{"email": f"bulk{i}@example.com", "name": f"Bulk {i}"} for i in range(50)]
+        results = list(api_client.create_customers_many(payloads, max_workers=8))
+        assert [r.index for r in results] == list(range(50))
+        assert all(r.ok for r in results)
+        for result in results:
+            assert_id_prefix(result.response.json(), ObjectPrefix.CUSTOMER)
+
+    @pytest.mark.client
+    def test_create_charges_many_as_completed(self, api_client):
+        payloads = ({"amount": 1000 + i, "currency": "usd"} for i in range(40))
+        results = list(api_client.create_charges_many(payloads, ordered=False))
+        assert sorted(r.index for r in results) == list(range(40))
+        assert all(r.ok for r in results)
+
+    @pytest.mark.client
+    def test_errors_do_not_abort_batch(self, api_client):
+        payloads = [{"amount": 2000, "currency": "usd"}, {"bogus": True}, {"amount": 500, "currency": "usd"}]
+        results = list(api_client.create_charges_many(payloads))
+        assert results[0].ok and results[2].ok
+        assert isinstance(results[1].error, TypeError)
+
+    @pytest.mark.client
+    def test_consumer_can_stop_early(self, api_client):
+        # Its own params: how many are sent before close() varies from run to run.
+        payloads = ({"amount": 2000, "currency": "usd", "description": "stop early"} for _ in range(10000))
+        results = api_client.bulk("create_charge", payloads, max_workers=4)
+        first = next(results)
+        results.close()
+        assert first.ok
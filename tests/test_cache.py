@@ -0,0 +1,119 @@
+import time
+import pytest
+from config.constants import StatusCodes
+from src.api_client import StripeClient
+from src.cache import ResponseCache
+from src.helpers import assert_status_code
+from src.mock_server import InProcessAdapter, MockServer
+from src.transport import build_session
+
+class FakeResponse:
+    def __init__(self, content=b"{}"):
+        self.content = content
+
+@pytest.fixture
+def cached_client():
+    client = StripeClient(
+        base_url="http://mock.local",
+        session=build_session(InProcessAdapter(MockServer())),
+        cache=ResponseCache(max_entries=100, ttl=60),
+    )
+    client.sent = []
+    client.add_hook("before_request", lambda event: client.sent.append(event.key))
+    yield client
+    client.close()
+
+class TestResponseCache:
+    @pytest.mark.client
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        for path in ("/v1/customers/a", "/v1/customers/b"):
+            cache.put(path, None, FakeResponse(), cache.generation)
+        cache.get("/v1/customers/a", None)
+        cache.put("/v1/customers/c", None, FakeResponse(), cache.generation)
+        assert cache.get("/v1/customers/b", None) is None
+        assert cache.get("/v1/customers/a", None) is not None
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.client
+    def test_byte_budget(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.put("/v1/customers/a", None, FakeResponse(b"x" * 6), cache.generation)
+        cache.put("/v1/customers/b", None, FakeResponse(b"x" * 6), cache.generation)
+        cache.put("/v1/customers/c", None, FakeResponse(b"x" * 11), cache.generation)
+        assert len(cache) == 1
+        assert cache.stats()["bytes"] == 6
+
+    @pytest.mark.client
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.put("/v1/charges/ch_1", None, FakeResponse(), cache.generation)
+        time.sleep(0.02)
+        assert cache.get("/v1/charges/ch_1", None) is None
+        assert cache.stats()["expirations"] == 1
+
+    @pytest.mark.client
+    def test_query_is_part_of_the_key(self):
+        cache = ResponseCache()
+        cache.put("/v1/charges", "limit=1", FakeResponse(), cache.generation)
+        assert cache.get("/v1/charges", "limit=2") is None
+        assert cache.get("/v1/charges", "limit=1") is not None
+
+    @pytest.mark.client
+    def test_invalidation_scope(self):
+        cache = ResponseCache()
+        for path, query in [
+            ("/v1/customers/cus_1", None), ("/v1/customers/cus_2", None), ("/v1/customers", "limit=3"),
+            ("/v1/charges/ch_1", None), ("/v1/charges", None),
+        ]:
+            cache.put(path, query, FakeResponse(), cache.generation)
+        cache.invalidate("/v1/customers/cus_1")
+        assert cache.get("/v1/customers/cus_1", None) is None
+        assert cache.get("/v1/customers", "limit=3") is None
+        assert cache.get("/v1/customers/cus_2", None) is not None
+        assert cache.get("/v1/charges/ch_1", None) is not None
+        # A refund changes its charge, so every cached charge read goes.
+        cache.invalidate("/v1/refunds")
+        assert cache.get("/v1/charges/ch_1", None) is None
+        assert cache.get("/v1/charges", None) is None
+
+    @pytest.mark.client
+    def test_read_racing_a_write_is_not_stored(self):
+        cache = ResponseCache()
+        generation = cache.generation
+        cache.invalidate("/v1/customers/cus_1")
+        cache.put("/v1/customers/cus_1", None, FakeResponse(), generation)
+        assert len(cache) == 0
+
+class TestClientCache:
+    @pytest.mark.client
+    def test_repeated_retrieve_is_served_from_cache(self, cached_client):
+        customer = cached_client.create_customer(email="cache@example.com")
+        first = cached_client.retrieve_customer(customer.id)
+        second = cached_client.retrieve_customer(customer.id)
+        assert second.json() == first.json()
+        assert second.json() is not first.json()
+        assert cached_client.sent.count("GET /v1/customers/{id}") == 1
+        assert cached_client.cache_stats()["hits"] == 1
+
+    @pytest.mark.client
+    def test_writes_invalidate(self, cached_client):
+        customer = cached_client.create_customer(email="cache@example.com")
+        cached_client.retrieve_customer(customer.id)
+        cached_client.update_customer(customer.id, name="Changed")
+        assert cached_client.retrieve_customer(customer.id).name == "Changed"
+        cached_client.delete_customer(customer.id)
+        assert cached_client.retrieve_customer(customer.id).json()["deleted"] is True
+
+    @pytest.mark.client
+    def test_refund_invalidates_its_charge(self, cached_client):
+        charge = cached_client.create_charge(amount=1000, currency="usd")
+        assert cached_client.retrieve_charge(charge.id).amount_refunded == 0
+        cached_client.create_refund(charge=charge.id, amount=400)
+        assert cached_client.retrieve_charge(charge.id).amount_refunded == 400
+
+    @pytest.mark.client
+    def test_errors_are_not_cached(self, cached_client):
+        for _ in range(2):
+            assert_status_code(cached_client.retrieve_charge("ch_missing"), StatusCodes.NOT_FOUND)
+        assert cached_client.sent.count("GET /v1/charges/{id}") == 2
@@ -0,0 +1,109 @@
+import pytest
+from src.api_client import StripeClient
+from src.cassette import MAGIC, Cassette, CassetteAdapter, CassetteMiss, request_keys
+from src.helpers import assert_status_code, get_data
+from src.retry import RetryPolicy
+from src.transport import PooledHTTPAdapter, build_session
+
+OFFLINE_URL = "http://127.0.0.1:9"
+
+def recording_client(path):
+    adapter = CassetteAdapter(Cassette(str(path)), "record", inner=PooledHTTPAdapter())
+    return StripeClient(session=build_session(adapter))
+
+def replaying_client(path):
+    adapter = CassetteAdapter(Cassette(str(path)).load(), "replay")
+    return StripeClient(base_url=OFFLINE_URL, session=build_session(adapter), retry_policy=RetryPolicy(max_retries=0))
+
+class TestCassette:
+    @pytest.mark.client
+    def test_request_keys_ignore_param_order_and_host(self):
+        first, _ = request_keys("post", "http://x/v1/customers/cus_1", "name=a&email=b")
+        second, _ = request_keys("POST", "http://y/v1/customers/cus_1", b"email=b&name=a")
+        assert first == second
+        assert request_keys("GET", "http://x/v1/charges?limit=1", None) != request_keys("GET", "http://x/v1/charges?limit=2", None)
+
+    @pytest.mark.client
+    def test_loose_key_ignores_object_ids(self):
+        exact, loose = request_keys("POST", "http://x/v1/refunds/re_1", "charge=ch_abc&amount=5")
+        other_exact, other_loose = request_keys("POST", "http://x/v1/refunds/re_2", "charge=ch_xyz&amount=5")
+        assert exact != other_exact
+        assert loose == other_loose
+        assert loose[1] == "/v1/refunds/{id}"
+        assert request_keys("POST", "http://x/v1/refunds", "amount=6")[1] != request_keys("POST", "http://x/v1/refunds", "amount=5")[1]
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_replay_serves_recorded_responses_offline(self, tmp_path, sample_customer_data):
+        path = tmp_path / "run.cassette"
+        with recording_client(path) as client:
+            created = client.create_customer(**sample_customer_data)
+            retrieved = client.retrieve_customer(get_data(created)["id"])
+            listed = client.list_charges(limit=2)
+        assert path.read_bytes().startswith(MAGIC)
+
+        with replaying_client(path) as client:
+            replayed = client.create_customer(**sample_customer_data)
+            assert_status_code(replayed, created.status_code)
+            assert replayed.content == created.content
+            assert replayed.id == created.id
+            assert client.retrieve_customer(replayed.id).content == retrieved.content
+            assert client.list_charges(limit=2).content == listed.content
+            # Every recording of the endpoint has been served.
+            with pytest.raises(CassetteMiss):
+                client.retrieve_customer("cus_other")
+
+        with replaying_client(path) as client:
+            # An unrecorded id gets a recording of the same endpoint, as that object.
+            other = client.retrieve_customer("cus_other")
+            assert other.id == "cus_other"
+            assert other.content == retrieved.content.replace(created.id.encode(), b"cus_other")
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_repeated_requests_replay_in_order_then_miss(self, tmp_path):
+        path = tmp_path / "order.cassette"
+        with recording_client(path) as client:
+            first = client.create_customer(email="a@example.com")
+            second = client.create_customer(email="a@example.com")
+
+        cassette = Cassette(str(path)).load()
+        assert len(cassette) == 2
+        keys = request_keys("POST", OFFLINE_URL + "/v1/customers", "email=a%40example.com")
+        assert cassette.lookup(keys)[1] == first.content
+        assert cassette.lookup(keys)[1] == second.content
+        assert cassette.lookup(keys) is None
+        assert cassette.stats()["misses"] == 1
+        cassette.rewind()
+        assert cassette.lookup(keys)[1] == first.content
+        cassette.close()
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_unrecorded_request_raises(self, tmp_path):
+        path = tmp_path / "empty.cassette"
+        with recording_client(path) as client:
+            client.list_customers(limit=1)
+        with replaying_client(path) as client:
+            with pytest.raises(CassetteMiss):
+                client.list_refunds(limit=1)
+            assert client.session.get_adapter(OFFLINE_URL).cassette.stats()["misses"] == 1
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_torn_final_record_is_skipped(self, tmp_path):
+        path = tmp_path / "torn.cassette"
+        with recording_client(path) as client:
+            client.list_customers(limit=1)
+            client.list_charges(limit=1)
+        path.write_bytes(path.read_bytes()[:-5])
+        cassette = Cassette(str(path)).load()
+        assert len(cassette) == 1
+        cassette.close()
+
+    @pytest.mark.client
+    def test_rejects_non_cassette_files(self, tmp_path):
+        path = tmp_path / "bogus.cassette"
+        path.write_bytes(b"not a cassette")
+        with pytest.raises(ValueError):
+            Cassette(str(path)).load()
@@ -1,18 +1,6 @@
 import pytest
-import json
 from config.constants import ObjectPrefix
-from src.helpers import assert_id_prefix
-
-def get_data(response):
-    if isinstance(response, dict):
-        return response
-    elif isinstance(response, str):
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"id": response}
-    else:
-        return response.json()
+from src.helpers import get_data, assert_id_prefix
 
 class TestChargesCreate:
     @pytest.mark.charges
@@ -22,18 +10,21 @@ class TestChargesCreate:
         assert_id_prefix(data, ObjectPrefix.CHARGE)
     
     @pytest.mark.charges
+    @pytest.mark.stripe_mock
     def test_charge_create_missing_amount(self, api_client):
         response = api_client.create_charge(amount = None, currency="usd")
         data = get_data(response)
         assert "id" in data
     
     @pytest.mark.charges
+    @pytest.mark.stripe_mock
     def test_charge_create_invalid_amount(self, api_client):
         response = api_client.create_charge(amount=-100, currency="usd")
         data = get_data(response)
         assert "id" in data
     
     @pytest.mark.charges
+    @pytest.mark.stripe_mock
     def test_charge_create_no_currency(self, api_client):
         response = api_client.create_charge(amount=2000, currency = None)
         data = get_data(response)
@@ -48,6 +39,7 @@ class TestChargesRetrieve:
         assert data["id"] == charge_id
     
     @pytest.mark.charges
+    @pytest.mark.stripe_mock
     def test_charge_retrieve_not_found(self, api_client):
         response = api_client.retrieve_charge("ch_invalid")
         data = get_data(response)
@@ -75,6 +67,7 @@ class TestChargesUpdate:
 
 class TestChargesCapture:
     @pytest.mark.charges
+    @pytest.mark.stripe_mock
     def test_charge_capture_success(self, api_client, created_charge):
         charge_id = get_data(created_charge)["id"]
         response = api_client.capture_charge(charge_id)
@@ -82,6 +75,7 @@ class TestChargesCapture:
         assert "id" in data
     
     @pytest.mark.charges
+    @pytest.mark.stripe_mock
     def test_charge_capture_not_found(self, api_client):
         response = api_client.capture_charge("ch_invalid")
         data = get_data(response)
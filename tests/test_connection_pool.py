@@ -0,0 +1,29 @@
+import pytest
+from config.constants import StatusCodes
+from src.api_client import StripeClient
+from src.helpers import assert_status_code
+
+class TestConnectionPool:
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_connections_are_reused(self):
+        with StripeClient() as client:
+            for _ in range(5):
+                assert_status_code(client.list_customers(limit=1), StatusCodes.OK)
+            stats = client.pool_stats()
+        assert stats["requests"] == 5
+        assert stats["misses"] == 1
+        assert stats["hits"] == 4
+
+    @pytest.mark.client
+    def test_pool_stats_start_empty(self):
+        with StripeClient() as client:
+            assert client.pool_stats() == {"requests": 0, "hits": 0, "misses": 0}
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_closed_client_drops_pooled_connections(self):
+        client = StripeClient()
+        client.list_charges(limit=1)
+        client.close()
+        assert client.pool_stats()["requests"] == 1
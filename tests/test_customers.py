@@ -1,18 +1,6 @@
 import pytest
-import json
 from config.constants import StatusCodes, ObjectPrefix
-from src.helpers import assert_status_code, assert_id_prefix
-
-def get_data(response):
-    if isinstance(response, dict):
-        return response
-    elif isinstance(response, str):
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"id": response}
-    else:
-        return response.json()
+from src.helpers import get_data, assert_status_code, assert_id_prefix
 
 class TestCustomersCreate:
     @pytest.mark.customers
@@ -32,6 +20,7 @@ class TestCustomersCreate:
             assert "id" in data
     
     @pytest.mark.customers
+    @pytest.mark.stripe_mock
     def test_customer_create_invalid_email(self, api_client):
         response = api_client.create_customer(email="invalid-email", name="Test")
         data = get_data(response)
@@ -52,6 +41,7 @@ class TestCustomersRetrieve:
         assert data["id"] == customer_id
     
     @pytest.mark.customers
+    @pytest.mark.stripe_mock
     def test_customer_retrieve_not_found(self, api_client):
         response = api_client.retrieve_customer("cus_invalid")
         data = get_data(response)
@@ -80,6 +70,7 @@ class TestCustomersDelete:
         assert "id" in data
     
     @pytest.mark.customers
+    @pytest.mark.stripe_mock
     def test_customer_delete_not_found(self, api_client):
         response = api_client.delete_customer("cus_invalid")
         data = get_data(response)
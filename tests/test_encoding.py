@@ -0,0 +1,51 @@
+import pytest
+from urllib.parse import parse_qsl
+from src.encoding import encode_form, encode_query, flatten
+
+class TestFormEncoding:
+    @pytest.mark.client
+    def test_flat_params(self):
+        assert encode_form({"amount": 2000, "currency": "usd"}) == b"amount=2000&currency=usd"
+
+    @pytest.mark.client
+    def test_nested_dicts_and_lists(self):
+        data = {
+            "shipping": {"name": "Jenny", "address": {"line1": "1 Main St", "city": "SF"}},
+            "expand": ["customer", "latest_charge"],
+            "items": [{"price": "price_1", "quantity": 2}],
+        }
+        assert parse_qsl(encode_form(data).decode()) == [
+            ("shipping[name]", "Jenny"),
+            ("shipping[address][line1]", "1 Main St"),
+            ("shipping[address][city]", "SF"),
+            ("expand[]", "customer"),
+            ("expand[]", "latest_charge"),
+            ("items[0][price]", "price_1"),
+            ("items[0][quantity]", "2"),
+        ]
+
+    @pytest.mark.client
+    def test_booleans_and_none(self):
+        keys, values = flatten({"capture": False, "confirm": True, "description": None})
+        assert keys == ("capture", "confirm")
+        assert values == ["false", "true"]
+
+    @pytest.mark.client
+    def test_special_characters_are_quoted(self):
+        body = encode_form({"metadata": {"order id": "a&b=c"}, "email": "x+y@example.com"})
+        assert parse_qsl(body.decode()) == [("metadata[order id]", "a&b=c"), ("email", "x+y@example.com")]
+
+    @pytest.mark.client
+    def test_raw_bodies_pass_through(self):
+        assert encode_form("invalid json") == "invalid json"
+        assert encode_form(None) is None
+        assert encode_query({}) is None
+
+    @pytest.mark.customers
+    def test_nested_params_reach_server(self, api_client):
+        response = api_client.create_customer(
+            email="nested@example.com",
+            metadata={"order": "42"},
+            shipping={"name": "Jenny", "address": {"line1": "1 Main St"}},
+        )
+        assert response.json()["metadata"]["order"] == "42"
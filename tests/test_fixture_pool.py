@@ -0,0 +1,117 @@
+import itertools
+import threading
+import pytest
+from src.fixture_pool import FixturePool
+
+class FakeResponse:
+    def __init__(self, object_id, status_code=200):
+        self.id = object_id
+        self.status_code = status_code
+
+def counting_factory(before=None, status_code=200):
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    def create():
+        if before is not None:
+            before()
+        with lock:
+            return FakeResponse(f"obj_{next(counter)}", status_code)
+    return create
+
+def settle(pool):
+    # Wait for every background create submitted so far; nothing new can start.
+    pool._executor.shutdown(wait=True)
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(factories, **kwargs):
+        pool = FixturePool(factories, **kwargs)
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.close()
+
+class TestFixturePool:
+    @pytest.mark.client
+    def test_prefill_creates_in_parallel(self, make_pool):
+        # All 8 creates must be running at once to get past the barrier, and
+        # none finishes before prefill() has returned.
+        barrier, gate = threading.Barrier(8, timeout=10), threading.Event()
+        pool = make_pool({"created_customer": counting_factory(lambda: (barrier.wait(), gate.wait(10)))},
+                         size=8, max_workers=8)
+        # Demand of 8: no top-up after the takes, which would wait at the barrier.
+        pool.prefill({"created_customer": 8})
+        assert pool.stats()["created"] == 0
+        gate.set()
+        taken = [pool.take("created_customer") for _ in range(8)]
+        assert len({response.id for response in taken}) == 8
+        assert pool.stats()["created"] == 8
+        assert pool.stats()["fallbacks"] == 0
+
+    @pytest.mark.client
+    def test_each_object_is_handed_out_once(self, make_pool):
+        pool = make_pool({"created_charge": counting_factory()}, size=4)
+        pool.prefill()
+        ids = [pool.take("created_charge").id for _ in range(20)]
+        assert len(set(ids)) == 20
+
+    @pytest.mark.client
+    def test_refills_in_background_when_low(self, make_pool):
+        pool = make_pool({"created_charge": counting_factory()}, size=4, low_water=1)
+        pool.prefill()
+        for _ in range(3):
+            pool.take("created_charge")
+        settle(pool)
+        assert pool.stats()["created"] == 7
+        assert pool.stats()["ready"]["created_charge"] == 4
+
+    @pytest.mark.client
+    def test_demand_caps_creates(self, make_pool):
+        pool = make_pool({"created_refund": counting_factory(), "created_customer": counting_factory()}, size=8)
+        pool.prefill({"created_refund": 3})
+        for _ in range(3):
+            pool.take("created_refund")
+        settle(pool)
+        assert pool.stats()["created"] == 3
+        assert pool.stats()["fallbacks"] == 0
+
+    @pytest.mark.client
+    def test_failed_background_create_falls_back_to_inline(self, make_pool):
+        calls = []
+
+        def create():
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                return FakeResponse("obj_err", status_code=500)
+            return FakeResponse(f"obj_{len(calls)}")
+        pool = make_pool({"created_charge": create}, size=1, max_workers=1)
+        pool.prefill({"created_charge": 1})
+        assert pool.take("created_charge").id == "obj_2"
+        assert calls[1] == threading.current_thread().name
+        assert pool.stats()["fallbacks"] == 1
+
+    @pytest.mark.client
+    def test_close_cancels_pending_creates(self, make_pool):
+        started, gate = threading.Event(), threading.Event()
+        pool = make_pool({"created_customer": counting_factory(lambda: (started.set(), gate.wait(10)))},
+                         size=8, max_workers=1)
+        pool.prefill()
+        started.wait(10)
+        running, *queued = pool._queues["created_customer"]
+        finished = threading.Semaphore(0)
+        for future in queued:
+            future.add_done_callback(lambda _: finished.release())
+        closer = threading.Thread(target=pool.close)
+        closer.start()
+        # The one worker is busy with the first create until the gate opens,
+        # so the rest can only have finished by close() cancelling them.
+        assert all(finished.acquire(timeout=10) for _ in queued)
+        gate.set()
+        closer.join(10)
+        assert all(future.cancelled() for future in queued)
+        assert running.result().id == "obj_1"
+        assert pool.stats()["created"] == 1
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import pytest
+from config.constants import Endpoints
+from config.settings import settings
+from src.api_client import StripeClient
+from src.async_client import AsyncStripeClient
+from src.impact import ImpactRecorder, ImpactSelection, ImportGraph, expand_endpoints, load_impact_map
+from src.mock_server import InProcessAdapter, MockServer
+from src.transport import build_session
+
+class FakeItem:
+    def __init__(self, nodeid, fixturenames=(), smoke=False):
+        self.nodeid = nodeid
+        self.fixturenames = list(fixturenames)
+        self.smoke = smoke
+
+    def get_closest_marker(self, name):
+        return object() if name == "smoke" and self.smoke else None
+
+def write(root, path, text=""):
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text)
+
+@pytest.fixture
+def tree(tmp_path):
+    write(tmp_path, "src/__init__.py")
+    write(tmp_path, "src/client.py", "import json\n")
+    write(tmp_path, "src/extra.py", "from src.client import thing\n")
+    write(tmp_path, "conftest.py", "from src import client\n")
+    write(tmp_path, "tests/test_a.py", "import pytest\n")
+    write(tmp_path, "tests/test_b.py", "from src.extra import x\n")
+    return tmp_path
+
+MAP = {
+    "tests/test_a.py::test_refund": [Endpoints.REFUND],
+    "tests/test_a.py::test_customer": [Endpoints.CUSTOMERS],
+    "tests/test_a.py::test_unit": [],
+    "tests/test_b.py::test_charge": [Endpoints.CHARGES],
+}
+
+def selected(selection, items):
+    return [item.nodeid for item in items if selection.reason(item)]
+
+async def async_requests():
+    async with AsyncStripeClient(base_url="http://mock.local") as client:
+        await client.create_customer(email="impact@example.com")
+        await client.list_charges()
+
+class TestImpactSelection:
+    @pytest.mark.client
+    def test_expand_endpoints(self):
+        assert expand_endpoints(["refunds"]) == {Endpoints.REFUNDS, Endpoints.REFUND, Endpoints.CANCEL_REFUND}
+        assert expand_endpoints(["/v1/charges/ch_1/capture", "CUSTOMER"]) == {Endpoints.CAPTURE_CHARGE, Endpoints.CUSTOMER}
+        with pytest.raises(ValueError):
+            expand_endpoints(["refund"])
+
+    @pytest.mark.client
+    def test_import_closure(self, tree):
+        graph = ImportGraph(str(tree))
+        assert graph.closure("tests/test_b.py") == {"tests/test_b.py", "src/extra.py", "src/client.py"}
+        assert graph.closure("tests/test_a.py") == {"tests/test_a.py"}
+
+    @pytest.mark.client
+    def test_endpoint_change_selects_tests_that_touch_it(self, tree):
+        items = [FakeItem(nodeid) for nodeid in MAP] + [
+            FakeItem("tests/test_a.py::test_smoke", smoke=True),
+            FakeItem("tests/test_a.py::test_new"),
+            FakeItem("tests/test_a.py::test_pooled", fixturenames=["created_refund"]),
+        ]
+        recorded = {**MAP, "tests/test_a.py::test_pooled": []}
+        selection = ImpactSelection(str(tree), expand_endpoints(["refunds"]), [], recorded)
+        assert selected(selection, items) == [
+            "tests/test_a.py::test_refund", "tests/test_a.py::test_smoke",
+            "tests/test_a.py::test_new", "tests/test_a.py::test_pooled",
+        ]
+
+    @pytest.mark.client
+    def test_module_change_selects_importers(self, tree):
+        items = [FakeItem(nodeid) for nodeid in MAP]
+        assert selected(ImpactSelection(str(tree), set(), ["src/extra.py"], MAP), items) == ["tests/test_b.py::test_charge"]
+        assert selected(ImpactSelection(str(tree), set(), ["tests/test_a.py", "README.md"], MAP), items) == [
+            "tests/test_a.py::test_refund", "tests/test_a.py::test_customer", "tests/test_a.py::test_unit"]
+        # conftest.py and what it imports are under every test.
+        assert len(selected(ImpactSelection(str(tree), set(), ["src/client.py"], MAP), items)) == 4
+        assert len(selected(ImpactSelection(str(tree), set(), ["pytest.ini"], MAP), items)) == 4
+
+class TestImpactRecorder:
+    @pytest.mark.client
+    def test_records_templates_per_test_and_fixture(self, tmp_path, monkeypatch):
+        # The async client picks its backend from settings; keep it in-process.
+        monkeypatch.setattr(settings, "CASSETTE_MODE", "off")
+        monkeypatch.setattr(settings, "MOCK_BACKEND", "inprocess")
+        original = StripeClient._request
+        recorder = ImpactRecorder()
+        recorder.install()
+        client = StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(MockServer())))
+        try:
+            recorder.running = "tests/test_x.py::test_one"
+            recorder.current = "fixture:shared_customer"
+            customer = client.create_customer(email="impact@example.com")
+            recorder.current = "tests/test_x.py::test_one"
+            client.retrieve_customer(customer.id)
+            client.get("/v1/refunds/re_missing")
+            recorder.current = None
+            client.list_charges()
+            recorder.running = "tests/test_x.py::test_async"
+            asyncio.run(async_requests())
+        finally:
+            recorder.uninstall()
+            client.close()
+        path = str(tmp_path / "impact.json")
+        recorder.save(path, [FakeItem("tests/test_x.py::test_one", ["shared_customer"]), FakeItem("tests/test_x.py::test_two")])
+        assert load_impact_map(path) == {
+            "tests/test_x.py::test_one": [Endpoints.CUSTOMERS, Endpoints.CUSTOMER, Endpoints.REFUND],
+            "tests/test_x.py::test_two": [],
+        }
+        assert json.loads((tmp_path / "impact.json").read_text())["version"] == 1
+        # One call per request sent, whichever layer saw it.
+        assert recorder.calls == {"tests/test_x.py::test_one": 4, "tests/test_x.py::test_async": 2}
+        assert StripeClient._request is original
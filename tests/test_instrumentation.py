@@ -0,0 +1,88 @@
+import socket
+from urllib.parse import urlsplit
+import pytest
+import requests
+from config.constants import Endpoints
+from config.settings import settings
+from src.api_client import StripeClient
+from src.instrumentation import HistogramCollector, LatencyHistogram
+from src.retry import RetryPolicy
+
+class TestHooks:
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_hooks_receive_timings(self):
+        events = []
+        with StripeClient() as client:
+            client.add_hook("before_request", lambda event: events.append(("before", event)))
+            client.add_hook("after_response", lambda event, response: events.append(("after", event)))
+            client.create_customer(email="hooks@example.com")
+            client.retrieve_customer("cus_123")
+
+        assert [stage for stage, _ in events] == ["before", "after", "before", "after"]
+        first, second = events[1][1], events[3][1]
+        assert first.template == Endpoints.CUSTOMERS
+        assert first.request_size > 0 and first.response_size > 0
+        assert first.connect is not None
+        assert second.template == Endpoints.CUSTOMER
+        assert second.connect is None  # reused the pooled connection
+        assert 0 < second.ttfb <= second.total
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_dns_is_only_timed_for_hooks(self, monkeypatch):
+        lookups = []
+        getaddrinfo = socket.getaddrinfo
+        monkeypatch.setattr(socket, "getaddrinfo", lambda host, *args, **kwargs: (
+            lookups.append(host), getaddrinfo(host, *args, **kwargs))[1])
+        base_url = f"http://localhost:{urlsplit(settings.BASE_URL).port}"
+        with StripeClient(base_url=base_url) as client:
+            client.list_charges(limit=1)
+        # Only urllib3's own lookup when nothing reads the timings.
+        assert lookups == ["localhost"]
+
+        events = []
+        with StripeClient(base_url=base_url) as client:
+            client.add_hook("after_response", lambda event, response: events.append(event))
+            client.list_charges(limit=1)
+        assert lookups == ["localhost"] * 3
+        assert events[0].dns is not None
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_on_error_hook(self):
+        errors = []
+        with StripeClient(base_url="http://127.0.0.1:1", retry_policy=RetryPolicy(max_retries=0)) as client:
+            client.add_hook("on_error", lambda event, error: errors.append((event, error)))
+            with pytest.raises(requests.ConnectionError):
+                client.list_charges()
+        assert len(errors) == 1
+        assert errors[0][0].template == Endpoints.CHARGES
+
+    @pytest.mark.client
+    def test_unknown_hook_rejected(self, api_client):
+        with pytest.raises(ValueError):
+            api_client.add_hook("after_everything", print)
+
+class TestHistogramCollector:
+    @pytest.mark.client
+    def test_collects_per_template(self):
+        collector = HistogramCollector()
+        with StripeClient() as client:
+            client.hooks.register(collector)
+            for customer_id in ("cus_1", "cus_2", "cus_3"):
+                client.retrieve_customer(customer_id)
+            client.list_customers()
+        snapshot = collector.snapshot()
+        assert snapshot[f"GET {Endpoints.CUSTOMER}"]["count"] == 3
+        assert snapshot[f"GET {Endpoints.CUSTOMERS}"]["count"] == 1
+        assert collector.request_count == 4
+
+    @pytest.mark.client
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000, False, 0, 0)
+        assert histogram.percentile(50) == pytest.approx(0.050, rel=0.1)
+        assert histogram.percentile(99) == pytest.approx(0.099, rel=0.1)
+        assert histogram.percentile(100) == pytest.approx(0.100)
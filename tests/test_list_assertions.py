@@ -0,0 +1,84 @@
+import pytest
+from config.constants import RefundStatus
+from src.api_client import StripeClient
+from src.helpers import ITEM_SPECS, ItemSpec, assert_list_items, list_violations
+from src.mock_server import InProcessAdapter, MockServer
+from src.transport import build_session
+
+def page(*items, object_name="list"):
+    return {"object": object_name, "data": list(items), "has_more": False}
+
+def charge(charge_id="ch_1", **fields):
+    return {"id": charge_id, "object": "charge", "amount": 500, "currency": "usd", **fields}
+
+@pytest.fixture
+def mock_client():
+    client = StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(MockServer())))
+    yield client
+    client.close()
+
+class TestListAssertions:
+    @pytest.mark.client
+    def test_valid_page_passes(self):
+        assert_list_items(page(charge(), charge("ch_2", captured=True)), "charge")
+        assert_list_items(page(charge(), object_name="search_result"), "charge")
+
+    @pytest.mark.client
+    def test_every_violation_is_reported(self):
+        bad = page(
+            charge("py_1"),
+            charge(amount="500", currency="xyz"),
+            {"id": "ch_3", "object": "refund"},
+        )
+        violations = list_violations(bad, "charge")
+        assert [(position, field) for position, _, field, _, _ in violations] == [
+            (0, "id"), (1, "amount"), (1, "currency"), (2, "object"), (2, "missing"),
+        ]
+        with pytest.raises(AssertionError) as error:
+            assert_list_items(bad, "charge")
+        message = str(error.value)
+        assert message.startswith("5 list item violation(s)")
+        assert "[1] ch_1: currency is 'xyz', expected one of aud, cad, eur, gbp, jpy, usd" in message
+
+    @pytest.mark.client
+    def test_page_shape(self):
+        violations = list_violations({"object": "charge", "data": None})
+        assert [field for _, _, field, _, _ in violations] == ["object", "data"]
+
+    @pytest.mark.client
+    def test_report_is_truncated(self):
+        with pytest.raises(AssertionError) as error:
+            assert_list_items(page(*[charge(f"x_{i}") for i in range(30)]), "charge", limit=5)
+        assert str(error.value).endswith("... and 25 more")
+
+    @pytest.mark.client
+    def test_custom_spec(self):
+        spec = ITEM_SPECS["refund"].extend(required=("charge",), enums={"status": [RefundStatus.SUCCEEDED]})
+        refund = {"id": "re_1", "object": "refund", "amount": 1, "currency": "usd", "status": RefundStatus.PENDING}
+        violations = list_violations(page(refund), "refund", spec)
+        assert [field for _, _, field, _, _ in violations] == ["missing", "status"]
+        assert not list_violations(page({"id": "x", "object": "thing"}), spec=ItemSpec(required=("id",)))
+
+    @pytest.mark.client
+    def test_pages_items_and_streams(self, mock_client):
+        customer = mock_client.create_customer(email="lists@example.com")
+        for amount in (100, 200, 300):
+            charge_id = mock_client.create_charge(amount=amount, currency="usd", customer=customer.id).id
+            mock_client.create_refund(charge=charge_id, amount=50, reason="duplicate")
+        mock_client.create_payment_intent(amount=900, currency="eur")
+        assert_list_items(mock_client.list_refunds(limit=2), "refund")
+        assert_list_items([mock_client.list_charges(limit=2), mock_client.list_charges(limit=1)], "charge")
+        assert_list_items(mock_client.iter_customers(limit=1), "customer")
+        assert_list_items(mock_client.stream_payment_intents(), "payment_intent")
+        assert_list_items(mock_client.search_charges("amount>100"), "charge")
+
+    @pytest.mark.client
+    @pytest.mark.auth
+    def test_streamed_error_is_not_a_list(self):
+        client = StripeClient(base_url="http://mock.local", api_key="invalid_key",
+                              session=build_session(InProcessAdapter(MockServer())))
+        with client:
+            violations = list_violations(client.stream_charges(limit=3), "charge")
+            assert [(position, field) for position, _, field, _, _ in violations] == [(None, "object"), (None, "data")]
+            with pytest.raises(AssertionError):
+                assert_list_items(client.stream_charges(limit=3), "charge")
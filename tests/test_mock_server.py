@@ -0,0 +1,217 @@
+import pytest
+from config.constants import PaymentIntentStatus, RefundStatus, StatusCodes
+from src.api_client import StripeClient
+from src.helpers import assert_error_response, assert_status_code
+from src.mock_server import InProcessAdapter, MockError, MockServer
+from src.transport import build_session
+
+@pytest.fixture
+def mock_server():
+    return MockServer()
+
+@pytest.fixture
+def mock_client(mock_server):
+    client = StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(mock_server)))
+    yield client
+    client.close()
+
+def assert_error_code(response, status, code):
+    assert_status_code(response, status)
+    assert response.json()["error"]["code"] == code
+
+class TestMockServerObjects:
+    @pytest.mark.client
+    def test_created_objects_are_persisted(self, mock_client, sample_customer_data):
+        created = mock_client.create_customer(**sample_customer_data)
+        assert_status_code(created, StatusCodes.OK)
+        mock_client.update_customer(created.id, name="Renamed", metadata={"tier": "gold"})
+        retrieved = mock_client.retrieve_customer(created.id)
+        assert retrieved.name == "Renamed"
+        assert retrieved.metadata == {"test_id": "pytest_001", "tier": "gold"}
+        assert retrieved.email == sample_customer_data["email"]
+
+    @pytest.mark.client
+    def test_unknown_ids_are_404(self, mock_client):
+        for response in (
+            mock_client.retrieve_customer("cus_invalid"),
+            mock_client.retrieve_payment_intent("pi_invalid"),
+            mock_client.retrieve_charge("ch_invalid"),
+            mock_client.cancel_refund("re_invalid"),
+        ):
+            assert_error_code(response, StatusCodes.NOT_FOUND, "resource_missing")
+
+    @pytest.mark.client
+    def test_deleted_customer(self, mock_client):
+        customer = mock_client.create_customer(email="gone@example.com")
+        assert mock_client.delete_customer(customer.id).json() == {"id": customer.id, "object": "customer", "deleted": True}
+        assert mock_client.retrieve_customer(customer.id).json()["deleted"] is True
+        assert_status_code(mock_client.update_customer(customer.id, name="x"), StatusCodes.NOT_FOUND)
+        assert customer.id not in [c["id"] for c in mock_client.list_customers(limit=100).data]
+
+    @pytest.mark.client
+    def test_validation_errors(self, mock_client):
+        assert_error_code(mock_client.create_charge(amount=None, currency="usd"), StatusCodes.BAD_REQUEST, "parameter_missing")
+        assert_error_code(mock_client.create_charge(amount=-1, currency="usd"), StatusCodes.BAD_REQUEST, "parameter_invalid_integer")
+        assert_error_code(mock_client.create_customer(email="not-an-email"), StatusCodes.BAD_REQUEST, "email_invalid")
+        assert_error_code(mock_client.create_customer(colour="blue"), StatusCodes.BAD_REQUEST, "parameter_unknown")
+        assert_error_code(mock_client.list_charges(limit=500), StatusCodes.BAD_REQUEST, "parameter_invalid_integer")
+
+    @pytest.mark.client
+    def test_authentication(self, mock_server):
+        for api_key in ("", "invalid_key"):
+            client = StripeClient(api_key=api_key, base_url="http://mock.local", session=build_session(InProcessAdapter(mock_server)))
+            response = client.list_customers()
+            assert_status_code(response, StatusCodes.UNAUTHORIZED)
+            assert_error_response(response, "invalid_request_error")
+
+    @pytest.mark.client
+    def test_unknown_route_is_404(self, mock_client):
+        assert_status_code(mock_client.get("/v1/nonexistent_endpoint"), StatusCodes.NOT_FOUND)
+        assert_status_code(mock_client.delete("/v1/charges/ch_1"), StatusCodes.NOT_FOUND)
+
+    @pytest.mark.client
+    def test_idempotency_key_replays_first_response(self, mock_server, mock_client):
+        headers = {**mock_client.headers, "Idempotency-Key": "order-1"}
+        url = mock_client._build_url("/v1/customers")
+        first = mock_client.session.post(url, data="email=a%40example.com", headers=headers)
+        second = mock_client.session.post(url, data="email=a%40example.com", headers=headers)
+        assert first.json()["id"] == second.json()["id"]
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert len(mock_server.customers) == 1
+
+    @pytest.mark.client
+    def test_idempotent_replay_is_not_affected_by_later_updates(self, mock_client):
+        headers = {**mock_client.headers, "Idempotency-Key": "k1"}
+        url = mock_client._build_url("/v1/customers")
+        first = mock_client.session.post(url, data="name=first", headers=headers)
+        mock_client.update_customer(first.json()["id"], name="second")
+        replay = mock_client.session.post(url, data="name=first", headers=headers)
+        assert replay.headers["Idempotent-Replayed"] == "true"
+        assert replay.content == first.content
+        assert replay.json()["name"] == "first"
+
+class TestMockServerLists:
+    @pytest.mark.client
+    def test_pagination_is_newest_first(self, mock_client):
+        ids = [mock_client.create_customer(email=f"p{i}@example.com").id for i in range(5)]
+        first = mock_client.list_customers(limit=2)
+        assert [c["id"] for c in first.data] == ids[:2:-1][:2]
+        assert first.has_more
+        rest = mock_client.list_customers(limit=10, starting_after=first.data[-1]["id"])
+        assert [c["id"] for c in rest.data] == ids[2::-1]
+        assert not rest.has_more
+        before = mock_client.list_customers(limit=1, ending_before=ids[0])
+        assert [c["id"] for c in before.data] == [ids[1]]
+
+    @pytest.mark.client
+    def test_list_filters_use_indexes(self, mock_client):
+        customer = mock_client.create_customer(email="buyer@example.com")
+        mine = mock_client.create_charge(amount=500, currency="usd", customer=customer.id)
+        mock_client.create_charge(amount=700, currency="usd")
+        assert [c["id"] for c in mock_client.list_charges(customer=customer.id).data] == [mine.id]
+        assert [c["id"] for c in mock_client.list_customers(email="buyer@example.com").data] == [customer.id]
+
+    @pytest.mark.client
+    def test_search(self, mock_client):
+        gold = mock_client.create_customer(email="gold@example.com", name="Ann Gold", metadata={"tier": "gold"})
+        mock_client.create_customer(email="silver@example.com", name="Bob Silver", metadata={"tier": "silver"})
+        assert [c["id"] for c in mock_client.search_customers("metadata['tier']:'gold'").data] == [gold.id]
+        assert [c["id"] for c in mock_client.search_customers("name~'gold' AND email:'gold@example.com'").data] == [gold.id]
+        assert len(mock_client.search_customers("name~'ann' OR name~'bob'").data) == 2
+        mock_client.create_charge(amount=5000, currency="usd")
+        assert len(mock_client.search_charges("amount>=5000 AND currency:'usd'").data) == 1
+        assert_status_code(mock_client.search_customers("colour:'blue'"), StatusCodes.BAD_REQUEST)
+
+    @pytest.mark.client
+    def test_search_pages(self, mock_client):
+        for i in range(3):
+            mock_client.create_customer(email=f"s{i}@example.com", metadata={"batch": "b1"})
+        found = list(mock_client.iter_search_customers("metadata['batch']:'b1'", limit=2))
+        assert len(found) == 3
+
+class TestMockServerStateMachines:
+    @pytest.mark.client
+    def test_payment_intent_automatic_capture(self, mock_client, sample_payment_intent_data):
+        intent = mock_client.create_payment_intent(**sample_payment_intent_data)
+        assert intent.status == PaymentIntentStatus.REQUIRES_PAYMENT_METHOD
+        assert_error_code(mock_client.confirm_payment_intent(intent.id), StatusCodes.BAD_REQUEST, "payment_intent_unexpected_state")
+        confirmed = mock_client.confirm_payment_intent(intent.id, payment_method="pm_card_visa")
+        assert confirmed.status == PaymentIntentStatus.SUCCEEDED
+        assert confirmed.amount_received == sample_payment_intent_data["amount"]
+        assert mock_client.retrieve_charge(confirmed.latest_charge).payment_intent == intent.id
+        assert_error_code(mock_client.cancel_payment_intent(intent.id), StatusCodes.BAD_REQUEST, "payment_intent_unexpected_state")
+        assert_error_code(mock_client.update_payment_intent(intent.id, amount=1), StatusCodes.BAD_REQUEST, "payment_intent_unexpected_state")
+
+    @pytest.mark.client
+    def test_payment_intent_manual_capture(self, mock_client):
+        intent = mock_client.create_payment_intent(
+            amount=1000, currency="usd", capture_method="manual", payment_method="pm_card_visa", confirm=True)
+        assert intent.status == PaymentIntentStatus.REQUIRES_CAPTURE
+        assert intent.amount_capturable == 1000
+        assert_error_code(
+            mock_client.capture_payment_intent(intent.id, amount_to_capture=2000), StatusCodes.BAD_REQUEST, "amount_too_large")
+        captured = mock_client.capture_payment_intent(intent.id, amount_to_capture=600)
+        assert captured.status == PaymentIntentStatus.SUCCEEDED
+        assert captured.amount_received == 600
+        assert_error_code(mock_client.capture_payment_intent(intent.id), StatusCodes.BAD_REQUEST, "payment_intent_unexpected_state")
+
+    @pytest.mark.client
+    def test_payment_intent_cancel(self, mock_client, sample_payment_intent_data):
+        intent = mock_client.create_payment_intent(**sample_payment_intent_data)
+        canceled = mock_client.cancel_payment_intent(intent.id, cancellation_reason="abandoned")
+        assert canceled.status == PaymentIntentStatus.CANCELED
+        assert canceled.cancellation_reason == "abandoned"
+        assert_error_code(
+            mock_client.confirm_payment_intent(intent.id, payment_method="pm_card_visa"),
+            StatusCodes.BAD_REQUEST, "payment_intent_unexpected_state")
+
+    @pytest.mark.client
+    def test_declined_card(self, mock_client, sample_payment_intent_data):
+        intent = mock_client.create_payment_intent(**sample_payment_intent_data)
+        declined = mock_client.confirm_payment_intent(intent.id, payment_method="pm_card_chargeDeclined")
+        assert_status_code(declined, StatusCodes.REQUEST_FAILED)
+        assert_error_response(declined, "card_error")
+        retrieved = mock_client.retrieve_payment_intent(intent.id)
+        assert retrieved.status == PaymentIntentStatus.REQUIRES_PAYMENT_METHOD
+        assert retrieved.last_payment_error["code"] == "card_declined"
+
+    @pytest.mark.client
+    def test_charge_capture_once(self, mock_client):
+        charge = mock_client.create_charge(amount=2000, currency="usd", capture=False)
+        assert charge.captured is False
+        assert_error_code(mock_client.create_refund(charge=charge.id), StatusCodes.BAD_REQUEST, "charge_not_refundable")
+        assert mock_client.capture_charge(charge.id).captured is True
+        assert_error_code(mock_client.capture_charge(charge.id), StatusCodes.BAD_REQUEST, "charge_already_captured")
+
+    @pytest.mark.client
+    def test_refunds_track_charge_balance(self, mock_client):
+        charge = mock_client.create_charge(amount=2000, currency="usd")
+        assert_error_code(mock_client.create_refund(charge=charge.id, amount=5000), StatusCodes.BAD_REQUEST, "amount_too_large")
+        partial = mock_client.create_refund(charge=charge.id, amount=500, reason="duplicate")
+        assert partial.status == RefundStatus.SUCCEEDED
+        rest = mock_client.create_refund(charge=charge.id)
+        assert rest.amount == 1500
+        refunded = mock_client.retrieve_charge(charge.id)
+        assert refunded.amount_refunded == 2000 and refunded.refunded is True
+        assert_error_code(mock_client.create_refund(charge=charge.id), StatusCodes.BAD_REQUEST, "charge_already_refunded")
+        assert_error_code(mock_client.cancel_refund(partial.id), StatusCodes.BAD_REQUEST, "refund_unexpected_state")
+        assert [r["id"] for r in mock_client.list_refunds(charge=charge.id).data] == [rest.id, partial.id]
+
+    @pytest.mark.client
+    def test_refund_by_payment_intent(self, mock_client):
+        intent = mock_client.create_payment_intent(amount=900, currency="usd", payment_method="pm_card_visa", confirm=True)
+        refund = mock_client.create_refund(payment_intent=intent.id)
+        assert refund.charge == intent.latest_charge
+        assert refund.amount == 900
+
+    @pytest.mark.client
+    def test_refund_cancel_restores_charge(self, mock_server, mock_client):
+        charge = mock_client.create_charge(amount=2000, currency="usd")
+        refund = mock_client.create_refund(charge=charge.id, instructions_email="a@example.com")
+        assert refund.status == RefundStatus.REQUIRES_ACTION
+        assert mock_client.retrieve_charge(charge.id).amount_refunded == 2000
+        canceled = mock_client.cancel_refund(refund.id)
+        assert canceled.status == RefundStatus.CANCELED
+        assert mock_client.retrieve_charge(charge.id).amount_refunded == 0
+        with pytest.raises(MockError):
+            mock_server.set_refund_status(refund.id, RefundStatus.SUCCEEDED)
@@ -0,0 +1,61 @@
+import pytest
+from config.constants import Endpoints, ErrorType, StatusCodes
+from src.api_client import StripeClient
+from src.mock_server import InProcessAdapter, MockServer
+from src.negative import PARAMS, NegativeExplorer, generate, matrix, operations
+from src.transport import build_session
+
+SEEDS = {"customer": "cus_1", "charge": "ch_1", "refund": "re_1", "payment_intent": "pi_1"}
+
+class OkResponse:
+    status_code = StatusCodes.OK
+
+@pytest.fixture
+def mock_client():
+    client = StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(MockServer())))
+    yield client
+    client.close()
+
+class TestNegativeExplorer:
+    @pytest.mark.error_handling
+    def test_every_create_and_update_method_has_a_matrix(self):
+        methods = {name for name in dir(StripeClient)
+                   if name.startswith(("create_", "update_")) and not name.endswith("_many")}
+        assert set(operations()) == set(PARAMS) == methods
+
+    @pytest.mark.error_handling
+    def test_cases_go_from_single_mutations_to_the_full_matrix(self):
+        domains = matrix("update_refund", SEEDS)
+        assert [len(values) for values in domains] == [2, 3, 2]
+        cases = list(generate("update_refund", domains, max_order=3))
+        assert len(cases) == 2 * 3 * 2
+        assert (cases[0].object_id, cases[0].data, cases[0].mutations) == ("re_1", {"metadata": {"source": "negative"}}, ())
+        assert [len(case.mutations) for case in cases] == [0] + [1] * 4 + [2] * 5 + [3] * 2
+        assert not cases[0].expect_error and cases[1].expect_error
+        assert len(list(generate("update_refund", domains, max_order=1))) == 5
+
+    @pytest.mark.error_handling
+    def test_explores_every_endpoint_and_keeps_one_case_per_signature(self, mock_client):
+        run = NegativeExplorer(mock_client, time_budget=10, max_workers=8).run()
+        assert run.ok, run.report()
+        assert run.rejected_valid == []
+        assert run.sent > len(run.signatures) and run.pruned > 0
+        assert {template for template, status, _, _ in run.signatures if status == StatusCodes.OK} == {
+            Endpoints.PAYMENT_INTENTS, Endpoints.PAYMENT_INTENT, Endpoints.CUSTOMERS, Endpoints.CUSTOMER,
+            Endpoints.REFUNDS, Endpoints.REFUND, Endpoints.CHARGES, Endpoints.CHARGE}
+        invalid = ErrorType.INVALID_REQUEST
+        example = run.signatures[(Endpoints.CHARGES, StatusCodes.BAD_REQUEST, invalid, "currency")]
+        assert dict(example.mutations)["currency"] in ("invalid", "missing")
+        assert (Endpoints.CUSTOMER, StatusCodes.NOT_FOUND, invalid, "id") in run.signatures
+        assert (Endpoints.REFUNDS, StatusCodes.BAD_REQUEST, invalid, "not_a_param") in run.signatures
+
+    @pytest.mark.error_handling
+    def test_operations_without_new_signatures_stop_early(self, mock_client, monkeypatch):
+        explorer = NegativeExplorer(mock_client, patience=5, max_workers=2)
+        monkeypatch.setattr(explorer, "_send", lambda case: OkResponse())
+        run = explorer.run()
+        assert sorted(run.saturated) == operations()
+        assert len(run.signatures) == len(operations())
+        # Results come back up to a window (2 * max_workers) late, one per operation at worst.
+        assert run.sent <= len(operations()) * (5 + 2) + 2 * 2
+        assert run.sent < sum(len(list(generate(name, matrix(name, SEEDS), 3))) for name in operations()) / 10
@@ -0,0 +1,58 @@
+import itertools
+import pytest
+from src.pagination import SEARCH_CURSOR, auto_paging_iter
+
+class FakePage:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+def make_list_source(total, calls):
+    def fetch(limit, starting_after=None):
+        calls.append(starting_after)
+        start = 0 if starting_after is None else int(starting_after.split("_")[1]) + 1
+        ids = range(start, min(start + limit, total))
+        return FakePage({"object": "list", "data": [{"id": f"cus_{i}"} for i in ids], "has_more": start + limit < total})
+    return fetch
+
+class TestAutoPagination:
+    @pytest.mark.client
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_iterates_every_page(self, prefetch):
+        calls = []
+        items = list(auto_paging_iter(make_list_source(25, calls), {"limit": 10}, prefetch=prefetch))
+        assert [item["id"] for item in items] == [f"cus_{i}" for i in range(25)]
+        assert calls == [None, "cus_9", "cus_19"]
+
+    @pytest.mark.client
+    def test_stops_fetching_when_consumer_breaks(self):
+        calls = []
+        iterator = auto_paging_iter(make_list_source(1000, calls), {"limit": 10})
+        assert len(list(itertools.islice(iterator, 5))) == 5
+        iterator.close()
+        assert len(calls) <= 2
+
+    @pytest.mark.client
+    def test_search_follows_next_page(self):
+        pages = {None: ("a", "b"), "p2": ("c",)}
+        def fetch(query, limit, page=None):
+            ids = pages[page]
+            return FakePage({"object": "search_result", "data": [{"id": i} for i in ids],
+                             "has_more": page is None, "next_page": "p2" if page is None else None})
+        items = auto_paging_iter(fetch, {"query": "email:'x'", "limit": 2}, cursor=SEARCH_CURSOR)
+        assert [item["id"] for item in items] == ["a", "b", "c"]
+
+    @pytest.mark.customers
+    def test_iter_customers(self, api_client):
+        for customer in itertools.islice(api_client.iter_customers(limit=3), 10):
+            assert customer["object"] == "customer"
+
+    @pytest.mark.charges
+    def test_iter_search_charges(self, api_client):
+        for charge in api_client.iter_search_charges("amount>100", limit=3):
+            assert charge["object"] == "charge"
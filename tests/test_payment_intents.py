@@ -1,19 +1,6 @@
 import pytest
-import json
 from config.constants import StatusCodes, ObjectPrefix
-from src.helpers import assert_id_prefix
-
-def get_data(response):
-    if isinstance(response, dict):
-        return response
-    elif isinstance(response, str):
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Assume it's the ID string
-            return {"id": response}
-    else:
-        return response.json()
+from src.helpers import get_data, assert_id_prefix
 
 class TestPaymentIntentsCreate:
     @pytest.mark.payment_intents
@@ -42,6 +29,7 @@ class TestPaymentIntentsRetrieve:
         assert data["id"] == pi_id
     
     @pytest.mark.payment_intents
+    @pytest.mark.stripe_mock
     def test_retrieve_not_found(self, api_client):
         response = api_client.retrieve_payment_intent("pi_invalid")
         data = get_data(response)
@@ -0,0 +1,101 @@
+import pytest
+from src.api_client import StripeClient
+from src.mock_server import InProcessAdapter, MockServer
+from src.postman import PostmanCollection, PostmanRunner, load_collection, parse_test_script, substitute
+from src.transport import build_session
+
+COLLECTION = load_collection()
+
+def item(name, method, path, body=None, tests=(), token="{{STRIPE_API_KEY}}"):
+    request = {"method": method, "url": {"raw": "{{STRIPE_MOCK_URL}}" + path},
+               "auth": {"type": "bearer", "bearer": [{"key": "token", "value": token}]}}
+    if body:
+        request["body"] = {"mode": "urlencoded", "urlencoded": [{"key": k, "value": v} for k, v in body.items()]}
+    return {"name": name, "request": request, "event": [{"listen": "test", "script": {"exec": list(tests)}}]}
+
+def collection(*folders):
+    return PostmanCollection({"info": {"name": "flows"},
+                              "item": [{"name": name, "item": list(items)} for name, items in folders]})
+
+CUSTOMERS = ("Customers", [
+    item("Create", "POST", "/v1/customers", {"email": "pm@example.com"}, [
+        'pm.test("Status is 200", () => {pm.response.to.have.status(200);});',
+        'pm.environment.set("customer_id", pm.response.json().id);']),
+    item("Rename", "POST", "/v1/customers/{{customer_id}}", {"name": "renamed"}, [
+        'pm.test("Name", () => { const data = pm.response.json();',
+        '  pm.expect(data.name).to.eql("renamed");',
+        '  pm.expect(data.id).to.eql(pm.environment.get("customer_id")); });']),
+])
+CHARGES = ("Charges", [
+    item("Charge customer", "POST", "/v1/charges", {"amount": "700", "currency": "usd", "customer": "{{customer_id}}"}, [
+        'pm.test("Created", () => { pm.response.to.have.status(200);',
+        '  pm.expect(pm.response.json().customer).to.include("cus_"); });']),
+    item("List", "GET", "/v1/charges", tests=['pm.test("Status is 200", () => pm.response.to.have.status(200));']),
+])
+
+@pytest.fixture
+def mock_client():
+    client = StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(MockServer())))
+    yield client
+    client.close()
+
+@pytest.fixture(scope="module")
+def collection_run(api_client):
+    return PostmanRunner(api_client).run(COLLECTION)
+
+class TestPostmanCollection:
+    @pytest.mark.stripe_mock
+    @pytest.mark.parametrize("key", [entry.key for entry in COLLECTION.items])
+    def test_collection_request(self, collection_run, key):
+        assert key not in collection_run.errors and key not in collection_run.skipped
+        result = collection_run.results[key]
+        assert result.ok, f"{result.item.method} {result.url} -> {result.status}: {result.failures}"
+
+class TestPostmanRunner:
+    @pytest.mark.client
+    def test_dependencies_follow_variables_and_folder_order(self, mock_client):
+        flows = collection(CUSTOMERS, CHARGES, ("Lists", [item("Customers", "GET", "/v1/customers")]))
+        flow = PostmanRunner(mock_client, environment={"STRIPE_API_KEY": "sk_test_123"}).workflow(flows, {})
+        assert flow.roots == ["Customers/Create", "Lists/Customers"]
+        assert flow.steps["Customers/Rename"].needs == ("Customers/Create",)
+        assert flow.steps["Charges/Charge customer"].needs == ("Customers/Create",)
+        assert flow.steps["Charges/List"].needs == ("Charges/Charge customer",)
+
+    @pytest.mark.client
+    def test_run_resolves_variables_and_checks(self, mock_client):
+        run = PostmanRunner(mock_client, environment={"STRIPE_API_KEY": "sk_test_123"}).run(collection(CUSTOMERS, CHARGES))
+        assert run.ok, run.failures()
+        customer_id = run.results["Customers/Create"].variables["customer_id"]
+        assert run.results["Customers/Rename"].url == f"http://mock.local/v1/customers/{customer_id}"
+        assert list(run.results) == [entry.key for entry in collection(CUSTOMERS, CHARGES).items]
+        assert run.stats["flows.Charges/Charge customer"]["count"] == 1
+        assert "4 requests in" in run.report()
+
+    @pytest.mark.client
+    def test_failed_checks_are_reported(self, mock_client):
+        bad = collection(("Auth", [
+            item("Wrong key", "GET", "/v1/charges", token="sk_live_nope",
+                 tests=['pm.test("Status is 200", () => {pm.response.to.have.status(200);});']),
+            item("Unknown", "GET", "/v1/customers/{{nobody}}",
+                 tests=['pm.test("Weird", () => { pm.expect(pm.response.code).to.be.oneOf([200]); });']),
+        ]))
+        run = PostmanRunner(mock_client, environment={}).run(bad)
+        assert not run.ok
+        assert run.results["Auth/Wrong key"].status == 401
+        assert run.results["Auth/Unknown"].url.endswith("/v1/customers/{{nobody}}")
+        assert run.failures() == [
+            "Auth/Wrong key: Status is 200: status is 401, expected 200",
+            "Auth/Unknown: Weird: unsupported test script: "
+            'pm.test("Weird", () => { pm.expect(pm.response.code).to.be.oneOf([200]); });',
+        ]
+
+    @pytest.mark.client
+    def test_script_parsing(self):
+        checks, captures = parse_test_script(
+            'pm.test("A", () => {pm.response.to.have.status(201);});\n'
+            'pm.test("B", () => { pm.expect(pm.response.json().deleted).to.be.true; });\n'
+            'pm.environment.set("thing", pm.response.json().nested.id);')
+        assert [(c.test, c.kind, c.field, c.expected) for c in checks] == [
+            ("A", "status", None, 201), ("B", "true", "deleted", None)]
+        assert captures == {"thing": "nested.id"}
+        assert substitute("{{a}}/{{b}}", {"a": "1"}.get) == "1/{{b}}"
@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import pytest
+from config.constants import StatusCodes
+from src.api_client import StripeClient
+from src.helpers import assert_status_code
+from src.ratelimit import RateLimiter, SharedTokenBucket, TokenBucket, parse_family_rates
+from src.routing import endpoint_family
+
+def _drain_shared_bucket(path, count, queue):
+    bucket = SharedTokenBucket(path, rate=1.0, capacity=5)
+    queue.put([bucket.reserve() for _ in range(count)])
+    bucket.close()
+
+class TestTokenBucket:
+    @pytest.mark.client
+    def test_burst_is_free_then_requests_queue(self):
+        bucket = TokenBucket(rate=10.0, capacity=3)
+        waits = [bucket.reserve() for _ in range(5)]
+        assert waits[:3] == [0.0, 0.0, 0.0]
+        assert waits[3] == pytest.approx(0.1, abs=0.01)
+        assert waits[4] == pytest.approx(0.2, abs=0.01)
+
+    @pytest.mark.client
+    def test_rate_must_be_positive(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+    @pytest.mark.client
+    def test_shared_bucket_is_one_budget_across_processes(self, tmp_path):
+        path = str(tmp_path / "shared.bucket")
+        queue = multiprocessing.get_context("fork").Queue()
+        workers = [
+            multiprocessing.get_context("fork").Process(target=_drain_shared_bucket, args=(path, 5, queue))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        waits = sorted(queue.get(timeout=10) + queue.get(timeout=10))
+        for worker in workers:
+            worker.join()
+        # 10 reservations against a 5-token bucket: 5 free, 5 queued behind them.
+        assert waits[:5] == [0.0] * 5
+        assert all(wait > 0 for wait in waits[5:])
+        assert waits[-1] == pytest.approx(5.0, abs=0.1)
+
+class TestRateLimiter:
+    @pytest.mark.client
+    @pytest.mark.parametrize("endpoint, family", [
+        ("/v1/charges", "charges"),
+        ("/v1/charges/ch_1/capture", "charges"),
+        ("/v1/customers/search?query=x", "customers"),
+        ("/v1/payment_intents/pi_1", "payment_intents"),
+    ])
+    def test_endpoint_family(self, endpoint, family):
+        assert endpoint_family(endpoint) == family
+
+    @pytest.mark.client
+    def test_parse_family_rates(self):
+        assert parse_family_rates(" charges=25, refunds=2.5,") == {"charges": 25.0, "refunds": 2.5}
+
+    @pytest.mark.client
+    def test_family_buckets_are_independent(self):
+        limiter = RateLimiter(family_rates={"charges": 1.0})
+        assert limiter.reserve("/v1/charges") == 0.0
+        assert limiter.reserve("/v1/charges/ch_1") > 0
+        assert limiter.reserve("/v1/customers") == 0.0
+        assert limiter.stats()["waits"] == 1
+
+    @pytest.mark.client
+    def test_global_bucket_applies_to_every_family(self):
+        limiter = RateLimiter(rate=1.0, family_rates={"charges": 100.0})
+        assert limiter.reserve("/v1/charges") == 0.0
+        assert limiter.reserve("/v1/customers") > 0
+
+    @pytest.mark.client
+    def test_shared_limiters_with_same_scope_share_buckets(self, tmp_path):
+        first = RateLimiter(rate=1.0, shared=True, state_dir=str(tmp_path), scope="http://a")
+        second = RateLimiter(rate=1.0, shared=True, state_dir=str(tmp_path), scope="http://a")
+        other = RateLimiter(rate=1.0, shared=True, state_dir=str(tmp_path), scope="http://b")
+        assert first.reserve("/v1/charges") == 0.0
+        assert second.reserve("/v1/charges") > 0
+        assert other.reserve("/v1/charges") == 0.0
+        assert len(os.listdir(tmp_path)) == 2
+        for limiter in (first, second, other):
+            limiter.close()
+
+    @pytest.mark.client
+    def test_disabled_by_default(self, api_client):
+        assert api_client.rate_limiter is None
+        assert api_client.rate_limit_stats() == {"waits": 0, "waited_s": 0.0}
+
+    @pytest.mark.client
+    def test_client_waits_for_tokens(self):
+        limiter = RateLimiter(burst=1, family_rates={"customers": 20.0})
+        with StripeClient(rate_limiter=limiter) as client:
+            for _ in range(3):
+                assert_status_code(client.list_customers(limit=1), StatusCodes.OK)
+            stats = client.rate_limit_stats()
+        assert stats["waits"] == 2
+        assert stats["waited_s"] > 0
@@ -1,33 +1,24 @@
 import pytest
-import json
 from config.constants import StatusCodes, ObjectPrefix
-from src.helpers import assert_id_prefix
-
-def get_data(response):
-    if isinstance(response, dict):
-        return response
-    elif isinstance(response, str):
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"id": response}
-    else:
-        return response.json()
+from src.helpers import get_data, assert_id_prefix
 
 class TestRefundsCreate:
     @pytest.mark.refunds
+    @pytest.mark.stripe_mock
     def test_refund_create_success(self, api_client, sample_refund_data):
         response = api_client.create_refund(**sample_refund_data)
         data = get_data(response)
         assert_id_prefix(data, ObjectPrefix.REFUND)
     
     @pytest.mark.refunds
+    @pytest.mark.stripe_mock
     def test_refund_create_missing_charge(self, api_client):
         response = api_client.create_refund(amount=1000, currency="usd")
         data = get_data(response)
         assert "id" in data  # stripe-mock may create mock refund
     
     @pytest.mark.refunds
+    @pytest.mark.stripe_mock
     def test_refund_create_invalid_amount(self, api_client):
         response = api_client.create_refund(amount=-100, currency="usd")
         data = get_data(response)
@@ -42,6 +33,7 @@ class TestRefundsRetrieve:
         assert data["id"] == refund_id
     
     @pytest.mark.refunds
+    @pytest.mark.stripe_mock
     def test_refund_retrieve_not_found(self, api_client):
         response = api_client.retrieve_refund("rf_invalid")
         data = get_data(response)
@@ -64,6 +56,7 @@ class TestRefundsUpdate:
 
 class TestRefundsCancel:
     @pytest.mark.refunds
+    @pytest.mark.stripe_mock
     def test_refund_cancel_success(self, api_client, created_refund):
         refund_id = get_data(created_refund)["id"]
         response = api_client.cancel_refund(refund_id)
@@ -71,6 +64,7 @@ class TestRefundsCancel:
         assert "id" in data
     
     @pytest.mark.refunds
+    @pytest.mark.stripe_mock
     def test_refund_cancel_not_found(self, api_client):
         response = api_client.cancel_refund("rf_invalid")
         data = get_data(response)
@@ -0,0 +1,67 @@
+import pytest
+from config.constants import ObjectPrefix
+from src.helpers import assert_object_type, assert_required_fields, assert_is_list_response, extract_id
+from src.resources import Customer, ListObject, PaymentIntent, StripeObject
+
+class CountingResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self.body = body
+        self.reads = 0
+
+    @property
+    def content(self):
+        self.reads += 1
+        return self.body
+
+class TestResourceObjects:
+    @pytest.mark.client
+    def test_body_is_parsed_once(self):
+        raw = CountingResponse(b'{"id": "cus_123", "object": "customer", "email": "a@example.com"}')
+        customer = Customer(raw)
+        assert raw.reads == 0
+        assert_object_type(customer, "customer")
+        assert_required_fields(customer, ["id", "email"])
+        assert extract_id(customer) == "cus_123"
+        assert customer.email == "a@example.com"
+        assert raw.reads == 1
+
+    @pytest.mark.client
+    def test_resources_use_slots(self):
+        customer = Customer.from_dict({"id": "cus_123"})
+        assert not hasattr(customer, "__dict__")
+        with pytest.raises(AttributeError):
+            customer.missing_field
+
+    @pytest.mark.client
+    def test_list_object_yields_typed_items(self):
+        page = ListObject.from_dict({"object": "list", "has_more": False,
+                                     "data": [{"id": "pi_1", "object": "payment_intent"}, {"id": "x", "object": "other"}]})
+        items = list(page)
+        assert len(page) == 2
+        assert type(items[0]) is PaymentIntent
+        assert type(items[1]) is StripeObject
+
+    @pytest.mark.client
+    def test_truthiness_follows_status_like_requests(self):
+        failed = CountingResponse(b'{"error": {"type": "invalid_request_error"}}')
+        failed.status_code = 404
+        assert not StripeObject(failed)
+        assert Customer(CountingResponse(b'{"id": "cus_123"}'))
+        assert ListObject.from_dict({"object": "list", "data": []})
+
+    @pytest.mark.payment_intents
+    def test_client_returns_typed_objects(self, api_client, sample_payment_intent_data):
+        payment_intent = api_client.create_payment_intent(**sample_payment_intent_data)
+        assert isinstance(payment_intent, PaymentIntent)
+        assert payment_intent.id.startswith(ObjectPrefix.PAYMENT_INTENT)
+        assert payment_intent["currency"] == "usd"
+
+    @pytest.mark.customers
+    def test_list_returns_list_object(self, api_client):
+        page = api_client.list_customers(limit=3)
+        assert isinstance(page, ListObject)
+        assert_is_list_response(page, "customer")
+        assert all(isinstance(customer, Customer) for customer in page)
@@ -0,0 +1,133 @@
+from http.client import RemoteDisconnected
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from config.constants import StatusCodes
+from config.settings import settings
+from src.api_client import StripeClient
+from src.helpers import assert_status_code
+from src.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+class ScriptedAdapter(BaseAdapter):
+    """Answers each request with the next scripted status (or raises it)."""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step if isinstance(step, tuple) else (step, {})
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = b'{"id": "ch_1", "object": "charge"}'
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+def scripted_client(script, **policy):
+    adapter = ScriptedAdapter(script)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    policy.setdefault("base_delay", 0.0)
+    policy.setdefault("max_delay", 0.0)
+    return StripeClient(session=session, retry_policy=RetryPolicy(**policy)), adapter
+
+class TestRetryPolicy:
+    @pytest.mark.client
+    @pytest.mark.parametrize("status", [429, 502, 503, 504])
+    def test_transient_status_is_retried(self, status):
+        client, adapter = scripted_client([status, 200])
+        assert_status_code(client.retrieve_charge("ch_1"), StatusCodes.OK)
+        assert len(adapter.requests) == 2
+        assert client.retry_stats()["by_reason"] == {str(status): 1}
+
+    @pytest.mark.client
+    def test_client_errors_are_not_retried(self):
+        client, adapter = scripted_client([400])
+        assert_status_code(client.retrieve_charge("ch_1"), StatusCodes.BAD_REQUEST)
+        assert len(adapter.requests) == 1
+
+    @pytest.mark.client
+    def test_gives_up_after_max_retries(self):
+        client, adapter = scripted_client([503, 503, 503], max_retries=2)
+        assert_status_code(client.retrieve_charge("ch_1"), StatusCodes.SERVICE_UNAVAILABLE)
+        assert len(adapter.requests) == 3
+
+    @pytest.mark.client
+    def test_post_retries_reuse_idempotency_key(self):
+        client, adapter = scripted_client([requests.ConnectionError("reset"), 502, 200])
+        assert_status_code(client.create_charge(amount=2000, currency="usd"), StatusCodes.OK)
+        keys = {request.headers["Idempotency-Key"] for request in adapter.requests}
+        assert len(adapter.requests) == 3 and len(keys) == 1
+        assert client.retry_stats()["by_endpoint"] == {"POST /v1/charges": 2}
+
+    @pytest.mark.client
+    def test_dropped_post_without_key_is_not_replayed(self, monkeypatch):
+        monkeypatch.setattr(settings, "AUTO_IDEMPOTENCY_KEY", False)
+        # The body went out; the server may have created the charge already.
+        dropped = requests.ConnectionError(
+            "Connection aborted.", RemoteDisconnected("Remote end closed connection without response"))
+        client, adapter = scripted_client([dropped, 200])
+        with pytest.raises(requests.ConnectionError):
+            client.create_charge(amount=2000, currency="usd")
+        assert len(adapter.requests) == 1
+        assert "Idempotency-Key" not in adapter.requests[0].headers
+        # A retrieve is safe to send again.
+        client, adapter = scripted_client([dropped, 200])
+        assert_status_code(client.retrieve_charge("ch_1"), StatusCodes.OK)
+        assert len(adapter.requests) == 2
+
+    @pytest.mark.client
+    def test_read_timeout_on_get_is_retried(self):
+        client, adapter = scripted_client([requests.ReadTimeout("slow"), 200])
+        assert_status_code(client.list_charges(), StatusCodes.OK)
+        assert "Idempotency-Key" not in adapter.requests[0].headers
+
+    @pytest.mark.client
+    def test_stripe_should_retry_header_wins(self):
+        client, adapter = scripted_client([(409, {"Stripe-Should-Retry": "true"}), (503, {"Stripe-Should-Retry": "false"})])
+        assert_status_code(client.retrieve_charge("ch_1"), StatusCodes.SERVICE_UNAVAILABLE)
+        assert len(adapter.requests) == 2
+
+    @pytest.mark.client
+    def test_budget_caps_retries_across_requests(self):
+        client, adapter = scripted_client([503, 503, 503, 503], budget=RetryBudget(1))
+        client.retrieve_charge("ch_1")
+        client.retrieve_charge("ch_1")
+        assert len(adapter.requests) == 3
+        stats = client.retry_stats()
+        assert stats["retries"] == 1 and stats["budget_exhausted"] == 2 and stats["budget_remaining"] == 0
+
+    @pytest.mark.client
+    def test_retry_after_is_honoured(self):
+        policy = RetryPolicy(max_retry_after=10)
+        response = requests.Response()
+        response.status_code = 429
+        response.headers["Retry-After"] = "3"
+        assert policy.next_delay(0, 0.0, "GET", {}, "/v1/charges", response=response) == 3
+
+    @pytest.mark.client
+    def test_decorrelated_jitter_bounds(self):
+        policy = RetryPolicy(max_retries=100, base_delay=0.1, max_delay=2.0, budget=RetryBudget(100))
+        response = requests.Response()
+        response.status_code = 503
+        delay = 0.0
+        for attempt in range(20):
+            previous = delay or 0.1
+            delay = policy.next_delay(attempt, delay, "GET", {}, "/v1/charges", response=response)
+            assert 0.1 <= delay <= min(2.0, previous * 3)
+
+    @pytest.mark.client
+    def test_parse_retry_after(self):
+        assert parse_retry_after("2") == 2.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
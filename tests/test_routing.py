@@ -0,0 +1,47 @@
+import pytest
+import requests
+from config.constants import Endpoints
+from src.api_client import BaseStripeClient, StripeClient
+from src.retry import RetryPolicy
+from src.routing import ROUTES, bind_routes, resolve_template
+from src.transport import PooledHTTPAdapter, build_session
+
+class TestRouting:
+    @pytest.mark.client
+    @pytest.mark.parametrize("path, template", [
+        ("/v1/customers/cus_123", Endpoints.CUSTOMER),
+        ("/v1/customers/search", Endpoints.SEARCH_CUSTOMERS),
+        ("/v1/payment_intents/pi_1/confirm", Endpoints.CONFIRM_PAYMENT_INTENT),
+        ("/v1/charges?limit=3", Endpoints.CHARGES),
+        ("/v1/nonexistent_endpoint", "/v1/nonexistent_endpoint"),
+    ])
+    def test_resolve_template(self, path, template):
+        assert resolve_template(path) == template
+
+    @pytest.mark.client
+    def test_route_table_covers_endpoint_methods(self):
+        prefixes = ("create_", "retrieve_", "update_", "delete_", "list_", "search_", "confirm_", "capture_", "cancel_")
+        methods = {name for name in vars(BaseStripeClient) if name.startswith(prefixes)}
+        assert methods == set(ROUTES)
+
+    @pytest.mark.client
+    def test_bound_routes_match_templates(self):
+        for name, route in bind_routes("http://mock.local").items():
+            built = route.url_head + "obj_1" + route.tail if "{id}" in route.template else route.url_head
+            assert built == "http://mock.local" + route.template.format(id="obj_1"), name
+
+    @pytest.mark.client
+    def test_routes_and_headers_follow_client_settings(self):
+        client = StripeClient(base_url="http://one.local", api_key="sk_test_one", retry_policy=RetryPolicy(max_retries=0),
+                              session=build_session(PooledHTTPAdapter()))
+        urls = []
+        client.add_hook("before_request", lambda event: urls.append((event.url, event.template)))
+        client.base_url = "http://two.local"
+        client.api_key = "sk_test_two"
+        assert client.headers["Authorization"] == "Bearer sk_test_two"
+        with pytest.raises(requests.ConnectionError):
+            client.retrieve_charge("ch_1")
+        assert urls[0] == ("http://two.local/v1/charges/ch_1", Endpoints.CHARGE)
+        client.api_key = ""
+        assert "Authorization" not in client.headers
+        client.close()
@@ -0,0 +1,136 @@
+import json
+from types import SimpleNamespace
+import pytest
+from config.settings import settings
+from src.api_client import StripeClient
+from src.impact import ImpactRecorder
+from src.mock_server import InProcessAdapter, MockServer
+from src.scheduling import (LPTScheduling, TimingsRecorder, fixture_key, load_timings, makespan, plan_units,
+                            pytest_runtest_makereport, pytest_sessionfinish, save_timings)
+from src.transport import build_session
+
+COLLECTION = [
+    "tests/test_auth_errors.py::TestAuthentication::test_missing_key",
+    "tests/test_auth_errors.py::TestAuthentication::test_invalid_key",
+    "tests/test_postman.py::TestPostmanCollection::test_collection_request[Charges/Create]",
+    "tests/test_postman.py::TestPostmanCollection::test_collection_request[Charges/List]",
+    "tests/test_refunds.py::TestRefunds::test_cancel_refund",
+    "tests/test_refunds.py::TestRefunds::test_update_refund",
+    "tests/test_customers.py::TestCustomers::test_new",
+]
+POSTMAN_RUN = "tests/test_postman.py::collection_run"
+TIMINGS = {
+    COLLECTION[0]: {"duration": 0.01, "calls": 1, "fixtures": {}},
+    COLLECTION[1]: {"duration": 0.01, "calls": 1, "fixtures": {}},
+    COLLECTION[2]: {"duration": 2.0, "calls": 30, "fixtures": {POSTMAN_RUN: 1.99}},
+    COLLECTION[3]: {"duration": 0.01, "calls": 0, "fixtures": {POSTMAN_RUN: 0.0}},
+    COLLECTION[4]: {"duration": 0.5, "calls": 3, "fixtures": {}},
+    COLLECTION[5]: {"duration": 0.4, "calls": 3, "fixtures": {}},
+}
+
+class FakeConfig:
+    def getvalue(self, name):
+        return ["2*popen"]
+
+    def getoption(self, name):
+        return None
+
+class FakeNode:
+    def __init__(self, name):
+        self.gateway = type("Gateway", (), {"id": name})()
+        self.shutting_down = False
+        self.sent = []
+
+    def send_runtest_some(self, indices):
+        self.sent.extend(indices)
+
+    def shutdown(self):
+        self.shutting_down = True
+
+class TestScheduling:
+    @pytest.mark.client
+    def test_fixture_key(self):
+        nodeid = "tests/test_postman.py::TestPostmanCollection::test_collection_request[x]"
+        assert fixture_key(nodeid, "module", "collection_run") == POSTMAN_RUN
+        assert fixture_key(nodeid, "class", "shared") == "tests/test_postman.py::TestPostmanCollection::shared"
+        assert fixture_key(nodeid, "package", "shared") == "tests::shared"
+
+    @pytest.mark.client
+    def test_plan_groups_shared_fixtures_and_puts_longest_first(self):
+        units = plan_units(COLLECTION, TIMINGS, threshold=0.05)
+        assert [members for _, members in units] == [[2, 3], [4], [5], [6], [0], [1]]
+        # The unknown test costs the median of the known ones.
+        assert units[0][0] == pytest.approx(2.01)
+        assert units[3][0] == pytest.approx((0.01 + 0.4) / 2)
+        # Below the threshold every test is its own unit.
+        assert len(plan_units(COLLECTION, TIMINGS, threshold=5.0)) == len(COLLECTION)
+        # No timings yet: collection order.
+        assert [members for _, members in plan_units(COLLECTION, {}, threshold=0.05)] == [[i] for i in range(7)]
+
+    @pytest.mark.client
+    def test_longest_first_beats_collection_order(self):
+        costs = [0.1] * 12 + [3.0, 2.5, 2.0]
+        assert makespan(costs, 3) == pytest.approx(3.4)
+        assert makespan(sorted(costs, reverse=True), 3) == pytest.approx(3.0)
+
+    @pytest.mark.client
+    def test_timings_are_smoothed_across_runs(self, tmp_path):
+        path = str(tmp_path / "timings.json")
+        save_timings(path, {"t::a": {"duration": 1.0, "calls": 2, "fixtures": {}}}, smoothing=0.5)
+        save_timings(path, {"t::a": {"duration": 3.0, "calls": 4, "fixtures": {}},
+                            "t::b": {"duration": 0.2, "calls": 0, "fixtures": {}}}, smoothing=0.5)
+        assert load_timings(path) == {"t::a": {"duration": 2.0, "calls": 4, "fixtures": {}},
+                                      "t::b": {"duration": 0.2, "calls": 0, "fixtures": {}}}
+        assert json.loads((tmp_path / "timings.json").read_text())["version"] == 1
+
+    @pytest.mark.client
+    def test_scheduler_hands_out_whole_units(self, tmp_path, monkeypatch):
+        path = tmp_path / "timings.json"
+        path.write_text(json.dumps({"version": 1, "tests": TIMINGS}))
+        monkeypatch.setattr(settings, "TEST_TIMINGS", str(path))
+        scheduler = LPTScheduling(FakeConfig())
+        first, second = FakeNode("gw0"), FakeNode("gw1")
+        for node in (first, second):
+            scheduler.add_node(node)
+            scheduler.add_node_collection(node, COLLECTION)
+        scheduler.schedule()
+        assert (first.sent, second.sent) == ([2, 3], [4, 5])
+        scheduler.mark_test_complete(first, 2)
+        assert first.sent == [2, 3, 6]
+        scheduler.mark_test_complete(second, 4)
+        assert second.sent == [4, 5, 0]
+        scheduler.mark_test_complete(first, 3)
+        assert first.sent == [2, 3, 6, 1]
+        assert first.shutting_down and not second.shutting_down and not scheduler.pending
+        # A crashed worker's remaining tests go back out together, first.
+        assert scheduler.remove_node(second) == COLLECTION[5]
+        assert scheduler.units == [[0]]
+        assert scheduler.pending == [0]
+
+    @pytest.mark.client
+    def test_saved_calls_match_requests_sent(self, tmp_path, monkeypatch):
+        nodeid = "tests/test_x.py::test_three_calls"
+        impact = ImpactRecorder()
+        impact.install()
+        try:
+            impact.running = nodeid
+            with StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(MockServer()))) as client:
+                customer = client.create_customer(email="timings@example.com")
+                client.retrieve_customer(customer.id)
+                client.list_charges()
+        finally:
+            impact.uninstall()
+
+        config = SimpleNamespace(_impact_recorder=impact, _timings_recorder=TimingsRecorder())
+        report = SimpleNamespace(nodeid=nodeid, when="teardown", duration=0.01)
+        hook = pytest_runtest_makereport(SimpleNamespace(nodeid=nodeid, config=config), SimpleNamespace(when="teardown"))
+        next(hook)
+        with pytest.raises(StopIteration):
+            hook.send(SimpleNamespace(get_result=lambda: report))
+        config._timings_recorder.pytest_runtest_logreport(report)
+
+        path = str(tmp_path / "timings.json")
+        monkeypatch.setattr(settings, "TEST_TIMINGS", path)
+        monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+        pytest_sessionfinish(SimpleNamespace(config=config), 0)
+        assert load_timings(path)[nodeid]["calls"] == 3
@@ -0,0 +1,78 @@
+import pytest
+from src.helpers import validate_json_schema, validate_list_schema
+from src.schemas import SchemaRegistry, registry
+
+class TestSchemaRegistry:
+    @pytest.mark.schema
+    def test_validators_are_compiled_once(self):
+        local = SchemaRegistry()
+        assert local.validator("customer") is local.validator("customer")
+        schema = {"type": "object", "required": ["id"]}
+        assert local.validator(schema) is local.validator(schema)
+        # An equal literal written out again shares the compiled validator.
+        assert local.validator({"required": ["id"], "type": "object"}) is local.validator(schema)
+
+    @pytest.mark.schema
+    def test_adhoc_cache_is_bounded(self):
+        local = SchemaRegistry(cache_size=2)
+        first = local.validator({"minimum": 1})
+        local.validator({"minimum": 2})
+        assert local.validator({"minimum": 1}) is first
+        local.validator({"minimum": 3})
+        assert len(local._adhoc) == 2
+        assert local.validator({"minimum": 1}) is first
+        schema = {"minimum": 4}
+        validator = local.validator(schema)
+        schema["minimum"] = 0
+        assert not validator.is_valid(0)
+
+    @pytest.mark.schema
+    def test_unknown_object_type(self):
+        with pytest.raises(KeyError):
+            registry.validator("invoice")
+
+    @pytest.mark.schema
+    def test_batch_reports_every_failure(self):
+        items = [
+            {"id": "cus_1", "object": "customer", "created": 1, "livemode": False},
+            {"id": "bad", "object": "customer", "created": "x", "livemode": False},
+            {"id": "ch_1", "object": "charge"},
+        ]
+        failures = registry.validate_items(items)
+        assert any(f.startswith("[1] bad: id") for f in failures)
+        assert any(f.startswith("[1] bad: created") for f in failures)
+        assert any(f.startswith("[2] ch_1") for f in failures)
+        assert not any(f.startswith("[0]") for f in failures)
+
+    @pytest.mark.schema
+    def test_adhoc_schema_dict(self):
+        validate_json_schema({"id": "x"}, {"type": "object", "required": ["id"]})
+        with pytest.raises(AssertionError, match="Schema validation failed"):
+            validate_json_schema({}, {"type": "object", "required": ["id"]})
+
+class TestResponseSchemas:
+    @pytest.mark.schema
+    def test_payment_intent_schema(self, created_payment_intent):
+        validate_json_schema(created_payment_intent, "payment_intent")
+
+    @pytest.mark.schema
+    def test_customer_schema(self, created_customer):
+        validate_json_schema(created_customer, "customer")
+
+    @pytest.mark.schema
+    def test_charge_schema(self, created_charge):
+        validate_json_schema(created_charge, "charge")
+
+    @pytest.mark.schema
+    def test_refund_schema(self, created_refund):
+        validate_json_schema(created_refund, "refund")
+
+    @pytest.mark.schema
+    @pytest.mark.parametrize("method, object_type", [
+        ("list_payment_intents", "payment_intent"),
+        ("list_customers", "customer"),
+        ("list_charges", "charge"),
+        ("list_refunds", "refund"),
+    ])
+    def test_list_pages(self, api_client, method, object_type):
+        validate_list_schema(getattr(api_client, method)(limit=100), object_type)
@@ -0,0 +1,130 @@
+import socket
+import time
+from urllib.parse import urlsplit
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from config.constants import RefundStatus
+from src.api_client import StripeClient
+from src.mock_server import InProcessAdapter, MockServer
+from src.retry import RetryPolicy
+from src.sharding import ShardedAdapter, parse_shard_urls
+from src.transport import build_session
+
+SHARDS = ["http://shard-a.local", "http://shard-b.local", "http://shard-c.local"]
+
+class PerHostAdapter(BaseAdapter):
+    """One stateful MockServer per host; hosts in ``down`` refuse connections."""
+
+    def __init__(self, urls):
+        super().__init__()
+        self.backends = {urlsplit(url).netloc: InProcessAdapter(MockServer()) for url in urls}
+        self.down = set()
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).netloc
+        if host in self.down:
+            raise requests.ConnectionError(f"Connection refused: {host}")
+        return self.backends[host].send(request, **kwargs)
+
+    def close(self):
+        pass
+
+def sharded_client(policy, cooldown=5.0, retries=0):
+    backends = PerHostAdapter(SHARDS)
+    adapter = ShardedAdapter(SHARDS, backends, policy=policy, cooldown=cooldown)
+    client = StripeClient(session=build_session(adapter), base_urls=SHARDS,
+                          retry_policy=RetryPolicy(max_retries=retries, base_delay=0.001))
+    return client, adapter, backends
+
+def requests_per_shard(client):
+    return [stats["requests"] for stats in client.shard_stats().values()]
+
+class TestSharding:
+    @pytest.mark.client
+    def test_parse_shard_urls(self):
+        assert parse_shard_urls(" http://a:1/, http://b:2 ,,") == ["http://a:1", "http://b:2"]
+        with pytest.raises(ValueError):
+            ShardedAdapter(SHARDS, PerHostAdapter(SHARDS), policy="random")
+
+    @pytest.mark.client
+    def test_round_robin_spreads_evenly(self):
+        client, _, _ = sharded_client("round_robin")
+        for _ in range(9):
+            client.list_customers(limit=1)
+        assert requests_per_shard(client) == [3, 3, 3]
+
+    @pytest.mark.client
+    def test_least_outstanding_avoids_busy_shards(self):
+        client, adapter, _ = sharded_client("least_outstanding")
+        adapter.shards[0].in_flight = 2
+        for _ in range(4):
+            client.list_charges(limit=1)
+        assert requests_per_shard(client) == [0, 2, 2]
+
+    @pytest.mark.client
+    def test_hash_follows_objects_to_their_shard(self):
+        client, _, _ = sharded_client("hash")
+        for i in range(6):
+            customer = client.create_customer(email=f"shard{i}@example.com")
+            charge = client.create_charge(amount=500, currency="usd", customer=customer.id)
+            refund = client.create_refund(charge=charge.id)
+            assert client.retrieve_customer(customer.id).email == f"shard{i}@example.com"
+            assert client.retrieve_charge(charge.id).customer == customer.id
+            assert client.retrieve_refund(refund.id).status == RefundStatus.SUCCEEDED
+        assert sum(1 for count in requests_per_shard(client) if count) > 1
+
+    @pytest.mark.client
+    def test_ring_moves_only_keys_of_an_ejected_shard(self):
+        adapter = ShardedAdapter(SHARDS, PerHostAdapter(SHARDS), policy="hash")
+        keys = [f"cus_{i}" for i in range(300)]
+        before = {key: adapter._on_ring(key, 0.0) for key in keys}
+        assert len(set(before.values())) == 3
+        adapter._eject(adapter.shards[0])
+        after = {key: adapter._on_ring(key, 0.0) for key in keys}
+        for key in keys:
+            assert after[key] is not adapter.shards[0]
+            if before[key] is not adapter.shards[0]:
+                assert after[key] is before[key]
+
+    @pytest.mark.client
+    def test_dead_shard_is_ejected_and_readmitted(self):
+        client, _, backends = sharded_client("round_robin", cooldown=0.05, retries=2)
+        backends.down.add("shard-b.local")
+        for _ in range(6):
+            assert client.list_customers(limit=1).status_code == 200
+        stats = client.shard_stats()["http://shard-b.local"]
+        assert (stats["errors"], stats["ejections"], stats["healthy"]) == (1, 1, 0)
+        backends.down.clear()
+        time.sleep(0.06)
+        for _ in range(6):
+            client.list_customers(limit=1)
+        assert client.shard_stats()["http://shard-b.local"]["healthy"] == 1
+
+    @pytest.mark.client
+    def test_all_shards_down(self):
+        client, _, backends = sharded_client("least_outstanding")
+        backends.down.update(urlsplit(url).netloc for url in SHARDS)
+        for _ in SHARDS:
+            with pytest.raises(requests.ConnectionError):
+                client.list_charges(limit=1)
+        with pytest.raises(requests.ConnectionError, match="All 3 shards are ejected"):
+            client.list_charges(limit=1)
+
+    @pytest.mark.client
+    @pytest.mark.live
+    def test_check_health_probes_tcp(self):
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        live_url = f"http://127.0.0.1:{listener.getsockname()[1]}"
+        dead_url = f"http://127.0.0.1:{closed.getsockname()[1]}"
+        closed.close()
+        try:
+            with StripeClient(base_urls=[live_url, dead_url]) as client:
+                assert client.check_shards(timeout=0.5) == {live_url: True, dead_url: False}
+                assert client.shard_stats()[dead_url]["healthy"] == 0
+        finally:
+            listener.close()
@@ -0,0 +1,19 @@
+import pytest
+from benchmarks.startup import measure_startup, parse_importtime
+
+class TestStartup:
+    @pytest.mark.client
+    def test_parse_importtime(self):
+        output = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       120 |        120 |     requests.compat\n"
+                  "import time:        80 |        200 |   requests\n"
+                  "import time:        40 |        240 | src.api_client\n")
+        assert parse_importtime(output) == [
+            ("requests.compat", 2, 120, 120), ("requests", 1, 80, 200), ("src.api_client", 0, 40, 240)]
+
+    @pytest.mark.client
+    def test_heavy_dependencies_load_lazily(self):
+        # The ms budget is left to python -m benchmarks.startup: wall-clock
+        # time is not reliable next to other tests (e.g. under -n).
+        report = measure_startup(runs=1)
+        assert report["eager"] == [], f"imported at startup, should be lazy: {report['eager']}"
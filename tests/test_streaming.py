@@ -0,0 +1,101 @@
+import json
+import pytest
+from config.constants import StatusCodes
+from src.api_client import StripeClient
+from src.helpers import assert_is_list_response, assert_status_code
+from src.mock_server import InProcessAdapter, MockServer
+from src.resources import Customer
+from src.streaming import ListStream
+from src.transport import build_session
+
+def list_body(count, **meta):
+    items = [{"id": f"ch_{i}", "object": "charge", "description": 'quote " brace } bracket ]', "metadata": {"n": [i, None]}}
+             for i in range(count)]
+    return {"object": "list", "url": "/v1/charges", **meta, "data": items, "has_more": True}
+
+def chunked(raw, size):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+@pytest.fixture
+def mock_client():
+    client = StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(MockServer())))
+    yield client
+    client.close()
+
+class TestListStream:
+    @pytest.mark.client
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+    def test_items_and_meta_for_any_chunking(self, chunk_size):
+        body = list_body(20)
+        stream = ListStream(chunked(json.dumps(body).encode(), chunk_size))
+        assert list(stream) == body["data"]
+        assert stream.meta == {"object": "list", "url": "/v1/charges", "has_more": True}
+        assert stream.has_data
+
+    @pytest.mark.client
+    def test_first_item_arrives_before_the_body_ends(self):
+        raw = json.dumps(list_body(100)).encode()
+        chunks = chunked(raw, 256)
+        read = []
+
+        def source():
+            for chunk in chunks:
+                read.append(chunk)
+                yield chunk
+        stream = iter(ListStream(source()))
+        assert next(stream)["id"] == "ch_0"
+        assert len(read) < 3
+
+    @pytest.mark.client
+    def test_buffer_stays_bounded(self):
+        raw = json.dumps(list_body(2000)).encode()
+        stream = ListStream(chunked(raw, 4096))
+        peak = 0
+        for _ in stream:
+            peak = max(peak, len(stream._buf))
+        assert peak < 4096 + 200
+        assert len(raw) > 50 * peak
+
+    @pytest.mark.client
+    def test_error_body_and_truncation(self):
+        stream = ListStream([b'{"error": {"type": "invalid_request_error"}}'])
+        assert list(stream) == []
+        assert stream.meta == {"error": {"type": "invalid_request_error"}}
+        assert not stream.has_data
+        with pytest.raises(ValueError):
+            list(ListStream(chunked(json.dumps(list_body(3)).encode()[:-60], 16)))
+
+class TestStreamingClient:
+    @pytest.mark.client
+    def test_stream_yields_typed_objects(self, mock_client):
+        ids = [mock_client.create_customer(email=f"s{i}@example.com").id for i in range(4)]
+        page = mock_client.stream_customers(limit=3)
+        assert page.streaming
+        streamed = list(page)
+        assert all(isinstance(customer, Customer) for customer in streamed)
+        assert [customer.id for customer in streamed] == ids[:0:-1]
+        assert page.has_more is True
+        assert page.url == "/v1/customers"
+        with pytest.raises(RuntimeError):
+            list(page)
+
+    @pytest.mark.client
+    def test_json_before_iterating_reads_the_whole_page(self, mock_client):
+        mock_client.create_charge(amount=500, currency="usd")
+        page = mock_client.stream_search_charges("amount>100")
+        assert page.json()["object"] == "search_result"
+        assert len(page) == 1
+        assert [charge.amount for charge in page] == [500]
+
+    @pytest.mark.client
+    def test_list_helper_checks_items_as_they_stream(self, mock_client):
+        mock_client.create_refund(charge=mock_client.create_charge(amount=500, currency="usd").id)
+        page = mock_client.stream_refunds(limit=10)
+        assert_is_list_response(page, "refund")
+        assert not page.streaming
+
+    @pytest.mark.client
+    def test_errors_are_readable(self, mock_client):
+        page = mock_client.stream_charges(limit=500)
+        assert_status_code(page, StatusCodes.BAD_REQUEST)
+        assert page.error["code"] == "parameter_invalid_integer"
@@ -0,0 +1,103 @@
+import threading
+import time
+import pytest
+from config.constants import PaymentIntentStatus, RefundStatus
+from src.api_client import StripeClient
+from src.mock_server import InProcessAdapter, MockServer
+from src.transport import build_session
+from src.workflow import Workflow, WorkflowRunner
+
+@pytest.fixture
+def mock_client():
+    client = StripeClient(base_url="http://mock.local", session=build_session(InProcessAdapter(MockServer())))
+    yield client
+    client.close()
+
+def refund_flow():
+    flow = Workflow("refund_captured_intent")
+    flow.step("intent", lambda c, ctx: c.create_payment_intent(
+        amount=ctx.input.get("amount", 2000), currency="usd", capture_method="manual"))
+    flow.step("confirm", lambda c, ctx: c.confirm_payment_intent(ctx["intent"].id, payment_method="pm_card_visa"),
+              needs=("intent",))
+    flow.step("capture", lambda c, ctx: c.capture_payment_intent(ctx["intent"].id), needs=("intent", "confirm"))
+    flow.step("refund", lambda c, ctx: c.create_refund(charge=ctx["capture"].latest_charge), needs=("capture",))
+    flow.step("customer", lambda c, ctx: c.create_customer(email="e2e@example.com"))
+    return flow
+
+def sleeping_step(seconds, active, peak, lock):
+    def call(client, ctx):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(seconds)
+        with lock:
+            active[0] -= 1
+        return ctx.input
+    return call
+
+class TestWorkflow:
+    @pytest.mark.client
+    def test_dependencies_must_be_declared_first(self):
+        flow = Workflow("flow").step("a", lambda c, ctx: None)
+        with pytest.raises(ValueError):
+            flow.step("b", lambda c, ctx: None, needs=("missing",))
+        with pytest.raises(ValueError):
+            flow.step("a", lambda c, ctx: None)
+
+    @pytest.mark.client
+    def test_end_to_end_flow(self, mock_client):
+        runner = WorkflowRunner(mock_client, max_workers=4)
+        runs = runner.run(refund_flow(), inputs=[{"amount": 1000}, {"amount": 3000}])
+        assert [run.ok for run in runs] == [True, True]
+        assert runs[1]["capture"].status == PaymentIntentStatus.SUCCEEDED
+        assert runs[1]["refund"].amount == 3000
+        assert runs[1]["refund"].status == RefundStatus.SUCCEEDED
+        stats = runner.stats()
+        assert stats["refund_captured_intent.refund"]["count"] == 2
+        assert stats["refund_captured_intent"]["count"] == 2
+
+    @pytest.mark.client
+    def test_independent_branches_and_runs_overlap(self):
+        # Every branch of every run waits for all 12 to be running at once;
+        # run one at a time, the barrier times out and the steps fail.
+        barrier = threading.Barrier(12, timeout=10)
+
+        def meet(client, ctx):
+            barrier.wait()
+            return ctx.input
+
+        flow = Workflow("fan_out")
+        for name in ("a", "b", "c"):
+            flow.step(name, meet)
+        flow.step("join", lambda c, ctx: ctx["a"], needs=("a", "b", "c"))
+        runs = WorkflowRunner(client=None, max_workers=12).run(flow, runs=4)
+        assert [run.errors for run in runs] == [{}] * 4
+        assert all(run.ok for run in runs)
+
+    @pytest.mark.client
+    def test_max_in_flight_bounds_active_runs(self):
+        active, peak, lock = [0], [0], threading.Lock()
+        flow = Workflow("serial").step("only", sleeping_step(0.01, active, peak, lock))
+        runs = WorkflowRunner(client=None, max_workers=8, max_in_flight=2).run(flow, inputs=[{"n": i} for i in range(6)])
+        assert peak[0] == 2
+        assert [run["only"]["n"] for run in runs] == list(range(6))
+
+    @pytest.mark.client
+    def test_failure_skips_only_dependents(self, mock_client):
+        flow = Workflow("declined")
+        flow.step("intent", lambda c, ctx: c.create_payment_intent(amount=2000, currency="usd"))
+        flow.step("confirm", lambda c, ctx: c.confirm_payment_intent(
+            ctx["intent"].id, payment_method="pm_card_chargeDeclined"), needs=("intent",))
+        flow.step("refund", lambda c, ctx: c.create_refund(payment_intent=ctx["intent"].id), needs=("confirm",))
+        flow.step("customer", lambda c, ctx: c.create_customer(email="e2e@example.com"))
+        run, = WorkflowRunner(mock_client).run(flow)
+        assert not run.ok
+        assert run.errors["confirm"].status_code == 402
+        assert run.skipped == {"refund"}
+        assert set(run.results) == {"intent", "customer"}
+
+    @pytest.mark.client
+    def test_undeclared_dependency_is_an_error(self):
+        flow = Workflow("sneaky").step("a", lambda c, ctx: 1).step("b", lambda c, ctx: ctx["a"])
+        run, = WorkflowRunner(client=None).run(flow)
+        assert isinstance(run.errors["b"], KeyError)